@@ -0,0 +1,11 @@
+"""
+ZLGCanManager 端到端性能基准，运行在虚拟总线（VirtualBackend）上，不需要硬件和 DLL。
+
+    python -m benchmarks                      # 运行全部基准，结果 JSON 输出到标准输出
+    python -m benchmarks -o results.json      # 写入文件，便于不同版本之间对比
+    python -m benchmarks --only decode receive --quick
+
+各基准模块提供 run(quick: bool = False) -> dict，结果中的时间单位见各模块说明。
+"""
+
+BENCHMARKS = ("decode", "receive", "auto_send", "sse", "memory")
@@ -0,0 +1,40 @@
+import argparse
+import importlib
+import json
+import logging
+import sys
+import time
+
+from benchmarks import BENCHMARKS
+from benchmarks.common import environment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ZLGCanManager 性能基准")
+    parser.add_argument(
+        "--only", nargs="+", choices=BENCHMARKS, help="只运行指定的基准"
+    )
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，为空时输出到标准输出")
+    parser.add_argument("--quick", action="store_true", help="缩短各基准的运行时间")
+    args = parser.parse_args()
+
+    # 基准运行期间的日志量很大，只保留错误
+    logging.disable(logging.WARNING)
+    report = {"environment": environment(), "quick": args.quick, "results": {}}
+    for name in args.only or BENCHMARKS:
+        module = importlib.import_module(f"benchmarks.{name}")
+        print(f"运行基准：{name}", file=sys.stderr)
+        start = time.perf_counter()
+        report["results"][name] = module.run(quick=args.quick)
+        print(f"  完成，用时 {time.perf_counter() - start:.1f} 秒", file=sys.stderr)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
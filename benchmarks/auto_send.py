@@ -0,0 +1,57 @@
+"""
+软件定时发送的周期精度：各周期下实际周期、抖动与截止时刻延迟的分位数（毫秒），
+以及虚拟通道上实际发出的帧数与理论帧数之比。
+"""
+import asyncio
+import time
+
+from benchmarks.common import open_manager
+
+INTERVALS = (1, 10, 20)
+
+
+async def measure(interval: int, duration: float, motors: int = 1) -> dict:
+    manager, backend = await open_manager()
+    chn = 0
+    channel = backend.bus(0).channels[chn]
+    try:
+        start = time.perf_counter()
+        for motor_id in range(motors):
+            await manager.start_auto_send_message(
+                chn,
+                motor_id,
+                {0x0CF10300 | motor_id: [1, 2, 3, 4, 5, 6, 7, 8]},
+                interval=interval,
+                hardware=False,
+            )
+        await asyncio.sleep(duration)
+        elapsed = time.perf_counter() - start
+        stats = manager.get_auto_send_stats(chn)[chn]
+        sent = channel.tx_count
+    finally:
+        await manager.close_device()
+        manager.executor.shutdown(wait=False)
+    # 各电机的统计相近，取第一个电机的统计并附上总体发送率
+    first = stats[0]
+    return {
+        "interval": interval,
+        "motors": motors,
+        "sent": sent,
+        "expected": int(elapsed * 1000 / interval) * motors,
+        "sendRatio": sent / (elapsed * 1000 / interval * motors),
+        **{key: value for key, value in first.items() if key != "interval"},
+    }
+
+
+async def run_async(quick: bool = False) -> dict:
+    duration = 1.0 if quick else 5.0
+    results = {}
+    for motors in (1, 20):
+        results[f"motors={motors}"] = [
+            await measure(interval, duration, motors) for interval in INTERVALS
+        ]
+    return results
+
+
+def run(quick: bool = False) -> dict:
+    return asyncio.run(run_async(quick))
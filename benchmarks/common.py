@@ -0,0 +1,75 @@
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from utils.parsing import MOTOR_ID_BYTES, motor_message_id
+from zlg.manager import ZLGCanManager
+from zlg.virtual import VirtualBackend, VirtualFrame
+from zlg.zlgcan import ZCAN_USBCANFD_200U
+
+# 电机上报报文的序号
+MESSAGE_INDICES = (0x01, 0x02, 0x03)
+
+
+def motor_frames(id_byte: int = MOTOR_ID_BYTES[0], variants: int = 16) -> list[VirtualFrame]:
+    """电机上报的三种报文，每种 variants 份不同的数据，循环注入。"""
+    frames = []
+    for v in range(variants):
+        for index in MESSAGE_INDICES:
+            data = bytes((v * 17 + index * 31 + i * 7) & 0xFF for i in range(8))
+            frames.append((motor_message_id(id_byte, index), 1, 0, 0, 0, data))
+    return frames
+
+
+async def open_manager(
+    chn: int = 0, fifo_size: int = 1_000_000, **kwargs
+) -> tuple[ZLGCanManager, VirtualBackend]:
+    """在虚拟总线上打开设备与通道，kwargs 传给 ZLGCanManager。"""
+    backend = VirtualBackend(fifo_size=fifo_size)
+    manager = ZLGCanManager(None, backend=backend, **kwargs)
+    await manager.open_device(ZCAN_USBCANFD_200U, 0)
+    await manager.open_channel(chn)
+    return manager, backend
+
+
+def rss_bytes() -> Optional[int]:
+    """当前进程的常驻内存，无法取得时为 None。"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # macOS 上为字节，Linux 上为 KB；此处只作为峰值的近似
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def environment() -> dict:
+    """记录运行环境，便于对比不同机器或版本的结果。"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpuCount": os.cpu_count(),
+    }
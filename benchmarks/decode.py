@@ -0,0 +1,71 @@
+"""
+解析开销：parse_motor_0 / parse_motor_1 逐帧解析，以及 numpy 列式解码的每帧耗时（纳秒）。
+"""
+import time
+
+from benchmarks.common import motor_frames
+from utils.parsing import MOTOR_ID_BYTES, parse_motor_0, parse_motor_1
+from zlg.zlgcan import ZCAN_Receive_Data
+
+PARSERS = {
+    "parse_motor_0": (parse_motor_0, MOTOR_ID_BYTES[0]),
+    "parse_motor_1": (parse_motor_1, MOTOR_ID_BYTES[1]),
+}
+
+
+def build_frames(id_byte: int, count: int):
+    """与设备接收结果相同的 ZCAN_Receive_Data 数组。"""
+    frames = motor_frames(id_byte)
+    msgs = (ZCAN_Receive_Data * count)()
+    for i in range(count):
+        can_id, eff, _, _, _, data = frames[i % len(frames)]
+        msgs[i].frame.can_id = can_id
+        msgs[i].frame.eff = eff
+        msgs[i].frame.can_dlc = len(data)
+        msgs[i].frame.data[:] = data
+        msgs[i].timestamp = i * 100
+    return msgs
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(quick: bool = False) -> dict:
+    count = 20_000 if quick else 100_000
+    repeat = 3 if quick else 5
+    results = {}
+    for name, (parse, id_byte) in PARSERS.items():
+        msgs = build_frames(id_byte, count)
+
+        def parse_all():
+            for i in range(count):
+                parse(msgs[i])
+
+        elapsed = _best_of(repeat, parse_all)
+        results[name] = {
+            "frames": count,
+            "nsPerFrame": elapsed / count * 1e9,
+            "framesPerSecond": count / elapsed,
+        }
+
+    try:
+        from utils.vectorized import decode_columns
+
+        msgs = build_frames(MOTOR_ID_BYTES[0], count)
+        decode_columns(msgs, count, labels=True)
+        elapsed = _best_of(repeat, lambda: decode_columns(msgs, count, labels=True))
+        results["decode_columns"] = {
+            "frames": count,
+            "nsPerFrame": elapsed / count * 1e9,
+            "framesPerSecond": count / elapsed,
+        }
+    except RuntimeError:
+        # 未安装 numpy
+        pass
+    return results
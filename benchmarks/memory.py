@@ -0,0 +1,74 @@
+"""
+内存增长：持续接收、解析并推送给一个订阅者，按固定间隔记录 Python 堆（tracemalloc）
+与进程常驻内存（RSS），给出预热后的增长量与每分钟增长速率（字节）。
+"""
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.common import motor_frames, open_manager, rss_bytes
+from utils.parsing import MOTOR_ID_BYTES, parse_motor_0
+
+
+async def run_async(quick: bool = False) -> dict:
+    duration = 6.0 if quick else 60.0
+    interval = 1.0 if quick else 5.0
+    rate = 20_000
+    manager, backend = await open_manager()
+    chn = 0
+    motor_id = MOTOR_ID_BYTES[0]
+    manager.register_motor(chn, motor_id, parse_motor_0)
+    samples = []
+
+    async def consume(queue):
+        while True:
+            await queue.get()
+            queue.get_all_nowait()
+
+    tracemalloc.start()
+    try:
+        with manager.subscribe(chn, motor_id) as queue:
+            consumer = asyncio.create_task(consume(queue))
+            await manager.start_receive_message(chn)
+            backend.bus(0).start_injector(chn, motor_frames(), rate)
+            start = time.perf_counter()
+            while time.perf_counter() - start < duration:
+                await asyncio.sleep(interval)
+                current, peak = tracemalloc.get_traced_memory()
+                samples.append(
+                    {
+                        "elapsed": time.perf_counter() - start,
+                        "heap": current,
+                        "heapPeak": peak,
+                        "rss": rss_bytes(),
+                    }
+                )
+            backend.bus(0).stop_injectors()
+            consumer.cancel()
+            try:
+                await consumer
+            except asyncio.CancelledError:
+                pass
+    finally:
+        tracemalloc.stop()
+        await manager.close_device()
+        manager.executor.shutdown(wait=False)
+
+    # 第一个样本之前为预热（历史环形缓冲区填满、缓存建立等），增长从第一个样本起算
+    first, last = samples[0], samples[-1]
+    minutes = (last["elapsed"] - first["elapsed"]) / 60 or 1
+    result = {
+        "rate": rate,
+        "duration": duration,
+        "heapGrowth": last["heap"] - first["heap"],
+        "heapGrowthPerMinute": (last["heap"] - first["heap"]) / minutes,
+        "samples": samples,
+    }
+    if first["rss"] is not None and last["rss"] is not None:
+        result["rssGrowth"] = last["rss"] - first["rss"]
+        result["rssGrowthPerMinute"] = (last["rss"] - first["rss"]) / minutes
+    return result
+
+
+def run(quick: bool = False) -> dict:
+    return asyncio.run(run_async(quick))
@@ -0,0 +1,86 @@
+"""
+持续接收吞吐：以不同速率向虚拟通道注入电机报文，统计一段时间内交付给订阅者的帧数。
+
+达到瓶颈时交付速率低于注入速率，差值积压在虚拟通道的 FIFO 中（backlog）。
+"""
+import asyncio
+import time
+
+from benchmarks.common import motor_frames, open_manager
+from utils.parsing import MOTOR_ID_BYTES, parse_motor_0
+
+
+async def measure(
+    rate: int,
+    duration: float,
+    receive_mode: str = "thread",
+    decode_mode: str = "frame",
+) -> dict:
+    manager, backend = await open_manager(
+        receive_mode=receive_mode, decode_mode=decode_mode
+    )
+    chn = 0
+    motor_id = MOTOR_ID_BYTES[0]
+    manager.register_motor(chn, motor_id, parse_motor_0)
+    try:
+        with manager.subscribe(chn, motor_id, maxsize=1_000_000) as queue:
+            await manager.start_receive_message(chn)
+            delivered = 0
+
+            async def consume():
+                nonlocal delivered
+                while True:
+                    item = await queue.get()
+                    stamps = item["timestamp"]
+                    delivered += len(stamps) if isinstance(stamps, list) else 1
+                    for item in queue.get_all_nowait():
+                        stamps = item["timestamp"]
+                        delivered += len(stamps) if isinstance(stamps, list) else 1
+
+            consumer = asyncio.create_task(consume())
+            channel = backend.bus(0).channels[chn]
+            start = time.perf_counter()
+            injector = backend.bus(0).start_injector(chn, motor_frames(), rate)
+            await asyncio.sleep(duration)
+            injector.stop()
+            elapsed = time.perf_counter() - start
+            delivered_in_window = delivered
+            consumer.cancel()
+            try:
+                await consumer
+            except asyncio.CancelledError:
+                pass
+            backlog = channel.pending(False)
+    finally:
+        backend.bus(0).stop_injectors()
+        await manager.close_device()
+        manager.executor.shutdown(wait=False)
+    return {
+        "offeredRate": rate,
+        "injected": injector.injected,
+        "delivered": delivered_in_window,
+        "deliveredRate": delivered_in_window / elapsed,
+        "backlog": backlog,
+        "overflow": channel.overflow,
+    }
+
+
+async def run_async(quick: bool = False) -> dict:
+    rates = (10_000, 50_000) if quick else (10_000, 50_000, 100_000, 200_000)
+    duration = 1.0 if quick else 3.0
+    results = {}
+    for receive_mode, decode_mode in (("thread", "frame"), ("thread", "columns"), ("poll", "frame")):
+        key = f"{receive_mode}/{decode_mode}"
+        try:
+            results[key] = [
+                await measure(rate, duration, receive_mode, decode_mode)
+                for rate in rates
+            ]
+        except RuntimeError:
+            # 未安装 numpy，跳过列式解码
+            pass
+    return results
+
+
+def run(quick: bool = False) -> dict:
+    return asyncio.run(run_async(quick))
@@ -0,0 +1,70 @@
+"""
+SSE 推送延迟：N 个订阅者同时订阅同一电机，测量从 Receive 返回到推送给客户端的延迟（毫秒）。
+
+订阅者按 routes/sse_routes.py 的方式逐条取数据、序列化为 JSON 并登记推送时刻，
+省去了 HTTP 传输本身，延迟由管理器的流水线跟踪（PipelineTracer）统计。
+"""
+import asyncio
+import json
+
+from benchmarks.common import motor_frames, open_manager
+from utils.parsing import MOTOR_ID_BYTES, parse_motor_0
+
+
+async def measure(subscribers: int, rate: int, duration: float) -> dict:
+    manager, backend = await open_manager()
+    chn = 0
+    motor_id = MOTOR_ID_BYTES[0]
+    manager.register_motor(chn, motor_id, parse_motor_0)
+    sent = [0] * subscribers
+
+    async def subscriber(index: int):
+        with manager.subscribe(chn, motor_id) as queue:
+            while True:
+                item = await queue.get()
+                json.dumps(item)
+                sent[index] += 1
+                tracer = manager.tracer
+                if tracer is not None:
+                    tracer.delivered(item)
+
+    tasks = [asyncio.create_task(subscriber(i)) for i in range(subscribers)]
+    try:
+        await asyncio.sleep(0)
+        manager.enable_tracing(window=100_000)
+        await manager.start_receive_message(chn)
+        backend.bus(0).start_injector(chn, motor_frames(), rate)
+        await asyncio.sleep(duration)
+        backend.bus(0).stop_injectors()
+        stats = manager.get_trace_stats()
+        dropped = sum(
+            queue["dropped"]
+            for queue in manager.get_queue_stats()[chn][motor_id]["subscribers"]
+        )
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await manager.close_device()
+        manager.executor.shutdown(wait=False)
+    return {
+        "subscribers": subscribers,
+        "rate": rate,
+        "eventsSent": sum(sent),
+        "eventsPerSecond": sum(sent) / duration,
+        "dropped": dropped,
+        "latency": stats["stages"]["total"],
+        "deliver": stats["stages"]["deliver"],
+    }
+
+
+async def run_async(quick: bool = False) -> dict:
+    duration = 1.0 if quick else 3.0
+    counts = (1, 10) if quick else (1, 10, 50)
+    return {
+        "rate=3000": [await measure(n, 3000, duration) for n in counts],
+    }
+
+
+def run(quick: bool = False) -> dict:
+    return asyncio.run(run_async(quick))
@@ -1,5 +1,6 @@
 import sys
 from utils.command import Motor0Command, Motor1Command
+from zlg.backend import create_backend
 from zlg.manager import ZLGCanManager
 import os
 
@@ -8,7 +9,8 @@ import os
 dll_path = os.path.join(os.path.dirname(__file__), "zlgcan_x64", "zlgcan.dll")
 
 
-zlcan_manager = ZLGCanManager(dll_path)
+# 后端由环境变量 ZLG_CAN_BACKEND 选择（dll / virtual / socketcan），非 Windows 默认 virtual
+zlcan_manager = ZLGCanManager(dll_path, backend=create_backend(None, dll_path))
 motor_0_command = Motor0Command(0, 1, 1, 0, 20)
 
 motor_1_command = Motor1Command(0, 1, 1, 0, 20)
@@ -2,7 +2,7 @@ import os
 from fastapi import FastAPI
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from routes import motor_0_routes, motor_1_routes, zlg_routes, sse_routes
+from routes import motor_0_routes, motor_1_routes, zlg_routes, sse_routes, ws_routes
 from fastapi.middleware.cors import CORSMiddleware
 
 from schemas import StatusResponse
@@ -26,6 +26,7 @@ app.mount("/static", StaticFiles(directory=static_file_abspath), name="static")
 # 注册路由
 app.include_router(zlg_routes.router)
 app.include_router(sse_routes.router)
+app.include_router(ws_routes.router)
 app.include_router(motor_0_routes.router)
 app.include_router(motor_1_routes.router)
 
@@ -35,10 +35,8 @@ async def enable_motor_0(
     zlg_can_manager.can_start_receive(motor_0_command.chn)
 
     # 启动自动发送和接收任务
-    asyncio.create_task(
-        zlg_can_manager.start_auto_send_message(
-            motor_0_command.chn, motor_0_command.id, datas, interval=20
-        )
+    await zlg_can_manager.start_auto_send_message(
+        motor_0_command.chn, motor_0_command.id, datas, interval=20
     )
     asyncio.create_task(zlg_can_manager.start_receive_message(motor_0_command.chn))
 
@@ -64,20 +62,14 @@ async def set_motor_0_settings(
     zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
     motor_0_command: Motor0Command = Depends(get_motor_0_command),
 ):
-    # 停止之前的自动发送任务
-    await zlg_can_manager.stop_auto_send_message(motor_0_command.chn, motor_0_command.id)
-
     # 设置电机参数
     datas = motor_0_command.set_motor_settings(
         request.mode, request.value, request.gear, request.climb, request.hand_brake
     )
 
-    # 启动新的自动发送任务前进行检查
-    zlg_can_manager.can_start_auto_send(motor_0_command.chn, motor_0_command.id)
-
-    # 启动新的自动发送任务
-    asyncio.create_task(
-        zlg_can_manager.start_auto_send_message(motor_0_command.chn,motor_0_command.id, datas, interval=20)
+    # 替换调度器中的周期报文，保持原有发送相位
+    await zlg_can_manager.update_auto_send_message(
+        motor_0_command.chn, motor_0_command.id, datas, interval=20
     )
 
     return StatusResponse(status="success", message="电机 0 速度设置成功")
@@ -30,8 +30,8 @@ async def enable_motor_1(
     zlg_can_manager.can_start_receive(motor_1_command.chn)
 
     # 启动自动发送和接收任务
-    asyncio.create_task(
-        zlg_can_manager.start_auto_send_message(motor_1_command.chn,    motor_1_command.id, datas, interval=20)
+    await zlg_can_manager.start_auto_send_message(
+        motor_1_command.chn, motor_1_command.id, datas, interval=20
     )
     asyncio.create_task(zlg_can_manager.start_receive_message(motor_1_command.chn))
 
@@ -55,20 +55,14 @@ async def set_motor_1_settings(
     zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
     motor_1_command: Motor1Command = Depends(get_motor_1_command),
 ):
-    # 停止之前的自动发送任务
-    await zlg_can_manager.stop_auto_send_message(motor_1_command.chn, motor_1_command.id)
-
     # 设置电机参数
     datas = motor_1_command.set_motor_settings(
         request.mode, request.value, request.gear
     )
 
-    # 启动新的自动发送任务前进行检查
-    zlg_can_manager.can_start_auto_send(motor_1_command.chn, motor_1_command.id)
-
-    # 启动新的自动发送任务
-    asyncio.create_task(
-        zlg_can_manager.start_auto_send_message(motor_1_command.chn,motor_1_command.id, datas, interval=20)
+    # 替换调度器中的周期报文，保持原有发送相位
+    await zlg_can_manager.update_auto_send_message(
+        motor_1_command.chn, motor_1_command.id, datas, interval=20
     )
 
     return StatusResponse(status="success", message="电机 1 速度设置成功")
@@ -1,34 +1,165 @@
 import asyncio
 import json
-from fastapi import APIRouter, Query, Request, HTTPException, Depends
+import time
+from fastapi import APIRouter, Path, Query, Request, HTTPException, Depends
 from sse_starlette.sse import EventSourceResponse
 from dependencies import get_zlg_can_manager
 import utils
 from zlg.manager import ZLGCanManager
+from zlg.queues import CONFLATE
 from utils.logger import logger
 
 router = APIRouter()
 
 
+def project(data: dict, fields: set[str] | None) -> dict | None:
+    """
+    只保留请求的信号，时间戳总是保留。
+
+    :return: 数据不含任何请求的信号（例如解析失败的结果）时返回 None。
+    """
+    if fields is None:
+        return data
+    if not fields & data.keys():
+        return None
+    return {
+        name: value
+        for name, value in data.items()
+        if name in fields or name == "timestamp"
+    }
+
+
+def count_lost(metrics, labels: tuple, queue, counted: int) -> int:
+    """把队列新增的溢出与合并条数计入 SSE 丢弃指标，返回已计入的总数。"""
+    lost = queue.dropped + queue.conflated
+    if lost > counted:
+        metrics.sse_events_dropped.inc(labels, lost - counted)
+    return lost
+
+
 @router.get("/sse/{chn}/{motorId}")
 async def sse(
     request: Request,
     chn: int,
-    motor_id: int = Query(alias="motorId"),
+    motor_id: int = Path(alias="motorId"),
+    max_rate: float | None = Query(default=None, alias="maxRate", gt=0),
+    conflate_window: int | None = Query(default=None, alias="conflateWindow", ge=1),
+    fields: str | None = Query(default=None),
     zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
 ):
-    queue = zlg_can_manager.get_queue(chn, motor_id)
-    if queue is None:
+    """
+    以 SSE 推送电机数据。
+
+    每个事件为一条解析结果的 JSON：{信号名: 值, ..., "timestamp": 接收时间戳（微秒）}，
+    合并推送时为窗口内各信号的最新值，timestamp 为最后一条的时间戳。
+
+    :param chn: 通道号。
+    :param motor_id: 电机 ID。
+    :param max_rate: 每秒最多推送的事件数。
+    :param conflate_window: 合并窗口（毫秒）。给出 max_rate 或 conflate_window 时，
+        每个窗口只推送一个事件，内容为窗口内各信号的最新值；
+        窗口取两者中较长的一个。
+    :param fields: 逗号分隔的信号名，只推送这些信号（以及 timestamp）。
+    """
+    if not zlg_can_manager.has_motor(chn, motor_id):
         raise HTTPException(status_code=404, detail=f"通道 {chn} 未找到")
 
+    field_set = (
+        {name.strip() for name in fields.split(",") if name.strip()}
+        if fields
+        else None
+    )
+    metrics = zlg_can_manager.metrics
+    labels = (chn, motor_id)
+    window = max(
+        conflate_window / 1000 if conflate_window else 0,
+        1 / max_rate if max_rate else 0,
+    )
+
     async def event_generator():
-        while not await request.is_disconnected():
-            try:
-                data = await asyncio.wait_for(queue.get(), timeout=60.0)
-                yield json.dumps(data)
-            except asyncio.TimeoutError:
-                logger.warning(f"通道 {chn} 无数据")
-                break
+        # 每个连接独立订阅，多个客户端都能收到全部数据
+        with zlg_can_manager.subscribe(chn, motor_id) as queue:
+            lost = 0
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=60.0)
+                    lost = count_lost(metrics, labels, queue, lost)
+                    data = project(item, field_set)
+                    if data is None:
+                        metrics.sse_events_filtered.inc(labels)
+                        continue
+                    metrics.sse_events_sent.inc(labels)
+                    tracer = zlg_can_manager.tracer
+                    if tracer is not None:
+                        tracer.delivered(item)
+                    yield json.dumps(data)
+                except asyncio.TimeoutError:
+                    logger.warning(f"通道 {chn} 无数据")
+                    break
         logger.info(f"通道 {chn} 断开连接")
 
-    return EventSourceResponse(event_generator())
+    async def conflated_event_generator():
+        # 每种报文只保留最新一条，窗口结束时合并为一个事件
+        with zlg_can_manager.subscribe(chn, motor_id, policy=CONFLATE) as queue:
+            lost = 0
+            while not await request.is_disconnected():
+                try:
+                    first = await asyncio.wait_for(queue.get(), timeout=60.0)
+                except asyncio.TimeoutError:
+                    logger.warning(f"通道 {chn} 无数据")
+                    break
+                # 收到窗口内的第一条数据后再等一个窗口，相邻事件的间隔不小于窗口
+                await asyncio.sleep(window)
+                received = [first, *queue.get_all_nowait()]
+                merged = {}
+                items = []
+                for item in received:
+                    data = project(item, field_set)
+                    if data is not None:
+                        merged.update(data)
+                        items.append(item)
+                lost = count_lost(metrics, labels, queue, lost)
+                filtered = len(received) - len(items)
+                if filtered:
+                    metrics.sse_events_filtered.inc(labels, filtered)
+                if not items:
+                    continue
+                metrics.sse_events_sent.inc(labels)
+                metrics.sse_events_dropped.inc(labels, len(items) - 1)
+                tracer = zlg_can_manager.tracer
+                if tracer is not None:
+                    now = time.perf_counter()
+                    for item in items:
+                        tracer.delivered(item, now)
+                yield json.dumps(merged)
+        logger.info(f"通道 {chn} 断开连接")
+
+    return EventSourceResponse(
+        conflated_event_generator() if window else event_generator()
+    )
+
+
+@router.get("/sse/{deviceType}/{deviceIndex}/{chn}/{motorId}")
+async def device_sse(
+    request: Request,
+    chn: int,
+    device_type: int = Path(alias="deviceType"),
+    device_index: int = Path(alias="deviceIndex"),
+    motor_id: int = Path(alias="motorId"),
+    max_rate: float | None = Query(default=None, alias="maxRate", gt=0),
+    conflate_window: int | None = Query(default=None, alias="conflateWindow", ge=1),
+    fields: str | None = Query(default=None),
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    以 SSE 推送指定设备上电机的数据，chn 为设备通道号，其余参数同 /sse/{chn}/{motorId}。
+    """
+    return await sse(
+        request,
+        zlg_can_manager.channel_id(chn, device_type, device_index),
+        motor_id,
+        max_rate,
+        conflate_window,
+        fields,
+        zlg_can_manager,
+    )
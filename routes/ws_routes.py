@@ -0,0 +1,99 @@
+import asyncio
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from dependencies import get_zlg_can_manager
+from utils.logger import logger
+from utils.telemetry_codec import TelemetryEncoder
+from zlg.manager import ZLGCanManager
+
+router = APIRouter()
+
+
+async def wait_disconnect(websocket: WebSocket) -> None:
+    """读取客户端消息直到连接断开，客户端发来的消息被忽略。"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/ws/{chn}/{motorId}")
+async def telemetry_websocket(
+    websocket: WebSocket,
+    chn: int,
+    motor_id: int = Path(alias="motorId"),
+    interval: int = Query(default=50, ge=1, le=1000),
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    以二进制 WebSocket 消息推送电机数据。
+
+    每隔 interval 毫秒把期间收到的全部解析结果编码为一条二进制消息，
+    格式见 utils.telemetry_codec；新的报文类型先以 JSON 文本消息下发 schema。
+    没有数据时连接保持打开，客户端断开后立即取消订阅。
+
+    :param chn: 通道号。
+    :param motor_id: 电机 ID。
+    :param interval: 合并发送的间隔（毫秒）。
+    """
+    if not zlg_can_manager.has_motor(chn, motor_id):
+        await websocket.close(code=1008, reason=f"通道 {chn}, 电机 {motor_id} 未注册")
+        return
+    await websocket.accept()
+    encoder = TelemetryEncoder()
+    # 单独读取客户端消息，空闲时也能及时发现断开
+    disconnected = asyncio.create_task(wait_disconnect(websocket))
+    try:
+        with zlg_can_manager.subscribe(chn, motor_id) as queue:
+            while not disconnected.done():
+                getter = asyncio.create_task(queue.get())
+                try:
+                    await asyncio.wait(
+                        (getter, disconnected), return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    getter.cancel()
+                if not getter.done():
+                    break
+                items = [getter.result()]
+                # 等待一个发送间隔，把期间到达的数据合并为一条消息
+                await asyncio.sleep(interval / 1000)
+                items.extend(queue.get_all_nowait())
+                schemas, batch = encoder.encode(items)
+                for schema in schemas:
+                    await websocket.send_json(schema)
+                if batch is not None:
+                    await websocket.send_bytes(batch)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+    logger.info(f"通道 {chn} 断开连接")
+
+
+@router.websocket("/ws/{deviceType}/{deviceIndex}/{chn}/{motorId}")
+async def device_telemetry_websocket(
+    websocket: WebSocket,
+    chn: int,
+    device_type: int = Path(alias="deviceType"),
+    device_index: int = Path(alias="deviceIndex"),
+    motor_id: int = Path(alias="motorId"),
+    interval: int = Query(default=50, ge=1, le=1000),
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    推送指定设备上电机的数据，chn 为设备通道号，其余参数同 /ws/{chn}/{motorId}。
+    """
+    try:
+        chn = zlg_can_manager.channel_id(chn, device_type, device_index)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    await telemetry_websocket(websocket, chn, motor_id, interval, zlg_can_manager)
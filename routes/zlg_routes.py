@@ -1,13 +1,19 @@
 import asyncio
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
 from schemas import StatusResponse
 from schemas.zlg_schemas import (
     AutoSendMessageRequest,
+    ExportRequest,
     MotorRequest,
     OpenChannelRequest,
     OpenDeviceRequest,
+    RecordingRequest,
+    ReplayRequest,
     SendMessageRequest,
+    TracingRequest,
 )
+from zlg.metrics import CONTENT_TYPE
 from zlg.zlgcan import ZCAN_DEVICE_TYPE, ZCAN_TYPE_CAN, ZCAN_TYPE_CANFD
 from dependencies import get_zlg_can_manager
 from zlg.manager import ZLGCanManager
@@ -33,15 +39,36 @@ async def open_device(
 
 @router.get("/device_info")
 async def get_device_info(
+    device_type: int | None = Query(default=None, alias="deviceType"),
+    device_index: int | None = Query(default=None, alias="deviceIndex"),
     zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
 ):
     """
     获取设备信息。
 
+    :param device_type: 设备类型，为空时为最先打开的设备。
+    :param device_index: 设备索引。
     :param zlg_can_manager: ZLGCanManager 实例。
-    :return: 设备信息。
+    :return: 设备信息及其通道映射。
     """
-    return await zlg_can_manager.get_device_info()
+    return await zlg_can_manager.get_device_info(device_type, device_index)
+
+
+@router.get("/devices")
+async def list_devices(
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    获取已打开的设备列表。
+
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 各设备的类型、索引、通道号起始和设备通道号 -> 管理器通道号。
+    """
+    return StatusResponse(
+        status="success",
+        message="获取设备列表成功",
+        data=zlg_can_manager.list_devices(),
+    )
 
 
 @router.post("/open_channel")
@@ -56,8 +83,13 @@ async def open_channel(
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 通道打开的结果。
     """
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
     can_type = ZCAN_TYPE_CAN if request.can_type == 0 else ZCAN_TYPE_CANFD
-    return await zlg_can_manager.open_channel(request.chn, request.baud_rate, can_type)
+    return await zlg_can_manager.open_channel(
+        chn, request.baud_rate, can_type, request.data_baud_rate
+    )
 
 
 @router.post("/send_message")
@@ -72,8 +104,16 @@ async def send_message(
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 消息发送的结果。
     """
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
     return await zlg_can_manager.send_message(
-        request.chn, request.datas, request.eff, request.transmit_type
+        chn,
+        request.datas,
+        request.eff,
+        request.transmit_type,
+        request.fd,
+        request.brs,
     )
 
 
@@ -89,17 +129,259 @@ async def start_auto_send_message(
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 自动发送任务启动的状态响应。
     """
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
     # 停止已存在的自动发送任务（如果有）
-    await zlg_can_manager.stop_auto_send_message(request.chn, request.motor_id)
-    # 启动新的自动发送任务
-    asyncio.create_task(
-        zlg_can_manager.start_auto_send_message(
-            request.chn, request.motor_id, request.datas, request.interval
-        )
+    await zlg_can_manager.stop_auto_send_message(chn, request.motor_id)
+    # 启动新的自动发送任务，发送由通道调度器按周期执行
+    await zlg_can_manager.start_auto_send_message(
+        chn,
+        request.motor_id,
+        request.datas,
+        request.eff,
+        request.transmit_type,
+        request.interval,
+        request.fd,
+        request.brs,
+        request.hardware,
     )
     return StatusResponse(status="success", message="自动发送任务启动成功")
 
 
+@router.post("/update_auto_send_message")
+async def update_auto_send_message(
+    request: AutoSendMessageRequest,
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    更新正在运行的自动发送任务的数据或周期。
+
+    :param request: 包含通道号、数据和发送间隔的请求。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 自动发送任务更新的结果。
+    """
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
+    return await zlg_can_manager.update_auto_send_message(
+        chn,
+        request.motor_id,
+        request.datas,
+        request.eff,
+        request.transmit_type,
+        request.interval,
+        request.fd,
+        request.brs,
+    )
+
+
+@router.get("/auto_send_stats")
+async def get_auto_send_stats(
+    chn: int | None = None,
+    device_type: int | None = Query(default=None, alias="deviceType"),
+    device_index: int | None = Query(default=None, alias="deviceIndex"),
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    获取软件定时发送的周期统计。
+
+    :param chn: 通道号，为空时返回所有通道。
+    :param device_type: 设备类型，与 device_index 同时给出时 chn 为该设备的通道号。
+    :param device_index: 设备索引。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 各电机的实际周期、抖动分位数和错过的周期数（毫秒）。
+    """
+    return StatusResponse(
+        status="success",
+        message="获取定时发送统计成功",
+        data=zlg_can_manager.get_auto_send_stats(
+            None
+            if chn is None
+            else zlg_can_manager.channel_id(chn, device_type, device_index)
+        ),
+    )
+
+
+@router.get("/state")
+async def get_state(
+    chn: int,
+    motor_id: int = Query(alias="motorId"),
+    device_type: int | None = Query(default=None, alias="deviceType"),
+    device_index: int | None = Query(default=None, alias="deviceIndex"),
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    获取电机各信号的最新值，不占用订阅队列。
+
+    :param chn: 通道号。
+    :param motor_id: 电机 ID。
+    :param device_type: 设备类型，与 device_index 同时给出时 chn 为该设备的通道号。
+    :param device_index: 设备索引。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 各信号的最新值、各报文最近一帧的时间戳和最近一次更新的时间。
+    """
+    chn = zlg_can_manager.channel_id(chn, device_type, device_index)
+    state = zlg_can_manager.get_state(chn, motor_id)
+    if state is None:
+        raise HTTPException(
+            status_code=404, detail=f"通道 {chn}, 电机 {motor_id} 暂无数据"
+        )
+    return StatusResponse(
+        status="success", message="获取电机状态成功", data=state.to_dict()
+    )
+
+
+@router.get("/history")
+async def get_history(
+    chn: int,
+    motor_id: int = Query(alias="motorId"),
+    signals: str | None = None,
+    seconds: float | None = Query(default=60, gt=0),
+    points: int | None = Query(default=500, ge=3),
+    method: str = "lttb",
+    device_type: int | None = Query(default=None, alias="deviceType"),
+    device_index: int | None = Query(default=None, alias="deviceIndex"),
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    获取电机信号最近一段时间的历史。
+
+    :param chn: 通道号。
+    :param motor_id: 电机 ID。
+    :param signals: 逗号分隔的信号名，为空时返回全部数值信号。
+    :param seconds: 最近多少秒。
+    :param points: 每个信号最多返回的点数。
+    :param method: 降采样方法，minmax 保留每段的最大最小值，lttb 保留曲线形状。
+    :param device_type: 设备类型，与 device_index 同时给出时 chn 为该设备的通道号。
+    :param device_index: 设备索引。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: {信号名: {"timestamps": [...], "values": [...]}}。
+    """
+    data = zlg_can_manager.get_history(
+        zlg_can_manager.channel_id(chn, device_type, device_index),
+        motor_id,
+        [name.strip() for name in signals.split(",") if name.strip()]
+        if signals
+        else None,
+        seconds,
+        points,
+        method,
+    )
+    return StatusResponse(status="success", message="获取历史数据成功", data=data)
+
+
+@router.get("/frames")
+async def query_frames(
+    paths: str,
+    can_ids: str | None = Query(default=None, alias="canIds"),
+    start: float | None = None,
+    end: float | None = None,
+    chn: int | None = None,
+    limit: int = Query(default=10000, gt=0, le=1000000),
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    按 CAN ID 与时间范围查询帧记录文件，只读取索引选中的块。
+
+    :param paths: 逗号分隔的帧记录文件（相对于记录目录），支持通配符，按文件名顺序查询。
+    :param can_ids: 逗号分隔的 CAN ID，支持 0x 前缀的十六进制，为空时不限。
+    :param start: 起始时间（秒，设备时间戳），为空时不限。
+    :param end: 结束时间（秒，设备时间戳），为空时不限。
+    :param chn: 通道号，为空时不限。
+    :param limit: 最多返回的帧数。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 帧列表，时间戳为微秒，data 为十六进制串。
+    """
+    files = zlg_can_manager.find_log_files(
+        [pattern.strip() for pattern in paths.split(",") if pattern.strip()]
+    )
+    if not files:
+        raise HTTPException(status_code=404, detail="没有匹配的帧记录文件")
+    try:
+        ids = (
+            [int(can_id.strip(), 0) for can_id in can_ids.split(",") if can_id.strip()]
+            if can_ids
+            else None
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的 CAN ID：{can_ids}")
+    frames = await zlg_can_manager.query_frames(
+        files,
+        ids,
+        int(start * 1_000_000) if start is not None else None,
+        int(end * 1_000_000) if end is not None else None,
+        chn,
+        limit,
+    )
+    return StatusResponse(status="success", message="查询帧记录成功", data=frames)
+
+
+@router.get("/metrics")
+async def metrics(
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    以 Prometheus 文本格式输出数据路径的指标。
+
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 接收帧数、批次大小、线程池等待、解析耗时与错误、队列深度、发送失败、
+        定时发送、SSE 推送与丢弃、DLL 调用耗时等指标。
+    """
+    return Response(zlg_can_manager.metrics.render(), media_type=CONTENT_TYPE)
+
+
+@router.post("/tracing")
+async def set_tracing(
+    request: TracingRequest,
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    启用或停用流水线各阶段的耗时跟踪。
+
+    :param request: 包含是否启用和每个阶段保留样本数的请求。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 操作结果，停用时附带最终的统计。
+    """
+    if request.enabled:
+        return zlg_can_manager.enable_tracing(request.window)
+    return zlg_can_manager.disable_tracing()
+
+
+@router.get("/trace_stats")
+async def get_trace_stats(
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    获取流水线各阶段的耗时统计，用于定位界面卡顿发生在哪个阶段。
+
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: dispatch / decode / resume / publish / deliver / total 各阶段的
+        样本数、平均值与分位数（毫秒）。
+    """
+    stats = zlg_can_manager.get_trace_stats()
+    if stats is None:
+        return StatusResponse(status="info", message="流水线跟踪未启用")
+    return StatusResponse(status="success", message="获取流水线统计成功", data=stats)
+
+
+@router.get("/queue_stats")
+async def get_queue_stats(
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    获取各电机的订阅统计。
+
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 各电机已发布的数据条数，以及每个订阅者队列的当前长度、丢弃和合并的数据条数。
+    """
+    return StatusResponse(
+        status="success",
+        message="获取队列统计成功",
+        data=zlg_can_manager.get_queue_stats(),
+    )
+
+
 @router.post("/stop_auto_send_message")
 async def stop_auto_send_message(
     request: MotorRequest,
@@ -112,7 +394,10 @@ async def stop_auto_send_message(
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 自动发送任务停止的结果。
     """
-    return await zlg_can_manager.stop_auto_send_message(request.chn, request.motor_id)
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
+    return await zlg_can_manager.stop_auto_send_message(chn, request.motor_id)
 
 
 @router.post("/start_receive_message")
@@ -127,10 +412,13 @@ async def start_receive_message(
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 接收任务启动的状态响应。
     """
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
     # 停止已存在的接收任务（如果有）
-    await zlg_can_manager.stop_receive_message(request.chn)
+    await zlg_can_manager.stop_receive_message(chn)
     # 启动新的接收任务
-    asyncio.create_task(zlg_can_manager.start_receive_message(request.chn))
+    asyncio.create_task(zlg_can_manager.start_receive_message(chn))
     return StatusResponse(status="success", message="接收任务启动成功")
 
 
@@ -146,7 +434,104 @@ async def stop_receive_message(
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 接收任务停止的结果。
     """
-    return await zlg_can_manager.stop_receive_message(request.chn)
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
+    return await zlg_can_manager.stop_receive_message(chn)
+
+
+@router.post("/start_recording")
+async def start_recording(
+    request: RecordingRequest,
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    开始记录收发的原始帧。
+
+    :param request: 包含文件路径（相对于记录目录，为空时自动生成）、是否按 CANFD 记录
+        和单个文件最大字节数的请求。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 记录启动的结果。
+    """
+    return zlg_can_manager.start_recording(request.path, request.fd, request.max_bytes)
+
+
+@router.post("/stop_recording")
+async def stop_recording(
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    停止记录原始帧。
+
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 记录的帧数、字节数和文件列表。
+    """
+    return await zlg_can_manager.stop_recording()
+
+
+@router.post("/start_replay")
+async def start_replay(
+    request: ReplayRequest,
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    回放帧记录文件，回放的帧经过解析后发布给订阅者。
+
+    :param request: 包含文件列表（相对于记录目录）、回放速度倍率（0 为尽快回放）、
+        通道映射和是否回放发送帧的请求。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 回放启动的结果。
+    """
+    return zlg_can_manager.start_replay(
+        request.paths, request.speed, request.channel_map, request.include_tx
+    )
+
+
+@router.post("/stop_replay")
+async def stop_replay(
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    停止回放。
+
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 已回放的帧数和速率。
+    """
+    return await zlg_can_manager.stop_replay()
+
+
+@router.get("/replay_stats")
+async def get_replay_stats(
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    获取最近一次回放的统计。
+
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 已回放的帧数、批次数、耗时、速率和最大滞后（毫秒）。
+    """
+    stats = zlg_can_manager.get_replay_stats()
+    if stats is None:
+        return StatusResponse(status="info", message="尚未进行回放")
+    return StatusResponse(status="success", message="获取回放统计成功", data=stats)
+
+
+@router.post("/export_parquet")
+async def export_parquet(
+    request: ExportRequest,
+    zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
+):
+    """
+    把帧记录文件导出为 Parquet。
+
+    :param request: 包含文件列表、输出路径（均相对于记录目录）、导出方式（decoded / raw）
+        和是否解码发送帧的请求。
+    :param zlg_can_manager: ZLGCanManager 实例。
+    :return: 生成的文件及行数。
+    """
+    return await zlg_can_manager.export_parquet(
+        request.paths, request.output, request.mode, request.include_tx
+    )
 
 
 @router.post("/close_channel")
@@ -161,17 +546,24 @@ async def close_channel(
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 通道关闭的结果。
     """
-    return await zlg_can_manager.close_channel(request.chn)
+    chn = zlg_can_manager.channel_id(
+        request.chn, request.device_type, request.device_index
+    )
+    return await zlg_can_manager.close_channel(chn)
 
 
 @router.post("/close_device")
 async def close_device(
+    device_type: int | None = Query(default=None, alias="deviceType"),
+    device_index: int | None = Query(default=None, alias="deviceIndex"),
     zlg_can_manager: ZLGCanManager = Depends(get_zlg_can_manager),
 ):
     """
     关闭设备。
 
+    :param device_type: 设备类型，与 device_index 都为空时关闭所有设备。
+    :param device_index: 设备索引。
     :param zlg_can_manager: ZLGCanManager 实例。
     :return: 设备关闭的结果。
     """
-    return await zlg_can_manager.close_device()
+    return await zlg_can_manager.close_device(device_type, device_index)
@@ -7,28 +7,63 @@ class OpenDeviceRequest(BaseModel):
     device_index: int = Field(..., alias="deviceIndex")
 
 
-class OpenChannelRequest(BaseModel):
+class ChannelRequest(BaseModel):
+    # 给出设备时 chn 为该设备的通道号，否则为管理器通道号
     chn: int
+    device_type: int | None = Field(default=None, alias="deviceType")
+    device_index: int | None = Field(default=None, alias="deviceIndex")
+
+
+class OpenChannelRequest(ChannelRequest):
     baud_rate: int = Field(default=250000, alias="baudRate")
     can_type: int = Field(default=0, alias="canType")
+    data_baud_rate: int = Field(default=2000000, alias="dataBaudRate")
 
 
-class SendMessageRequest(BaseModel):
-    chn: int
+class SendMessageRequest(ChannelRequest):
     datas: dict[int, list[int]]
     eff: int = 1
     transmit_type: int = Field(default=0, alias="transmitType")
+    fd: bool = False
+    brs: int = 0
 
 
-class AutoSendMessageRequest(BaseModel):
-    chn: int
+class AutoSendMessageRequest(ChannelRequest):
     motor_id: int = Field(default=0, alias="motorId")
     datas: dict[int, list[int]]
     eff: int = 1
     transmit_type: int = Field(default=0, alias="transmitType")
-    interval: int = 50
+    interval: int = Field(default=50, gt=0)
+    fd: bool = False
+    brs: int = 0
+    hardware: bool | None = None
 
 
-class MotorRequest(BaseModel):
-    chn: int
+class MotorRequest(ChannelRequest):
     motor_id: int = Field(default=0, alias="motorId")
+
+
+class RecordingRequest(BaseModel):
+    # 相对于记录目录的路径，为空时由服务端按时间生成
+    path: str | None = None
+    fd: bool | None = None
+    max_bytes: int = Field(default=256 * 1024 * 1024, alias="maxBytes", gt=0)
+
+
+class ReplayRequest(BaseModel):
+    paths: list[str]
+    speed: float | None = Field(default=1.0, ge=0)
+    channel_map: dict[int, int] | None = Field(default=None, alias="channelMap")
+    include_tx: bool = Field(default=False, alias="includeTx")
+
+
+class ExportRequest(BaseModel):
+    paths: list[str]
+    output: str
+    mode: str = "decoded"
+    include_tx: bool = Field(default=False, alias="includeTx")
+
+
+class TracingRequest(BaseModel):
+    enabled: bool
+    window: int = Field(default=10000, gt=0)
@@ -0,0 +1,42 @@
+"""
+把帧记录文件（.zlgr）导出为 Parquet。
+
+用法：
+    python scripts/export_parquet.py recordings/frames_*.zlgr -o recordings/export
+    python scripts/export_parquet.py recordings/frames_0000.zlgr -o frames.parquet --mode raw
+"""
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zlg.export import CHUNK_RECORDS, DECODED, RAW, export_parquet  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="把帧记录文件导出为 Parquet")
+    parser.add_argument("paths", nargs="+", help="帧记录文件，支持通配符，按文件名顺序导出")
+    parser.add_argument(
+        "-o", "--output", required=True, help="decoded 时为输出目录，raw 时为输出文件"
+    )
+    parser.add_argument("--mode", choices=(DECODED, RAW), default=DECODED)
+    parser.add_argument("--include-tx", action="store_true", help="同时解码发送帧")
+    parser.add_argument(
+        "--chunk-records", type=int, default=CHUNK_RECORDS, help="每次读入的记录数"
+    )
+    args = parser.parse_args()
+
+    paths = sorted(path for pattern in args.paths for path in glob.glob(pattern))
+    if not paths:
+        parser.error("没有匹配的帧记录文件")
+    result = export_parquet(
+        paths, args.output, args.mode, args.include_tx, args.chunk_records
+    )
+    for path in result["files"]:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
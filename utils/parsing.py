@@ -1,217 +1,236 @@
-import random
 import struct
-import time
-
-from zlg.zlgcan import ZCAN_Receive_Data
-
-
-def parse_motor_0(message: ZCAN_Receive_Data) -> dict[str, int | float | str]:
-    match message.frame.can_id:
-        case 0x0CFF01EF:
-            (
-                torque,
-                speed,
-                input_vol,
-                input_curr,
-            ) = struct.unpack("<4H", message.frame.data)
-            return {
-                "torque": round(torque / 10 - 2000, 2),
-                "speed": speed - 20000,
-                "inputVoltage": input_vol / 10,
-                "inputCurrent": round(input_curr / 10 - 1000, 2),
-            }
-
-        case 0x0CFF02EF:
-            (
-                byte0,
-                fault_code,
-                fault_level,
-                _,
-                software_version,
-                _,
-                mcu_temp,
-                motor_temp,
-            ) = struct.unpack("<8B", message.frame.data)
-
-            # Extract work mode (bits 0-2)
-            work_mode = byte0 & 0b00000111
-            match work_mode:
-                case 0:
-                    work_mode_str = "自由模式"
-                case 1:
-                    work_mode_str = "扭矩模式"
-                case 2:
-                    work_mode_str = "速度模式"
-                case _:
-                    work_mode_str = "无效模式"
-
-            # Extract hill assist (bit 3)
-            hill_assists = (byte0 >> 3) & 0b00000001
-            match hill_assists:
-                case 0:
-                    hill_assists_str = "爬坡模式关闭"
-                case 1:
-                    hill_assists_str = "爬坡模式开启"
-                case _:
-                    hill_assists_str = "未知"
-
-            # Extract MCU status (bits 4-5)
-            mcu_status = (byte0 >> 4) & 0b00000011
-            match mcu_status:
-                case 0:
-                    mcu_status_str = "无故障"
-                case 1:
-                    mcu_status_str = "有故障"
-                case _:
-                    mcu_status_str = "无效"
-
-            # Handle fault level
-            match fault_level:
-                case 0:
-                    fault_level_str = "无故障"
-                case 1:
-                    fault_level_str = "一级故障"
-                case 2:
-                    fault_level_str = "二级故障"
-                case 3:
-                    fault_level_str = "三级故障"
-
-            software_version *= 0.1
-            mcu_temp -= 40
-            motor_temp -= 40
-
-            return {
-                "workMode": work_mode_str,
-                "hillAssists": hill_assists_str,
-                "mcuStatus": mcu_status_str,
-                "faultCode": fault_code,
-                "faultLevel": fault_level_str,
-                "softwareVersion": software_version,
-                "mcuTemperature": mcu_temp,
-                "motorTemperature": motor_temp,
-            }
-
-        case 0x0CFF03EF:
-            (
-                position,
-                mechanical_position,
-                _,
-                _,
-                _,
-                _,
-            ) = struct.unpack("<2H4B", message.frame.data)
-
-            return {
-                "position": round(position * 0.0055, 2),
-                "mechanicalPosition": round(mechanical_position * 0.0055, 2),
-            }
-
-        case _:
-            return {"error": "未知的 CAN ID"}
-
-
-def parse_motor_1(message: ZCAN_Receive_Data) -> dict[str, int | float | str]:
-    match message.frame.can_id:
-        case 0x0CFE01EF:
-            (
-                torque,
-                speed,
-                input_vol,
-                input_curr,
-            ) = struct.unpack("<4H", message.frame.data)
-            return {
-                "torque": round(torque / 10 - 2000, 2),
-                "speed": speed - 20000,
-                "inputVoltage": input_vol / 10,
-                "inputCurrent": round(input_curr / 10 - 1000, 2),
-            }
-
-        case 0x0CFE02EF:
-            (
-                byte0,
-                fault_code,
-                fault_level,
-                _,
-                software_version,
-                _,
-                mcu_temp,
-                motor_temp,
-            ) = struct.unpack("<8B", message.frame.data)
-
-            # Extract work mode (bits 0-2)
-            work_mode = byte0 & 0b00000111
-            match work_mode:
-                case 0:
-                    work_mode_str = "自由模式"
-                case 1:
-                    work_mode_str = "扭矩模式"
-                case 2:
-                    work_mode_str = "速度模式"
-                case _:
-                    work_mode_str = "无效模式"
-
-            # Extract hill assist (bit 3)
-            hill_assists = (byte0 >> 3) & 0b00000001
-            match hill_assists:
-                case 0:
-                    hill_assists_str = "爬坡模式关闭"
-                case 1:
-                    hill_assists_str = "爬坡模式开启"
-                case _:
-                    hill_assists_str = "未知"
-
-            # Extract MCU status (bits 4-5)
-            mcu_status = (byte0 >> 4) & 0b00000011
-            match mcu_status:
-                case 0:
-                    mcu_status_str = "无故障"
-                case 1:
-                    mcu_status_str = "有故障"
-                case _:
-                    mcu_status_str = "无效"
-
-            # Handle fault level
-            match fault_level:
-                case 0:
-                    fault_level_str = "无故障"
-                case 1:
-                    fault_level_str = "一级故障"
-                case 2:
-                    fault_level_str = "二级故障"
-                case 3:
-                    fault_level_str = "三级故障"
-                case _:
-                    fault_level_str = "未知故障等级"
-
-            software_version *= 0.1
-            mcu_temp -= 40
-            motor_temp -= 40
-
-            return {
-                "workMode": work_mode_str,
-                "hillAssists": hill_assists_str,
-                "mcuStatus": mcu_status_str,
-                "faultCcode": fault_code,
-                "faultLevel": fault_level_str,
-                "softwareVersion": software_version,
-                "mcuTemperature": mcu_temp,
-                "motorTemperature": motor_temp,
-            }
-
-        case 0x0CFE03EF:
-            (
-                position,
-                mechanical_position,
-                _,
-                _,
-                _,
-                _,
-            ) = struct.unpack("<2H4B", message.frame.data)
-
-            return {
-                "position": round(position * 0.0055, 2),
-                "mechanicalPosition": round(mechanical_position * 0.0055, 2),
-            }
-
-        case _:
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Optional
+
+from zlg.zlgcan import ZCAN_Receive_Data, ZCAN_ReceiveFD_Data
+
+
+@dataclass(frozen=True)
+class Signal:
+    """
+    报文中的一个信号。
+
+    取值过程：raw = 第 index 个解包字段；若给出 mask，raw = (raw >> shift) & mask；
+    若给出 enum，结果为枚举表中的文字；否则结果为 raw * scale / divisor + offset，
+    ndigits 不为空时再做四舍五入。
+    """
+
+    name: str
+    index: int
+    scale: float = 1
+    divisor: float = 1
+    offset: float = 0
+    ndigits: Optional[int] = None
+    shift: int = 0
+    mask: Optional[int] = None
+    enum: Optional[Dict[int, str]] = None
+    enum_default: str = "未知"
+
+
+@dataclass(frozen=True)
+class MessageLayout:
+    """
+    报文布局：struct 格式串加信号列表。
+
+    格式串长度不超过 8 字节时可用于经典 CAN 帧，CANFD 帧最长可达 64 字节。
+    """
+
+    name: str
+    fmt: str
+    signals: tuple[Signal, ...] = field(default_factory=tuple)
+
+
+# 电机上报报文，按报文序号（CAN ID 的第 8-15 位）索引，所有电机共用
+MOTOR_LAYOUTS: Dict[int, MessageLayout] = {
+    0x01: MessageLayout(
+        "status1",
+        "<4H",
+        (
+            Signal("torque", 0, divisor=10, offset=-2000, ndigits=2),
+            Signal("speed", 1, offset=-20000),
+            Signal("inputVoltage", 2, divisor=10),
+            Signal("inputCurrent", 3, divisor=10, offset=-1000, ndigits=2),
+        ),
+    ),
+    0x02: MessageLayout(
+        "status2",
+        "<8B",
+        (
+            Signal(
+                "workMode",
+                0,
+                mask=0b111,
+                enum={0: "自由模式", 1: "扭矩模式", 2: "速度模式"},
+                enum_default="无效模式",
+            ),
+            Signal(
+                "hillAssists",
+                0,
+                shift=3,
+                mask=0b1,
+                enum={0: "爬坡模式关闭", 1: "爬坡模式开启"},
+            ),
+            Signal(
+                "mcuStatus",
+                0,
+                shift=4,
+                mask=0b11,
+                enum={0: "无故障", 1: "有故障"},
+                enum_default="无效",
+            ),
+            Signal("faultCode", 1),
+            Signal(
+                "faultLevel",
+                2,
+                mask=0xFF,
+                enum={0: "无故障", 1: "一级故障", 2: "二级故障", 3: "三级故障"},
+                enum_default="未知故障等级",
+            ),
+            Signal("softwareVersion", 4, scale=0.1),
+            Signal("mcuTemperature", 6, offset=-40),
+            Signal("motorTemperature", 7, offset=-40),
+        ),
+    ),
+    0x03: MessageLayout(
+        "status3",
+        "<2H4B",
+        (
+            Signal("position", 0, scale=0.0055, ndigits=2),
+            Signal("mechanicalPosition", 1, scale=0.0055, ndigits=2),
+        ),
+    ),
+}
+
+# 电机编号 -> CAN ID 中的电机字节（第 16-23 位）
+MOTOR_ID_BYTES: Dict[int, int] = {
+    0: 0xFF,
+    1: 0xFE,
+}
+
+# 电机编号 -> {信号名: 该电机上报时使用的键名}，保留各电机原有的键名
+MOTOR_SIGNAL_NAMES: Dict[int, Dict[str, str]] = {
+    1: {"faultCode": "faultCcode"},
+}
+
+
+def motor_message_id(id_byte: int, index: int) -> int:
+    """电机上报报文的扩展帧 ID：0x0C | 电机字节 | 报文序号 | 0xEF。"""
+    return 0x0C000000 | (id_byte << 16) | (index << 8) | 0xEF
+
+
+def motor_messages(
+    id_byte: int, names: Optional[Dict[str, str]] = None
+) -> Dict[int, MessageLayout]:
+    """
+    某个电机的全部上报报文，CAN ID -> 布局。
+
+    :param names: 信号名 -> 键名，给出时按其重命名对应的信号。
+    """
+    names = names or {}
+    return {
+        motor_message_id(id_byte, index): replace(
+            layout,
+            signals=tuple(
+                replace(signal, name=names.get(signal.name, signal.name))
+                for signal in layout.signals
+            ),
+        )
+        for index, layout in MOTOR_LAYOUTS.items()
+    }
+
+
+def _signal_expression(signal: Signal, tables: Dict[str, tuple]) -> str:
+    """生成单个信号的取值表达式，枚举表登记到 tables 中。"""
+    expr = f"raw[{signal.index}]"
+    if signal.mask is not None:
+        if signal.shift:
+            expr = f"({expr} >> {signal.shift})"
+        expr = f"({expr} & {signal.mask})"
+    if signal.enum is not None:
+        size = (signal.mask if signal.mask is not None else 0xFF) + 1
+        table_name = f"table_{len(tables)}"
+        tables[table_name] = tuple(
+            signal.enum.get(value, signal.enum_default) for value in range(size)
+        )
+        return f"{table_name}[{expr}]"
+    if signal.scale != 1:
+        expr = f"{expr} * {signal.scale!r}"
+    if signal.divisor != 1:
+        expr = f"{expr} / {signal.divisor!r}"
+    if signal.offset:
+        expr = f"{expr} + {signal.offset!r}"
+    if signal.ndigits is not None:
+        expr = f"round({expr}, {signal.ndigits})"
+    return expr
+
+
+def compile_layout(layout: MessageLayout) -> Callable[[Any], dict]:
+    """
+    把报文布局编译为解码函数。
+
+    struct.Struct 预先编译，枚举信号展开为按原始值下标访问的元组，
+    并为每个布局生成一个直接构造结果字典的函数，
+    每帧解码只需一次 unpack_from 加若干次查表。
+    """
+    tables: Dict[str, tuple] = {}
+    items = ", ".join(
+        f"{signal.name!r}: {_signal_expression(signal, tables)}"
+        for signal in layout.signals
+    )
+    source = f"def decode(data):\n    raw = unpack_from(data)\n    return {{{items}}}\n"
+    namespace = {"unpack_from": struct.Struct(layout.fmt).unpack_from, **tables}
+    exec(compile(source, f"<layout {layout.name}>", "exec"), namespace)
+    return namespace["decode"]
+
+
+def compile_parser(
+    messages: Dict[int, MessageLayout],
+) -> Callable[[ZCAN_Receive_Data | ZCAN_ReceiveFD_Data], dict]:
+    """
+    把 CAN ID -> 布局 的映射编译为按 ID 分发的解析函数。
+
+    解析函数同时接受 CAN 与 CANFD 帧；帧的有效长度短于布局时返回错误信息。
+    解析结果的信号与原来手写的 parse_motor_0 / parse_motor_1 相同，另外附带帧的
+    接收时间戳 timestamp（设备时间戳，微秒），最新状态、历史、SSE 与 WebSocket
+    推送都依赖该字段；错误信息不带时间戳。
+    """
+    decoders = {
+        can_id: (compile_layout(layout), struct.calcsize(layout.fmt))
+        for can_id, layout in messages.items()
+    }
+    get_decoder = decoders.get
+
+    def parse(
+        message: ZCAN_Receive_Data | ZCAN_ReceiveFD_Data,
+    ) -> dict[str, int | float | str]:
+        frame = message.frame
+        entry = get_decoder(frame.can_id)
+        if entry is None:
             return {"error": "未知的 CAN ID"}
+        decoder, size = entry
+        # 经典帧与 CANFD 帧的长度字段分别为 can_dlc / len
+        if size > 8 and getattr(frame, "len", 0) < size:
+            return {"error": "CAN 帧长度不足"}
+        result = decoder(frame.data)
+        result["timestamp"] = message.timestamp
+        return result
+
+    return parse
+
+
+# 所有电机上报报文的布局，CAN ID -> 布局
+MESSAGE_LAYOUTS: Dict[int, MessageLayout] = {
+    can_id: layout
+    for motor, id_byte in MOTOR_ID_BYTES.items()
+    for can_id, layout in motor_messages(
+        id_byte, MOTOR_SIGNAL_NAMES.get(motor)
+    ).items()
+}
+
+# 各电机的解析函数，结果为 {信号名: 值, ..., "timestamp": 接收时间戳（微秒）}
+parse_motor_0 = compile_parser(
+    motor_messages(MOTOR_ID_BYTES[0], MOTOR_SIGNAL_NAMES.get(0))
+)
+parse_motor_1 = compile_parser(
+    motor_messages(MOTOR_ID_BYTES[1], MOTOR_SIGNAL_NAMES.get(1))
+)
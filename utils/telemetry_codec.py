@@ -0,0 +1,147 @@
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Optional
+
+# 二进制批次格式（小端）：
+#   批次头   "<2sBBH"  magic b"ZT", 版本, 保留, 数据块数
+#   数据块头 "<HHI"    报文类型 ID, 信号数, 行数
+#   数据块体 行数个 uint64 时间戳，随后每个信号一列 float32
+# 报文类型 ID 与信号名、枚举文字的对应关系通过 JSON 文本消息（type 为 schema）下发，
+# 枚举信号的值为文字在 labels 列表中的下标。
+MAGIC = b"ZT"
+VERSION = 1
+BATCH_HEADER = struct.Struct("<2sBBH")
+BLOCK_HEADER = struct.Struct("<HHI")
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class _MessageType:
+    def __init__(self, type_id: int, signals: tuple[str, ...]):
+        self.type_id = type_id
+        self.signals = signals
+        # 信号名 -> {文字: 下标}，只包含取值为文字的信号
+        self.labels: Dict[str, Dict[str, int]] = {}
+
+    def schema(self) -> dict:
+        return {
+            "type": "schema",
+            "id": self.type_id,
+            "signals": list(self.signals),
+            "labels": {name: list(table) for name, table in self.labels.items()},
+        }
+
+
+class TelemetryEncoder:
+    """
+    把一批解析结果编码为紧凑的二进制消息。
+
+    同一种报文（信号名相同）的结果合并为一个按列存放的数据块，
+    每个样本只占 8 字节时间戳加每信号 4 字节。编码器按连接维护报文类型表，
+    新的报文类型或枚举文字出现时，encode 同时返回需要先发送的 schema 消息。
+    接受逐帧结果（信号值为标量）与列式结果（信号值为列表，含 canId）；
+    不含时间戳的结果（如解析错误）被忽略。
+    """
+
+    def __init__(self):
+        self.types: Dict[tuple, _MessageType] = {}
+
+    def encode(self, items: list) -> tuple[list[dict], Optional[bytes]]:
+        """
+        :param items: 解析结果列表。
+        :return: (需要先发送的 schema 消息列表, 二进制批次)，没有可编码的数据时批次为 None。
+        """
+        groups: Dict[tuple, list] = {}
+        for item in items:
+            if not isinstance(item, dict) or "timestamp" not in item:
+                continue
+            key = tuple(name for name in item if name not in ("timestamp", "canId"))
+            if key in groups:
+                groups[key].append(item)
+            else:
+                groups[key] = [item]
+
+        schemas = []
+        blocks = []
+        for key, rows in groups.items():
+            message_type = self.types.get(key)
+            if message_type is None:
+                message_type = self.types[key] = _MessageType(len(self.types), key)
+                changed = True
+            else:
+                changed = False
+            columnar = isinstance(rows[0]["timestamp"], list)
+            timestamps = array("Q")
+            if columnar:
+                for row in rows:
+                    timestamps.extend(row["timestamp"])
+            else:
+                timestamps.extend(row["timestamp"] for row in rows)
+            body = [timestamps]
+            for name in message_type.signals:
+                if columnar:
+                    values = [value for row in rows for value in row[name]]
+                else:
+                    values = [row[name] for row in rows]
+                if name in message_type.labels or isinstance(values[0], str):
+                    table = message_type.labels.setdefault(name, {})
+                    size = len(table)
+                    values = [table.setdefault(value, len(table)) for value in values]
+                    changed = changed or len(table) != size
+                body.append(array("f", values))
+            if changed:
+                schemas.append(message_type.schema())
+            header = BLOCK_HEADER.pack(
+                message_type.type_id, len(message_type.signals), len(timestamps)
+            )
+            if _BIG_ENDIAN:
+                for column in body:
+                    column.byteswap()
+            blocks.append(header + b"".join(column.tobytes() for column in body))
+
+        if not blocks:
+            return schemas, None
+        return schemas, BATCH_HEADER.pack(MAGIC, VERSION, 0, len(blocks)) + b"".join(
+            blocks
+        )
+
+
+def decode_batch(data: bytes, types: Dict[int, dict]) -> list[dict]:
+    """
+    解码 TelemetryEncoder 产生的二进制批次，供测试与 Python 客户端使用。
+
+    :param data: 二进制批次。
+    :param types: 报文类型 ID -> schema 消息。
+    :return: 逐样本的结果字典列表，枚举信号还原为文字。
+    """
+    magic, version, _, block_count = BATCH_HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("不是有效的遥测批次")
+    offset = BATCH_HEADER.size
+    results = []
+    for _ in range(block_count):
+        type_id, signal_count, rows = BLOCK_HEADER.unpack_from(data, offset)
+        offset += BLOCK_HEADER.size
+        schema = types[type_id]
+        timestamps = array("Q")
+        timestamps.frombytes(data[offset : offset + 8 * rows])
+        offset += 8 * rows
+        columns: Dict[str, Any] = {}
+        for name in schema["signals"][:signal_count]:
+            column = array("f")
+            column.frombytes(data[offset : offset + 4 * rows])
+            offset += 4 * rows
+            if _BIG_ENDIAN:
+                column.byteswap()
+            labels = schema["labels"].get(name)
+            columns[name] = (
+                [labels[int(value)] for value in column] if labels else column
+            )
+        if _BIG_ENDIAN:
+            timestamps.byteswap()
+        for i in range(rows):
+            result = {name: column[i] for name, column in columns.items()}
+            result["timestamp"] = timestamps[i]
+            results.append(result)
+    return results
@@ -0,0 +1,207 @@
+import ctypes
+import re
+from typing import Any, Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，仅列式解码需要
+    np = None
+
+from utils.parsing import MESSAGE_LAYOUTS, MessageLayout
+from zlg.zlgcan import (
+    ZCAN_CAN_FRAME,
+    ZCAN_CANFD_FRAME,
+    ZCAN_Receive_Data,
+    ZCAN_ReceiveFD_Data,
+)
+
+CAN_ID_MASK = 0x1FFFFFFF
+
+_STRUCT_TO_NUMPY = {
+    "b": "i1",
+    "B": "u1",
+    "h": "i2",
+    "H": "u2",
+    "i": "i4",
+    "I": "u4",
+    "l": "i4",
+    "L": "u4",
+    "q": "i8",
+    "Q": "u8",
+    "e": "f2",
+    "f": "f4",
+    "d": "f8",
+}
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("列式解码需要安装 numpy")
+
+
+def receive_dtype(fd: bool = False) -> "np.dtype":
+    """
+    与 ZCAN_Receive_Data / ZCAN_ReceiveFD_Data 内存布局一致的结构化 dtype。
+
+    id 字段包含 can_id（低 29 位）及 err/rtr/eff 标志位。
+    """
+    require_numpy()
+    data_type = ZCAN_ReceiveFD_Data if fd else ZCAN_Receive_Data
+    frame_type = ZCAN_CANFD_FRAME if fd else ZCAN_CAN_FRAME
+    return np.dtype(
+        {
+            "names": ["id", "len", "data", "timestamp"],
+            "formats": ["<u4", "u1", ("u1", 64 if fd else 8), "<u8"],
+            "offsets": [
+                0,
+                frame_type.can_dlc.offset if not fd else frame_type.len.offset,
+                frame_type.data.offset,
+                data_type.timestamp.offset,
+            ],
+            "itemsize": ctypes.sizeof(data_type),
+        }
+    )
+
+
+def layout_dtype(layout: MessageLayout) -> "np.dtype":
+    """
+    把报文布局的 struct 格式串转换为 numpy 结构化 dtype，字段依次命名为 f0, f1, ...
+    """
+    require_numpy()
+    fmt = layout.fmt
+    byte_order = "<"
+    if fmt and fmt[0] in "<>=!@":
+        byte_order = ">" if fmt[0] in ">!" else "<"
+        fmt = fmt[1:]
+    formats = []
+    offsets = []
+    offset = 0
+    for count, code in re.findall(r"(\d*)([a-zA-Z?])", fmt):
+        count = int(count) if count else 1
+        if code == "x":
+            offset += count
+            continue
+        item = np.dtype(byte_order + _STRUCT_TO_NUMPY[code])
+        for _ in range(count):
+            formats.append(item)
+            offsets.append(offset)
+            offset += item.itemsize
+    return np.dtype(
+        {
+            "names": [f"f{i}" for i in range(len(formats))],
+            "formats": formats,
+            "offsets": offsets,
+            "itemsize": offset,
+        }
+    )
+
+
+# id(layout) -> (layout, dtype, {信号名: 枚举文字表})
+_compiled_layouts: Dict[int, tuple] = {}
+
+
+def _compile_layout(layout: MessageLayout) -> tuple:
+    compiled = _compiled_layouts.get(id(layout))
+    if compiled is None or compiled[0] is not layout:
+        tables = {}
+        for signal in layout.signals:
+            if signal.enum is not None:
+                size = (signal.mask if signal.mask is not None else 0xFF) + 1
+                tables[signal.name] = np.array(
+                    [signal.enum.get(v, signal.enum_default) for v in range(size)],
+                    dtype=object,
+                )
+        compiled = (layout, layout_dtype(layout), tables)
+        _compiled_layouts[id(layout)] = compiled
+    return compiled
+
+
+def frames_view(msgs: Any, count: int, fd: bool = False) -> "np.ndarray":
+    """
+    以结构化数组的形式零拷贝地查看 ZCAN.Receive 返回的帧数组。
+
+    返回的数组与 msgs 共享内存，msgs 归还缓冲区池之前必须用完。
+    """
+    return np.frombuffer(msgs, dtype=receive_dtype(fd), count=count)
+
+
+def count_ids(msgs: Any, count: int, fd: bool = False) -> Dict[int, int]:
+    """一批帧中各 CAN ID 的帧数。"""
+    require_numpy()
+    ids, counts = np.unique(
+        frames_view(msgs, count, fd)["id"] & CAN_ID_MASK, return_counts=True
+    )
+    return dict(zip(ids.tolist(), counts.tolist()))
+
+
+def decode_columns(
+    msgs: Any,
+    count: int,
+    layouts: Optional[Dict[int, MessageLayout]] = None,
+    fd: bool = False,
+    labels: bool = False,
+) -> Dict[int, Dict[str, "np.ndarray"]]:
+    """
+    整批列式解码。
+
+    按 CAN ID 用布尔掩码选出各报文的帧，再对整列做移位、掩码、缩放和偏移。
+
+    :param msgs: ZCAN_Receive_Data（fd 时为 ZCAN_ReceiveFD_Data）数组。
+    :param count: 有效帧数。
+    :param layouts: CAN ID -> 布局，默认为所有电机报文。
+    :param fd: msgs 是否为 CANFD 帧数组。
+    :param labels: 枚举信号是否转换为文字，否则输出原始编码。
+    :return: {can_id: {"timestamp": 列, 信号名: 列, ...}}，只包含本批出现的 ID。
+    """
+    require_numpy()
+    return decode_frame_columns(frames_view(msgs, count, fd), layouts, labels)
+
+
+def decode_frame_columns(
+    frames: "np.ndarray",
+    layouts: Optional[Dict[int, MessageLayout]] = None,
+    labels: bool = False,
+) -> Dict[int, Dict[str, "np.ndarray"]]:
+    """
+    对结构化帧数组做列式解码，decode_columns 与帧记录导出共用。
+
+    :param frames: 含 id、data、timestamp 字段的结构化数组，
+        如 frames_view 的返回值或帧记录文件的记录数组。
+    :param layouts: CAN ID -> 布局，默认为所有电机报文。
+    :param labels: 枚举信号是否转换为文字，否则输出原始编码。
+    :return: 同 decode_columns。
+    """
+    require_numpy()
+    layouts = MESSAGE_LAYOUTS if layouts is None else layouts
+    can_ids = frames["id"] & CAN_ID_MASK
+    present = np.unique(can_ids)
+    columns: Dict[int, Dict[str, np.ndarray]] = {}
+    for can_id in present.tolist():
+        layout = layouts.get(can_id)
+        if layout is None:
+            continue
+        rows = frames[can_ids == can_id]
+        _, dtype, tables = _compile_layout(layout)
+        raw = np.ascontiguousarray(rows["data"][:, : dtype.itemsize]).view(dtype)[:, 0]
+        result = {"timestamp": rows["timestamp"]}
+        for signal in layout.signals:
+            value = raw[f"f{signal.index}"]
+            if signal.mask is not None:
+                value = (value >> signal.shift) & signal.mask
+            if signal.enum is not None:
+                result[signal.name] = tables[signal.name][value] if labels else value
+                continue
+            if value.dtype.kind in "iu":
+                # 先转为 int64，避免无符号整数加负偏移时溢出
+                value = value.astype(np.int64)
+            if signal.scale != 1:
+                value = value * signal.scale
+            if signal.divisor != 1:
+                value = value / signal.divisor
+            if signal.offset:
+                value = value + signal.offset
+            if signal.ndigits is not None:
+                value = np.round(value, signal.ndigits)
+            result[signal.name] = value
+        columns[can_id] = result
+    return columns
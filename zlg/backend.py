@@ -0,0 +1,196 @@
+import os
+import platform
+from abc import ABC, abstractmethod
+from ctypes import POINTER, byref, c_char_p, c_void_p
+
+
+class ZCANBackend(ABC):
+    """
+    CAN 后端接口。
+
+    ZCAN 的所有设备访问都经由后端完成，每个方法对应 zlgcan.dll 的一个导出函数，
+    参数与返回值约定与 DLL 保持一致：句柄为整数，0 表示无效；状态码为 ZCAN_STATUS_*；
+    接收函数把帧写入调用方提供的 ctypes 数组并返回实际帧数。
+    """
+
+    @abstractmethod
+    def open_device(self, device_type, device_index, reserved):
+        raise NotImplementedError
+
+    @abstractmethod
+    def close_device(self, device_handle):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_device_inf(self, device_handle, info):
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_device_online(self, device_handle):
+        raise NotImplementedError
+
+    @abstractmethod
+    def init_can(self, device_handle, can_index, init_config):
+        raise NotImplementedError
+
+    @abstractmethod
+    def start_can(self, chn_handle):
+        raise NotImplementedError
+
+    @abstractmethod
+    def reset_can(self, chn_handle):
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear_buffer(self, chn_handle):
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_channel_err_info(self, chn_handle, err_info):
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_channel_status(self, chn_handle, status):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_receive_num(self, chn_handle, can_type):
+        raise NotImplementedError
+
+    @abstractmethod
+    def transmit(self, chn_handle, msgs, length):
+        raise NotImplementedError
+
+    @abstractmethod
+    def receive(self, chn_handle, msgs, rcv_num, wait_time):
+        raise NotImplementedError
+
+    @abstractmethod
+    def transmit_fd(self, chn_handle, msgs, length):
+        raise NotImplementedError
+
+    @abstractmethod
+    def receive_fd(self, chn_handle, msgs, rcv_num, wait_time):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_value(self, device_handle, path, value):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_value(self, device_handle, path):
+        raise NotImplementedError
+
+    # IProperty 是 DLL 内部的函数指针表，只有 DLL 后端能提供，其余后端沿用默认实现
+    def get_iproperty(self, device_handle):
+        raise NotImplementedError
+
+    def release_iproperty(self, iproperty):
+        raise NotImplementedError
+
+
+class DllBackend(ZCANBackend):
+    """
+    基于 zlgcan.dll 的后端，仅支持 Windows。
+    """
+
+    def __init__(self, dll_path):
+        if platform.system() != "Windows":
+            raise OSError("zlgcan.dll 仅支持 Windows，请使用 virtual 或 socketcan 后端")
+        from ctypes import windll
+
+        self.__dll = windll.LoadLibrary(dll_path)
+        if self.__dll == None:
+            raise OSError("DLL couldn't be loaded!")
+
+    def open_device(self, device_type, device_index, reserved):
+        return self.__dll.ZCAN_OpenDevice(device_type, device_index, reserved)
+
+    def close_device(self, device_handle):
+        return self.__dll.ZCAN_CloseDevice(device_handle)
+
+    def get_device_inf(self, device_handle, info):
+        return self.__dll.ZCAN_GetDeviceInf(device_handle, byref(info))
+
+    def is_device_online(self, device_handle):
+        return self.__dll.ZCAN_IsDeviceOnLine(device_handle)
+
+    def init_can(self, device_handle, can_index, init_config):
+        return self.__dll.ZCAN_InitCAN(device_handle, can_index, byref(init_config))
+
+    def start_can(self, chn_handle):
+        return self.__dll.ZCAN_StartCAN(chn_handle)
+
+    def reset_can(self, chn_handle):
+        return self.__dll.ZCAN_ResetCAN(chn_handle)
+
+    def clear_buffer(self, chn_handle):
+        return self.__dll.ZCAN_ClearBuffer(chn_handle)
+
+    def read_channel_err_info(self, chn_handle, err_info):
+        return self.__dll.ZCAN_ReadChannelErrInfo(chn_handle, byref(err_info))
+
+    def read_channel_status(self, chn_handle, status):
+        return self.__dll.ZCAN_ReadChannelStatus(chn_handle, byref(status))
+
+    def get_receive_num(self, chn_handle, can_type):
+        return self.__dll.ZCAN_GetReceiveNum(chn_handle, can_type)
+
+    def transmit(self, chn_handle, msgs, length):
+        return self.__dll.ZCAN_Transmit(chn_handle, byref(msgs), length)
+
+    def receive(self, chn_handle, msgs, rcv_num, wait_time):
+        return self.__dll.ZCAN_Receive(chn_handle, byref(msgs), rcv_num, wait_time)
+
+    def transmit_fd(self, chn_handle, msgs, length):
+        return self.__dll.ZCAN_TransmitFD(chn_handle, byref(msgs), length)
+
+    def receive_fd(self, chn_handle, msgs, rcv_num, wait_time):
+        return self.__dll.ZCAN_ReceiveFD(chn_handle, byref(msgs), rcv_num, wait_time)
+
+    def set_value(self, device_handle, path, value):
+        self.__dll.ZCAN_SetValue.argtypes = [c_void_p, c_char_p, c_void_p]
+        return self.__dll.ZCAN_SetValue(device_handle, path.encode("utf-8"), value)
+
+    def get_value(self, device_handle, path):
+        self.__dll.ZCAN_GetValue.argtypes = [c_void_p, c_char_p]
+        self.__dll.ZCAN_GetValue.restype = c_void_p
+        return self.__dll.ZCAN_GetValue(device_handle, path.encode("utf-8"))
+
+    def get_iproperty(self, device_handle):
+        from zlg.zlgcan import IProperty
+
+        self.__dll.GetIProperty.restype = POINTER(IProperty)
+        return self.__dll.GetIProperty(device_handle)
+
+    def release_iproperty(self, iproperty):
+        return self.__dll.ReleaseIProperty(iproperty)
+
+
+def create_backend(name: str | None, dll_path: str) -> ZCANBackend:
+    """
+    按名称创建后端。
+
+    :param name: 后端名称，dll / virtual / socketcan；为空时读取环境变量 ZLG_CAN_BACKEND，
+        仍为空则 Windows 上使用 dll，其他平台使用 virtual。
+    :param dll_path: zlgcan.dll 路径，仅 dll 后端使用。
+    :return: 后端实例。
+    """
+    name = name or os.environ.get("ZLG_CAN_BACKEND")
+    if not name:
+        name = "dll" if platform.system() == "Windows" else "virtual"
+
+    match name:
+        case "dll":
+            return DllBackend(dll_path)
+        case "virtual":
+            from zlg.virtual import VirtualBackend
+
+            return VirtualBackend()
+        case "socketcan":
+            from zlg.socketcan import SocketCANBackend
+
+            interfaces = os.environ.get("ZLG_SOCKETCAN_INTERFACES", "vcan0,vcan1")
+            return SocketCANBackend(interfaces.split(","))
+        case _:
+            raise ValueError(f"未知的 CAN 后端：{name}")
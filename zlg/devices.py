@@ -0,0 +1,60 @@
+from typing import Any, Dict, Optional
+
+# 每个设备在管理器通道号中占用的范围：第 slot 个设备的通道 i 对应管理器通道号
+# slot * CHANNELS_PER_DEVICE + i。第一个打开的设备 slot 为 0，其通道号与设备通道号相同，
+# 只使用一个设备时与原来按通道号寻址的接口完全一致。
+CHANNELS_PER_DEVICE = 16
+# 管理器通道号会写入帧记录（1 字节），因此最多同时打开 256 / 16 个设备
+MAX_DEVICES = 256 // CHANNELS_PER_DEVICE
+
+# (设备类型, 设备索引)
+DeviceKey = tuple[int, int]
+
+
+def device_key(device_type: Any, device_index: int) -> DeviceKey:
+    """设备类型可以是 ZCAN_DEVICE_TYPE 或整数。"""
+    return (getattr(device_type, "value", device_type), device_index)
+
+
+class OpenDevice:
+    """
+    一个已打开的设备。
+
+    channels 为设备通道号 -> 管理器通道号，管理器内部的任务、调度器、订阅等都按
+    管理器通道号索引，因此不同设备上同一通道号的通道互不干扰。
+    """
+
+    __slots__ = ("key", "handle", "slot", "channels")
+
+    def __init__(self, key: DeviceKey, handle: Any, slot: int):
+        self.key = key
+        self.handle = handle
+        self.slot = slot
+        self.channels: Dict[int, int] = {}
+
+    @property
+    def device_type(self) -> int:
+        return self.key[0]
+
+    @property
+    def device_index(self) -> int:
+        return self.key[1]
+
+    def channel_id(self, index: int) -> int:
+        """设备通道号对应的管理器通道号。"""
+        return self.slot * CHANNELS_PER_DEVICE + index
+
+    def to_dict(self) -> dict:
+        return {
+            "deviceType": self.device_type,
+            "deviceIndex": self.device_index,
+            "slot": self.slot,
+            "channelBase": self.channel_id(0),
+            "channels": {index: chn for index, chn in sorted(self.channels.items())},
+        }
+
+
+def free_slot(devices: Dict[DeviceKey, OpenDevice]) -> Optional[int]:
+    """最小的空闲 slot，已满时为 None。"""
+    used = {device.slot for device in devices.values()}
+    return next((slot for slot in range(MAX_DEVICES) if slot not in used), None)
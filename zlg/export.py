@@ -0,0 +1,208 @@
+import os
+import struct
+from typing import Dict, Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，仅导出需要
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow 为可选依赖，仅导出 Parquet 需要
+    pa = None
+    pq = None
+
+from utils.logger import logger
+from utils.parsing import MESSAGE_LAYOUTS, MessageLayout
+from utils.vectorized import decode_frame_columns
+from zlg.framelog import iter_record_chunks
+from zlg.recorder import (
+    CAN_ID_MASK,
+    EFF_FLAG,
+    FLAG_BRS,
+    FLAG_ESI,
+    FLAG_FD,
+    RTR_FLAG,
+    RX,
+    read_header,
+)
+
+# 导出方式
+RAW = "raw"
+DECODED = "decoded"
+
+# 每次读入内存的记录数，FD 记录（80 字节）时约 20 MB
+CHUNK_RECORDS = 256 * 1024
+
+
+def _require_pyarrow() -> None:
+    if np is None or pa is None:
+        raise RuntimeError("导出 Parquet 需要安装 numpy 和 pyarrow")
+
+
+def _raw_table(records: "np.ndarray") -> "pa.Table":
+    ids = records["id"]
+    flags = records["flags"]
+    data = np.ascontiguousarray(records["data"])
+    return pa.table(
+        {
+            "timestamp": records["timestamp"],
+            "channel": records["channel"],
+            "direction": records["direction"],
+            "canId": ids & CAN_ID_MASK,
+            "eff": (ids & EFF_FLAG) != 0,
+            "rtr": (ids & RTR_FLAG) != 0,
+            "fd": (flags & FLAG_FD) != 0,
+            "brs": (flags & FLAG_BRS) != 0,
+            "esi": (flags & FLAG_ESI) != 0,
+            "length": records["len"],
+            "data": pa.FixedSizeBinaryArray.from_buffers(
+                pa.binary(data.shape[1]), len(data), [None, pa.py_buffer(data)]
+            ),
+        }
+    )
+
+
+def export_raw(
+    paths: Iterable[str],
+    output: str,
+    chunk_records: int = CHUNK_RECORDS,
+    compression: str = "zstd",
+) -> dict:
+    """
+    把帧记录原样导出为一个 Parquet 文件，每块记录写为一个行组。
+
+    data 列为定长二进制（记录的数据区大小），有效字节数见 length 列。
+    所有文件的数据区大小必须相同。
+
+    :return: {"rows", "files"}。
+    """
+    _require_pyarrow()
+    writer = None
+    rows = 0
+    try:
+        for path in paths:
+            for records in iter_record_chunks(path, chunk_records):
+                table = _raw_table(records)
+                if writer is None:
+                    _make_parent(output)
+                    writer = pq.ParquetWriter(
+                        output, table.schema, compression=compression
+                    )
+                writer.write_table(table)
+                rows += len(records)
+    finally:
+        if writer is not None:
+            writer.close()
+    logger.info(f"帧记录已导出：{output}，共 {rows} 行")
+    return {"rows": rows, "files": [output] if writer is not None else []}
+
+
+def export_decoded(
+    paths: Iterable[str],
+    output: str,
+    layouts: Optional[Dict[int, MessageLayout]] = None,
+    include_tx: bool = False,
+    chunk_records: int = CHUNK_RECORDS,
+    compression: str = "zstd",
+) -> dict:
+    """
+    按报文布局解码帧记录，每种报文导出为目录下的一个 Parquet 文件
+    （<CAN ID>_<布局名>.parquet），列为 timestamp、channel 和各信号，枚举信号为文字。
+
+    :param output: 输出目录。
+    :param layouts: CAN ID -> 布局，默认为所有电机报文。
+    :param include_tx: 是否同时解码发送帧。
+    :return: {"rows": {文件: 行数}, "files": [...]}。
+    """
+    _require_pyarrow()
+    layouts = MESSAGE_LAYOUTS if layouts is None else layouts
+    writers: Dict[int, "pq.ParquetWriter"] = {}
+    rows: Dict[int, int] = {}
+    try:
+        for path in paths:
+            with open(path, "rb") as f:
+                data_size, _ = read_header(f)
+            # 数据区装不下的布局（8 字节记录中的 CANFD 报文）无法解码
+            usable = {
+                can_id: layout
+                for can_id, layout in layouts.items()
+                if struct.calcsize(layout.fmt) <= data_size
+            }
+            for records in iter_record_chunks(path, chunk_records):
+                if not include_tx:
+                    records = records[records["direction"] == RX]
+                for chn in np.unique(records["channel"]).tolist():
+                    frames = records[records["channel"] == chn]
+                    for can_id, columns in decode_frame_columns(
+                        frames, usable, labels=True
+                    ).items():
+                        count = len(columns["timestamp"])
+                        table = pa.table(
+                            {
+                                "timestamp": columns.pop("timestamp"),
+                                "channel": np.full(count, chn, dtype=np.uint8),
+                                **{
+                                    name: pa.array(column)
+                                    for name, column in columns.items()
+                                },
+                            }
+                        )
+                        writer = writers.get(can_id)
+                        if writer is None:
+                            _make_parent(os.path.join(output, ""))
+                            writer = writers[can_id] = pq.ParquetWriter(
+                                _decoded_path(output, can_id, layouts[can_id]),
+                                table.schema,
+                                compression=compression,
+                            )
+                        writer.write_table(table.cast(writer.schema))
+                        rows[can_id] = rows.get(can_id, 0) + count
+    finally:
+        for writer in writers.values():
+            writer.close()
+    result = {
+        _decoded_path(output, can_id, layouts[can_id]): count
+        for can_id, count in rows.items()
+    }
+    logger.info(f"帧记录已解码导出：{output}，共 {sum(rows.values())} 行")
+    return {"rows": result, "files": list(result)}
+
+
+def export_parquet(
+    paths: Iterable[str],
+    output: str,
+    mode: str = DECODED,
+    include_tx: bool = False,
+    chunk_records: int = CHUNK_RECORDS,
+) -> dict:
+    """
+    把帧记录文件流式导出为 Parquet，内存占用只与 chunk_records 有关。
+
+    :param paths: 帧记录文件，按顺序导出。
+    :param output: raw 时为输出文件，decoded 时为输出目录。
+    :param mode: raw 为原始帧，decoded 为按报文解码。
+    :param include_tx: decoded 时是否同时解码发送帧。
+    :raises ValueError: 未知的导出方式或文件不是帧记录文件。
+    :raises RuntimeError: 未安装 numpy / pyarrow。
+    """
+    paths = list(paths)
+    if mode == RAW:
+        return export_raw(paths, output, chunk_records)
+    if mode == DECODED:
+        return export_decoded(
+            paths, output, include_tx=include_tx, chunk_records=chunk_records
+        )
+    raise ValueError(f"未知的导出方式：{mode}")
+
+
+def _decoded_path(output: str, can_id: int, layout: MessageLayout) -> str:
+    return os.path.join(output, f"{can_id:08x}_{layout.name}.parquet")
+
+
+def _make_parent(path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
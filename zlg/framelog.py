@@ -0,0 +1,352 @@
+import mmap
+import os
+from typing import Iterable, Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，仅帧记录查询与导出需要
+    np = None
+
+from utils.logger import logger
+from zlg.recorder import (
+    CAN_ID_MASK,
+    EFF_FLAG,
+    FILE_HEADER,
+    FLAG_FD,
+    RTR_FLAG,
+    read_header,
+)
+
+# 帧记录索引（与记录文件同名，加 .idx 后缀，numpy npz 格式）：
+#   block_records  每块的记录数
+#   record_count   建立索引时文件中的记录数，与文件不符时索引作废
+#   min_ts/max_ts  每块记录时间戳的最小值/最大值（稀疏时间索引）
+#   ids            出现过的 CAN ID（升序）
+#   id_offsets     ids[i] 所在的块号为 id_blocks[id_offsets[i]:id_offsets[i + 1]]
+#   id_blocks      按 CAN ID 分组的块号（每组升序）
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+BLOCK_RECORDS = 4096
+
+# 建立索引时每次读入的块数
+_BUILD_BLOCKS = 64
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("帧记录查询需要安装 numpy")
+
+
+def record_dtype(data_size: int) -> "np.dtype":
+    """与帧记录文件中定长记录布局一致的结构化 dtype，字段名与 frames_view 相同。"""
+    _require_numpy()
+    return np.dtype(
+        [
+            ("timestamp", "<u8"),
+            ("id", "<u4"),
+            ("channel", "u1"),
+            ("direction", "u1"),
+            ("len", "u1"),
+            ("flags", "u1"),
+            ("data", "u1", data_size),
+        ]
+    )
+
+
+def iter_record_chunks(path: str, chunk_records: int) -> Iterator["np.ndarray"]:
+    """按块读取帧记录文件，每块为一个结构化数组，末尾不完整的记录被忽略。"""
+    with open(path, "rb") as f:
+        data_size, _ = read_header(f)
+        dtype = record_dtype(data_size)
+        while True:
+            chunk = f.read(dtype.itemsize * chunk_records)
+            count = len(chunk) // dtype.itemsize
+            if not count:
+                break
+            yield np.frombuffer(chunk, dtype=dtype, count=count)
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def is_index_file(path: str) -> bool:
+    """是否为帧记录索引文件（含写入中的临时文件）。"""
+    name = os.path.basename(path)
+    return name.endswith(INDEX_SUFFIX) or (
+        name.endswith(".tmp") and INDEX_SUFFIX + "." in name
+    )
+
+
+def build_index(path: str, block_records: int = BLOCK_RECORDS) -> dict:
+    """顺序扫描一遍帧记录文件，建立每块的时间范围与 CAN ID -> 块号索引。"""
+    _require_numpy()
+    min_ts = []
+    max_ts = []
+    pairs = []
+    count = 0
+    for records in iter_record_chunks(path, block_records * _BUILD_BLOCKS):
+        first_block = count // block_records
+        starts = np.arange(0, len(records), block_records)
+        timestamps = records["timestamp"]
+        min_ts.append(np.minimum.reduceat(timestamps, starts))
+        max_ts.append(np.maximum.reduceat(timestamps, starts))
+        # (CAN ID << 32 | 块号) 去重，得到每个 ID 出现过的块
+        blocks = first_block + np.arange(len(records), dtype=np.uint64) // block_records
+        keys = (records["id"] & CAN_ID_MASK).astype(np.uint64) << np.uint64(32) | blocks
+        pairs.append(np.unique(keys))
+        count += len(records)
+    keys = np.unique(np.concatenate(pairs)) if pairs else np.empty(0, np.uint64)
+    key_ids = (keys >> np.uint64(32)).astype(np.uint32)
+    ids, first = np.unique(key_ids, return_index=True)
+    return {
+        "version": np.array(INDEX_VERSION),
+        "block_records": np.array(block_records),
+        "record_count": np.array(count),
+        "min_ts": np.concatenate(min_ts) if min_ts else np.empty(0, np.uint64),
+        "max_ts": np.concatenate(max_ts) if max_ts else np.empty(0, np.uint64),
+        "ids": ids,
+        "id_offsets": np.append(first, len(keys)).astype(np.int64),
+        "id_blocks": (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32),
+    }
+
+
+def write_index(path: str, block_records: int = BLOCK_RECORDS) -> str:
+    """为帧记录文件建立索引并写入 <文件名>.idx，返回索引文件路径。"""
+    index = build_index(path, block_records)
+    return _write_index_file(path, index)
+
+
+def _write_index_file(path: str, index: dict) -> str:
+    """先写临时文件再替换，并发读取时不会读到写了一半的索引。"""
+    out = index_path(path)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, **index)
+        os.replace(tmp, out)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return out
+
+
+def _save_index(path: str, index: dict) -> None:
+    """写入查询时重建的索引，失败时只记录警告。"""
+    try:
+        _write_index_file(path, index)
+    except OSError as e:
+        # 目录只读等情况下只是下次仍需重建，不影响查询
+        logger.warning(f"写入帧记录索引失败：{index_path(path)}, {e}")
+
+
+def load_index(path: str, record_count: int) -> Optional[dict]:
+    """读取索引文件，不存在、版本不符或与记录数不符时返回 None。"""
+    try:
+        with np.load(index_path(path)) as data:
+            index = {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        return None
+    if (
+        int(index.get("version", -1)) != INDEX_VERSION
+        or int(index["record_count"]) != record_count
+    ):
+        return None
+    return index
+
+
+class FrameLog:
+    """
+    以 mmap 方式打开的帧记录文件，按时间范围与 CAN ID 查询。
+
+    记录定长，第 n 条记录的位置可以直接算出；查询先用块索引选出
+    时间范围重叠且包含所需 ID 的块，只有这些块所在的页会被读入。
+    索引缺失或过期时扫描一遍文件重建，并写入索引文件供以后使用；
+    仍在写入的文件（persist_index 为 False）每次打开都要重建。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        block_records: int = BLOCK_RECORDS,
+        persist_index: bool = True,
+    ):
+        _require_numpy()
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.data_size, self.created = read_header(self._file)
+            self.dtype = record_dtype(self.data_size)
+            size = os.fstat(self._file.fileno()).st_size - FILE_HEADER.size
+            self.record_count = max(size, 0) // self.dtype.itemsize
+            if self.record_count:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.records = np.frombuffer(
+                    self._mmap,
+                    dtype=self.dtype,
+                    count=self.record_count,
+                    offset=FILE_HEADER.size,
+                )
+            else:
+                self._mmap = None
+                self.records = np.empty(0, dtype=self.dtype)
+            index = load_index(path, self.record_count)
+            if index is None:
+                logger.info(f"建立帧记录索引：{path}")
+                index = build_index(path, block_records)
+                if persist_index:
+                    _save_index(path, index)
+            self.index = index
+        except Exception:
+            self._file.close()
+            raise
+        self.block_records = int(self.index["block_records"])
+
+    def close(self) -> None:
+        # 先释放指向 mmap 的数组，否则 mmap 无法关闭
+        self.records = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "FrameLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def time_range(self) -> tuple[Optional[int], Optional[int]]:
+        """记录中最早与最晚的时间戳（微秒）。"""
+        if not len(self.index["min_ts"]):
+            return None, None
+        return int(self.index["min_ts"].min()), int(self.index["max_ts"].max())
+
+    def ids(self) -> list[int]:
+        return self.index["ids"].tolist()
+
+    def candidate_blocks(
+        self,
+        can_ids: Optional[Iterable[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> "np.ndarray":
+        """时间范围与 [start, end] 重叠、且包含任一 can_ids 的块号（升序）。"""
+        index = self.index
+        mask = np.ones(len(index["min_ts"]), dtype=bool)
+        if start is not None:
+            mask &= index["max_ts"] >= start
+        if end is not None:
+            mask &= index["min_ts"] <= end
+        if can_ids is not None:
+            id_mask = np.zeros_like(mask)
+            ids = index["ids"]
+            for can_id in can_ids:
+                i = int(np.searchsorted(ids, can_id))
+                if i < len(ids) and ids[i] == can_id:
+                    offsets = index["id_offsets"]
+                    id_mask[index["id_blocks"][offsets[i] : offsets[i + 1]]] = True
+            mask &= id_mask
+        return np.flatnonzero(mask)
+
+    def query(
+        self,
+        can_ids: Optional[Iterable[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        channel: Optional[int] = None,
+        direction: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> "np.ndarray":
+        """
+        查询帧记录。
+
+        :param can_ids: CAN ID 列表，为空时不限。
+        :param start: 起始时间戳（微秒，含），为空时不限。
+        :param end: 结束时间戳（微秒，含），为空时不限。
+        :param channel: 通道号，为空时不限。
+        :param direction: RX 或 TX，为空时不限。
+        :param limit: 最多返回的记录数。
+        :return: 按文件顺序排列的记录数组（record_dtype），为 mmap 内容的副本。
+        """
+        can_ids = None if can_ids is None else list(can_ids)
+        wanted = None if can_ids is None else np.array(can_ids, dtype=np.uint32)
+        results = []
+        found = 0
+        for block in self.candidate_blocks(can_ids, start, end).tolist():
+            lo = block * self.block_records
+            rows = self.records[lo : lo + self.block_records]
+            mask = np.ones(len(rows), dtype=bool)
+            if wanted is not None:
+                mask &= np.isin(rows["id"] & CAN_ID_MASK, wanted)
+            if start is not None:
+                mask &= rows["timestamp"] >= start
+            if end is not None:
+                mask &= rows["timestamp"] <= end
+            if channel is not None:
+                mask &= rows["channel"] == channel
+            if direction is not None:
+                mask &= rows["direction"] == direction
+            selected = rows[mask]
+            if limit is not None and found + len(selected) > limit:
+                selected = selected[: limit - found]
+            if len(selected):
+                results.append(selected.copy())
+                found += len(selected)
+            if limit is not None and found >= limit:
+                break
+        if not results:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(results)
+
+
+def records_to_dicts(records: "np.ndarray") -> list[dict]:
+    """把记录数组转换为 JSON 友好的字典列表，data 为有效字节的十六进制串。"""
+    results = []
+    for timestamp, id_word, chn, direction, length, flags, data in records.tolist():
+        results.append(
+            {
+                "timestamp": timestamp,
+                "channel": chn,
+                "direction": direction,
+                "canId": id_word & CAN_ID_MASK,
+                "eff": bool(id_word & EFF_FLAG),
+                "rtr": bool(id_word & RTR_FLAG),
+                "fd": bool(flags & FLAG_FD),
+                "length": length,
+                "data": bytes(data[:length]).hex(),
+            }
+        )
+    return results
+
+
+def query_frames(
+    paths: Iterable[str],
+    can_ids: Optional[Iterable[int]] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    channel: Optional[int] = None,
+    direction: Optional[int] = None,
+    limit: Optional[int] = None,
+    active: Iterable[str] = (),
+) -> list[dict]:
+    """
+    依次查询多个（轮转的）帧记录文件，参数见 FrameLog.query。
+
+    :param active: 仍在写入的文件，不为其保存索引。
+    """
+    active = {os.path.realpath(path) for path in active}
+    can_ids = None if can_ids is None else list(can_ids)
+    results: list[dict] = []
+    for path in paths:
+        remaining = None if limit is None else limit - len(results)
+        if remaining is not None and remaining <= 0:
+            break
+        persist = os.path.realpath(path) not in active
+        with FrameLog(path, persist_index=persist) as log:
+            records = log.query(can_ids, start, end, channel, direction, remaining)
+            results.extend(records_to_dicts(records))
+    return results
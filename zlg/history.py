@@ -0,0 +1,215 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Hashable, Optional
+
+# 降采样方法
+MINMAX = "minmax"
+LTTB = "lttb"
+
+
+class SignalRing:
+    """
+    单个信号的定长环形缓冲区，时间戳（微秒）与数值分别存放在预分配的数组中。
+
+    缓冲区内的时间戳保持递增，since 依此二分查找。新数据的时间戳早于最新一点时
+    （回放旧记录、设备重新打开后时钟归零）视为新的数据源，清空原有数据后重新开始。
+    """
+
+    __slots__ = ("capacity", "timestamps", "values", "next", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array("Q", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.next = 0
+        self.size = 0
+
+    def append(self, timestamp: int, value: float) -> None:
+        if self.size and timestamp < self.timestamps[self.next - 1]:
+            self.clear()
+        i = self.next
+        self.timestamps[i] = timestamp
+        self.values[i] = value
+        self.next = i + 1 if i + 1 < self.capacity else 0
+        if self.size < self.capacity:
+            self.size += 1
+
+    def clear(self) -> None:
+        self.next = 0
+        self.size = 0
+
+    def latest_timestamp(self) -> Optional[int]:
+        if not self.size:
+            return None
+        return self.timestamps[self.next - 1]
+
+    def ordered(self) -> tuple[array, array]:
+        """按时间先后返回全部数据的副本。"""
+        if self.size < self.capacity:
+            return self.timestamps[: self.size], self.values[: self.size]
+        i = self.next
+        return (
+            self.timestamps[i:] + self.timestamps[:i],
+            self.values[i:] + self.values[:i],
+        )
+
+    def since(self, start: int) -> tuple[array, array]:
+        """时间戳不早于 start 的数据。"""
+        timestamps, values = self.ordered()
+        i = bisect_left(timestamps, start)
+        return timestamps[i:], values[i:]
+
+
+def downsample_minmax(timestamps, values, points: int) -> tuple[list, list]:
+    """
+    把数据分成 points // 2 个等长的桶，每个桶按时间先后保留最小值和最大值两个点，
+    曲线的峰值不会丢失。
+    """
+    n = len(values)
+    if n <= points:
+        return list(timestamps), list(values)
+    buckets = max(1, points // 2)
+    out_t: list = []
+    out_v: list = []
+    for b in range(buckets):
+        lo = b * n // buckets
+        hi = (b + 1) * n // buckets
+        if hi <= lo:
+            continue
+        segment = values[lo:hi]
+        i_min = lo + segment.index(min(segment))
+        i_max = lo + segment.index(max(segment))
+        for i in sorted({i_min, i_max}):
+            out_t.append(timestamps[i])
+            out_v.append(values[i])
+    return out_t, out_v
+
+
+def downsample_lttb(timestamps, values, points: int) -> tuple[list, list]:
+    """
+    Largest-Triangle-Three-Buckets 降采样：保留首尾两点，中间每个桶选出与
+    前一个选中点、下一个桶平均点构成的三角形面积最大的点，曲线形状保留得较好。
+    """
+    n = len(values)
+    if n <= points or points < 3:
+        return list(timestamps), list(values)
+    out_t = [timestamps[0]]
+    out_v = [values[0]]
+    every = (n - 2) / (points - 2)
+    a = 0
+    for b in range(points - 2):
+        lo = int(b * every) + 1
+        hi = int((b + 1) * every) + 1
+        next_lo = hi
+        next_hi = min(int((b + 2) * every) + 1, n)
+        if next_hi <= next_lo:
+            next_lo, next_hi = n - 1, n
+        avg_t = sum(timestamps[next_lo:next_hi]) / (next_hi - next_lo)
+        avg_v = sum(values[next_lo:next_hi]) / (next_hi - next_lo)
+        a_t = timestamps[a]
+        a_v = values[a]
+        best = lo
+        best_area = -1.0
+        for i in range(lo, hi):
+            area = abs(
+                (a_t - avg_t) * (values[i] - a_v) - (a_t - timestamps[i]) * (avg_v - a_v)
+            )
+            if area > best_area:
+                best_area = area
+                best = i
+        out_t.append(timestamps[best])
+        out_v.append(values[best])
+        a = best
+    out_t.append(timestamps[n - 1])
+    out_v.append(values[n - 1])
+    return out_t, out_v
+
+
+DOWNSAMPLERS = {
+    MINMAX: downsample_minmax,
+    LTTB: downsample_lttb,
+}
+
+
+class HistoryStore:
+    """
+    按数据源保存各数值信号的历史，每个信号一个定长环形缓冲区。
+
+    文字信号（枚举）不保存，需要时从最新状态读取。
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """
+        :param capacity: 每个信号保留的点数。
+        """
+        self.capacity = capacity
+        self.rings: Dict[Hashable, Dict[str, SignalRing]] = {}
+
+    def update(self, key: Hashable, items: list) -> None:
+        """用一批解析结果（逐帧或列式）追加历史，错误结果被忽略。"""
+        rings = self.rings.get(key)
+        if rings is None:
+            rings = self.rings[key] = {}
+        for item in items:
+            timestamp = item.get("timestamp")
+            if timestamp is None:
+                continue
+            columnar = isinstance(timestamp, list)
+            for name, value in item.items():
+                if name == "timestamp" or name == "canId":
+                    continue
+                sample = value[0] if columnar and value else value
+                if isinstance(sample, str) or isinstance(sample, bool):
+                    continue
+                ring = rings.get(name)
+                if ring is None:
+                    ring = rings[name] = SignalRing(self.capacity)
+                if columnar:
+                    for t, v in zip(timestamp, value):
+                        ring.append(t, v)
+                else:
+                    ring.append(timestamp, value)
+
+    def signals(self, key: Hashable) -> list[str]:
+        return list(self.rings.get(key, {}))
+
+    def query(
+        self,
+        key: Hashable,
+        signals: Optional[list[str]] = None,
+        seconds: Optional[float] = None,
+        points: Optional[int] = None,
+        method: str = LTTB,
+    ) -> Dict[str, dict]:
+        """
+        查询最近一段时间的历史并降采样。
+
+        :param key: 数据源。
+        :param signals: 信号名列表，为空时返回全部数值信号。
+        :param seconds: 最近多少秒（以各信号最新一点的时间戳为准），为空时返回全部。
+        :param points: 每个信号最多返回的点数，为空时不降采样。
+        :param method: 降采样方法，minmax 或 lttb。
+        :return: {信号名: {"timestamps": [...], "values": [...]}}，不存在的信号被忽略。
+        :raises ValueError: 未知的降采样方法。
+        """
+        downsample = DOWNSAMPLERS.get(method)
+        if downsample is None:
+            raise ValueError(f"未知的降采样方法：{method}")
+        rings = self.rings.get(key, {})
+        result = {}
+        for name in signals if signals is not None else list(rings):
+            ring = rings.get(name)
+            if ring is None or not ring.size:
+                continue
+            if seconds is None:
+                timestamps, values = ring.ordered()
+            else:
+                start = ring.latest_timestamp() - int(seconds * 1_000_000)
+                timestamps, values = ring.since(max(start, 0))
+            if points is not None:
+                timestamps, values = downsample(timestamps, values, points)
+            result[name] = {"timestamps": list(timestamps), "values": list(values)}
+        return result
+
+    def remove(self, key: Hashable) -> None:
+        self.rings.pop(key, None)
@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from typing import ContextManager, Dict, Hashable, Iterator, Optional
+
+from utils.logger import logger
+from zlg.queues import DROP_OLDEST, TelemetryQueue, create_queue
+
+
+class Topic:
+    """
+    一个数据源（如某通道上的某个电机）的订阅者集合。
+    """
+
+    def __init__(self, policy: str = DROP_OLDEST, maxsize: Optional[int] = None):
+        """
+        :param policy: 订阅者队列的默认策略。
+        :param maxsize: 订阅者队列的默认容量，为空时使用策略的默认值。
+        """
+        self.policy = policy
+        self.maxsize = maxsize
+        self.subscribers: list[TelemetryQueue] = []
+        self.published = 0
+
+
+class TelemetryHub:
+    """
+    解析结果的发布/订阅中心。
+
+    每个订阅者持有自己的有界队列，互不争抢数据；一批解析结果只产生一次，
+    以引用的方式放入所有订阅者的队列，发布开销为每批每个订阅者一次 put_many。
+    """
+
+    def __init__(self):
+        self.topics: Dict[Hashable, Topic] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.topics
+
+    def add_topic(
+        self, key: Hashable, policy: str = DROP_OLDEST, maxsize: Optional[int] = None
+    ) -> Topic:
+        """
+        创建或更新数据源，已有的订阅者保留。
+
+        :raises ValueError: 未知的队列策略。
+        """
+        # 提前校验策略与容量，避免订阅时才出错
+        create_queue(policy, maxsize)
+        topic = self.topics.get(key)
+        if topic is None:
+            topic = self.topics[key] = Topic(policy, maxsize)
+        else:
+            topic.policy = policy
+            topic.maxsize = maxsize
+        return topic
+
+    def remove_topic(self, key: Hashable) -> None:
+        self.topics.pop(key, None)
+
+    def subscribe(
+        self,
+        key: Hashable,
+        policy: Optional[str] = None,
+        maxsize: Optional[int] = None,
+    ) -> TelemetryQueue:
+        """
+        订阅数据源，返回订阅者自己的队列。
+
+        :param key: 数据源。
+        :param policy: 队列策略，为空时使用数据源的默认策略。
+        :param maxsize: 队列容量，为空时使用数据源的默认容量。
+        :raises KeyError: 数据源不存在。
+        :raises ValueError: 未知的队列策略。
+        """
+        topic = self.topics[key]
+        queue = create_queue(
+            policy or topic.policy, maxsize if maxsize is not None else topic.maxsize
+        )
+        topic.subscribers.append(queue)
+        logger.info(f"新增订阅：{key}，当前订阅数 {len(topic.subscribers)}")
+        return queue
+
+    def unsubscribe(self, key: Hashable, queue: TelemetryQueue) -> None:
+        topic = self.topics.get(key)
+        if topic is not None and queue in topic.subscribers:
+            topic.subscribers.remove(queue)
+            logger.info(f"取消订阅：{key}，当前订阅数 {len(topic.subscribers)}")
+
+    def subscription(
+        self,
+        key: Hashable,
+        policy: Optional[str] = None,
+        maxsize: Optional[int] = None,
+    ) -> ContextManager[TelemetryQueue]:
+        """
+        subscribe 的上下文管理器形式，退出时自动取消订阅。
+
+        订阅在调用时立即生效，参数错误在此处抛出而不是进入 with 时。
+        """
+        queue = self.subscribe(key, policy, maxsize)
+        return self._unsubscribe_on_exit(key, queue)
+
+    @contextmanager
+    def _unsubscribe_on_exit(
+        self, key: Hashable, queue: TelemetryQueue
+    ) -> Iterator[TelemetryQueue]:
+        try:
+            yield queue
+        finally:
+            self.unsubscribe(key, queue)
+
+    def publish(self, key: Hashable, items: list) -> None:
+        """
+        把一批数据发布给数据源的所有订阅者，没有订阅者时直接丢弃。
+        """
+        topic = self.topics.get(key)
+        if topic is None:
+            return
+        topic.published += len(items)
+        for queue in topic.subscribers:
+            queue.put_many(items)
+
+    def stats(self) -> Dict[Hashable, dict]:
+        return {
+            key: {
+                "policy": topic.policy,
+                "published": topic.published,
+                "subscribers": [queue.stats() for queue in topic.subscribers],
+            }
+            for key, topic in self.topics.items()
+        }
@@ -1,59 +1,270 @@
 import asyncio
+import functools
+import os
+import threading
+import time
+from datetime import datetime
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
-from tkinter import NO
-from typing import Callable, Dict, Any, Optional
-from ctypes import c_uint
+from typing import Callable, ContextManager, Dict, Any, Optional, Tuple
+from ctypes import byref, c_uint, memmove, sizeof
 from utils.logger import logger
+from utils.vectorized import count_ids, decode_columns, require_numpy
 
 from fastapi import HTTPException
 from schemas import StatusResponse
+from zlg.backend import ZCANBackend
+from zlg.devices import (
+    CHANNELS_PER_DEVICE,
+    DeviceKey,
+    OpenDevice,
+    device_key,
+    free_slot,
+)
+from zlg.framelog import is_index_file, query_frames, write_index
+from zlg.history import LTTB, HistoryStore
+from zlg.hub import TelemetryHub
+from zlg.metrics import ManagerMetrics
+from zlg.paths import LOG_DIR, glob_paths, relative_path, resolve_path
+from zlg.queues import DROP_OLDEST, TelemetryQueue
+from zlg.receiver import ReceiveWorker
+from zlg.recorder import TX, FrameRecorder
+from zlg.replay import ReplayEngine
+from zlg.scheduler import SKIP, PeriodicScheduler
+from zlg.state import MotorState, StateStore
+from zlg.tracing import PipelineTracer
 from zlg.zlgcan import (
     INVALID_DEVICE_HANDLE,
+    ReceiveBufferPool,
     ZCAN,
+    ZCAN_AUTO_TRANSMIT_OBJ,
+    ZCANFD_AUTO_TRANSMIT_OBJ,
     ZCAN_CHANNEL_INIT_CONFIG,
     ZCAN_DEVICE_TYPE,
     ZCAN_STATUS_OK,
     ZCAN_TYPE_CAN,
-    ZCAN_Receive_Data,
+    ZCAN_TYPE_CANFD,
+    ZCAN_ReceiveFD_Data,
     ZCAN_Transmit_Data,
+    ZCAN_TransmitFD_Data,
 )
 
+# 每个通道硬件定时发送列表的条目数
+HARDWARE_AUTO_SEND_SLOTS = 100
+
+# 预编码发送帧缓存的条目数
+PREPARED_FRAME_CACHE_SIZE = 256
+
+# 解码方式
+DECODE_MODES = ("frame", "columns")
+
+# CANFD 帧合法的数据长度
+CANFD_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+
 
 class ZLGCanManager:
-    def __init__(self, dll_path: str, max_workers: int = 10):
+    def __init__(
+        self,
+        dll_path: str,
+        max_workers: int = 10,
+        backend: Optional[ZCANBackend] = None,
+        receive_mode: str = "thread",
+        receive_wait_time: int = 100,
+        receive_batch_size: int = 1000,
+        receive_max_pending: int = 16,
+        decode_inline: bool = False,
+        decode_mode: str = "frame",
+        hardware_auto_send: bool = False,
+        auto_send_policy: str = SKIP,
+        queue_policy: str = DROP_OLDEST,
+        queue_size: Optional[int] = None,
+        history_size: int = 10000,
+        log_dir: str = LOG_DIR,
+    ):
         """
         初始化 ZLGCanManager 实例。
 
         :param dll_path: DLL 文件路径。
         :param max_workers: 线程池的最大工作线程数。
+        :param backend: CAN 后端，为空时使用 zlgcan.dll。
+        :param receive_mode: 默认接收模式，thread 为独立线程阻塞接收，poll 为定时轮询。
+        :param receive_wait_time: thread 模式下单次 Receive 的最长阻塞时间（毫秒）。
+        :param receive_batch_size: 单次 Receive 的最大帧数，即接收缓冲区容量。
+        :param receive_max_pending: thread 模式下每个通道已投递、尚未处理的批次上限，
+            达到上限时接收线程暂停读取，帧积压在设备缓冲区中。
+        :param decode_inline: 是否在接收线程内直接解析，适用于解析函数开销很小的场景；
+            否则每批帧交给线程池解析一次。
+        :param decode_mode: frame 为逐帧调用注册的解析函数；columns 为基于 numpy 的整批列式解码，
+            每批每种报文投递一条列数据，适用于高速记录。
+        :param hardware_auto_send: 自动发送默认是否使用设备的硬件定时发送列表。
+        :param auto_send_policy: 软件定时发送错过截止时刻时的策略，catch_up 为补发，skip 为跳过。
+        :param queue_policy: 订阅者队列的默认策略，drop_oldest / latest / conflate。
+        :param queue_size: 订阅者队列的默认容量，为空时使用策略的默认值。
+        :param history_size: 每个数值信号在内存中保留的历史点数，0 为不保留。
+        :param log_dir: 帧记录、回放与导出文件所在的目录，接口中的路径均相对于该目录，
+            不能访问目录之外的文件。
+        :raises ValueError: 未知的解码方式。
+        :raises RuntimeError: 解码方式为 columns 但未安装 numpy。
         """
+        if decode_mode not in DECODE_MODES:
+            raise ValueError(f"未知的解码方式：{decode_mode}")
+        if decode_mode == "columns":
+            require_numpy()
         self.executor = ThreadPoolExecutor(max_workers)
-        self.zcan = ZCAN(dll_path)
-        self.device_handle = INVALID_DEVICE_HANDLE
+        self.zcan = ZCAN(dll_path, backend)
+        # 已打开的设备，按 (设备类型, 设备索引) 索引；其余按通道号索引的结构
+        # 均使用管理器通道号，由设备的 slot 与设备通道号算出，见 zlg.devices
+        self.devices: Dict[DeviceKey, OpenDevice] = {}
         self.chn_handles: Dict[int, Any] = {}
-        # 格式: {channel_id: {motor_id: asyncio.Queue}}
-        self.queues: Dict[int, Dict[int, asyncio.Queue]] = {}
+        # 解析结果按 (channel_id, motor_id) 发布，每个订阅者有自己的队列
+        self.hub = TelemetryHub()
+        # 各电机的最新状态，按 (channel_id, motor_id) 索引
+        self.states = StateStore()
+        # 各电机数值信号的历史，按 (channel_id, motor_id) 索引
+        self.history = HistoryStore(history_size) if history_size > 0 else None
+        self.log_dir = log_dir
+        # 原始帧记录器，未在记录时为空
+        self.recorder: Optional[FrameRecorder] = None
+        # 帧记录回放，未在回放时为空
+        self.replay: Optional[ReplayEngine] = None
+        self.replay_task: Optional[asyncio.Task] = None
+        self.queue_policy = queue_policy
+        self.queue_size = queue_size
         # 格式: {channel_id: {motor_id: parse_func}}
         self.parse_functions: Dict[int, Dict[int, Callable]] = {}
-        # 格式: {channel_id: {motor_id: asyncio.Task}}
-        self.auto_send_tasks: Dict[int, Dict[int, asyncio.Task]] = {}
+        # 格式: {channel_id: PeriodicScheduler}，软件定时发送按电机 ID 登记在通道的调度器中
+        self.schedulers: Dict[int, PeriodicScheduler] = {}
+        self.auto_send_policy = auto_send_policy
+        # 格式: {channel_id: {motor_id: {"indices", "msgs", "interval", "fd"}}}
+        self.hardware_auto_sends: Dict[int, Dict[int, dict]] = {}
+        self.hardware_auto_send = hardware_auto_send
         # 格式: {channel_id: asyncio.Task}
         self.receive_tasks: Dict[int, asyncio.Task] = {}
+        self.receive_mode = receive_mode
+        self.receive_wait_time = receive_wait_time
+        self.receive_batch_size = receive_batch_size
+        self.receive_max_pending = receive_max_pending
+        # 格式: {channel_id: asyncio.Queue}，thread 模式下已投递、尚未处理的批次
+        self.receive_backlogs: Dict[int, asyncio.Queue] = {}
+        self.decode_inline = decode_inline
+        self.decode_mode = decode_mode
+        # poll 模式的轮询间隔（秒）
+        self.receive_poll_interval = 0.5
+        # 格式: {(channel_id, fd): ReceiveBufferPool}，每个接收线程一个，批次解析完成后归还
+        self.receive_buffer_pools: Dict[Tuple[int, bool], ReceiveBufferPool] = {}
+        # 格式: {channel_id: can_type}，0 为 CAN，1 为 CANFD
+        self.chn_can_types: Dict[int, int] = {}
+        # 预编码的发送帧，按内容索引，最近最少使用的先淘汰
+        self.prepared_frames: OrderedDict[tuple, Any] = OrderedDict()
+        # 数据路径上的计数器与直方图，由 /metrics 以 Prometheus 文本格式输出
+        self.metrics = ManagerMetrics()
+        self._register_metric_callbacks()
+        # 流水线各阶段耗时的跟踪，未启用时为空
+        self.tracer: Optional[PipelineTracer] = None
         logger.info("初始化 ZLGCanManager 实例")
 
-    def register_motor(self, chn: int, motor_id: int, parse_func: Callable) -> None:
+    def _register_metric_callbacks(self) -> None:
+        """注册抓取时才从各组件读取的指标。"""
+        registry = self.metrics.registry
+
+        def topic_values(field: str) -> Callable[[], Dict[tuple, float]]:
+            def collect() -> Dict[tuple, float]:
+                values = {}
+                for (chn, motor_id), topic in list(self.hub.topics.items()):
+                    subscribers = list(topic.subscribers)
+                    if field == "published":
+                        value = topic.published
+                    elif field == "subscribers":
+                        value = len(subscribers)
+                    else:
+                        value = sum(queue.qsize() for queue in subscribers)
+                    values[(chn, motor_id)] = value
+                return values
+
+            return collect
+
+        registry.callback(
+            "zlg_published_items_total",
+            "发布给订阅者的解析结果条数",
+            ("chn", "motor_id"),
+            topic_values("published"),
+            type="counter",
+        )
+        registry.callback(
+            "zlg_subscribers",
+            "当前的订阅者数",
+            ("chn", "motor_id"),
+            topic_values("subscribers"),
+        )
+        registry.callback(
+            "zlg_queue_depth",
+            "所有订阅者队列中待取的数据条数",
+            ("chn", "motor_id"),
+            topic_values("depth"),
+        )
+        registry.callback(
+            "zlg_receive_pending_batches",
+            "接收线程已投递、尚未处理的批次数",
+            ("chn",),
+            lambda: {
+                (chn,): queue.qsize()
+                for chn, queue in list(self.receive_backlogs.items())
+            },
+        )
+        registry.callback(
+            "zlg_auto_send_missed_total",
+            "软件定时发送错过的周期数",
+            ("chn", "motor_id"),
+            lambda: {
+                (chn, motor_id): stats["missed"]
+                for chn, motors in self.get_auto_send_stats().items()
+                for motor_id, stats in motors.items()
+            },
+            type="counter",
+        )
+
+    async def run_in_executor(self, stage: str, func: Callable, *args) -> Any:
+        """在线程池中执行 func，并记录任务在线程池队列中等待的时间。"""
+        submitted = time.perf_counter()
+        executor_wait = self.metrics.executor_wait
+
+        def run():
+            executor_wait.observe(time.perf_counter() - submitted, (stage,))
+            return func(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, run)
+
+    def register_motor(
+        self,
+        chn: int,
+        motor_id: int,
+        parse_func: Callable,
+        queue_policy: Optional[str] = None,
+        queue_size: Optional[int] = None,
+    ) -> None:
         """
         注册电机。
 
         :param chn: 通道号。
         :param motor_id: 电机 ID。
         :param parse_func: 解析函数。
+        :param queue_policy: 订阅者队列的默认策略，drop_oldest 为有界队列、满时丢弃最旧项，
+            latest 只保留最新值，conflate 按报文类型只保留各自的最新值；
+            为空时使用实例的 queue_policy。
+        :param queue_size: 订阅者队列的默认容量，为空时使用实例的 queue_size。
         """
-        if chn not in self.queues:
+        if chn not in self.chn_handles:
             raise HTTPException(status_code=400, detail=f"通道 {chn} 未打开")
+        try:
+            self.hub.add_topic(
+                (chn, motor_id),
+                queue_policy or self.queue_policy,
+                queue_size if queue_size is not None else self.queue_size,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         self.parse_functions[chn][motor_id] = parse_func
-        self.queues[chn][motor_id] = asyncio.Queue()
         logger.info(f"注册解析函数：通道 {chn}, 电机 {motor_id}")
 
     def unregister_motor(self, chn: int, motor_id: int) -> None:
@@ -63,39 +274,122 @@ class ZLGCanManager:
         :param chn: 通道号。
         :param motor_id: 电机 ID。
         """
-        self.parse_functions[chn].pop(motor_id, None)
-        self.queues[chn].pop(motor_id, None)
+        self.parse_functions.get(chn, {}).pop(motor_id, None)
+        self.hub.remove_topic((chn, motor_id))
+        self.states.remove((chn, motor_id))
+        if self.history is not None:
+            self.history.remove((chn, motor_id))
         logger.info(f"注销解析函数：通道 {chn}, 电机 {motor_id}")
 
     async def open_device(
         self, device_type: ZCAN_DEVICE_TYPE, device_index: int
     ) -> StatusResponse:
         """
-        打开设备。
+        打开设备，可以同时打开多个设备。
 
         :param device_type: 设备类型。
         :param device_index: 设备索引。
-        :return: StatusResponse 对象。
+        :return: StatusResponse 对象，data 为设备信息，其中 channelBase 为该设备
+            0 号通道对应的管理器通道号。
         """
-        self.device_handle = self.zcan.OpenDevice(device_type, device_index, 0)
+        key = device_key(device_type, device_index)
+        device = self.devices.get(key)
+        if device is not None:
+            logger.warning(f"设备已打开：类型 {key[0]}, 索引 {key[1]}")
+            return StatusResponse(
+                status="info", message="设备已打开", data=device.to_dict()
+            )
+        slot = free_slot(self.devices)
+        if slot is None:
+            logger.error("打开的设备数量已达上限")
+            raise HTTPException(status_code=400, detail="打开的设备数量已达上限")
 
-        if self.device_handle == INVALID_DEVICE_HANDLE:
+        device_handle = self.zcan.OpenDevice(device_type, device_index, 0)
+        if device_handle == INVALID_DEVICE_HANDLE:
             logger.error("打开设备失败")
             raise HTTPException(status_code=500, detail="打开设备失败")
-        logger.info("打开设备成功")
-        return StatusResponse(status="success", message="打开设备成功")
+        device = self.devices[key] = OpenDevice(key, device_handle, slot)
+        logger.info(
+            f"打开设备成功：类型 {key[0]}, 索引 {key[1]}, 通道号起始 {device.channel_id(0)}"
+        )
+        return StatusResponse(
+            status="success", message="打开设备成功", data=device.to_dict()
+        )
+
+    def get_device(
+        self, device_type: Optional[int] = None, device_index: Optional[int] = None
+    ) -> OpenDevice:
+        """
+        取得已打开的设备，两者都为空时取最先打开的设备（slot 最小）。
+
+        :raises HTTPException: 设备未打开，或只给出了设备类型与设备索引中的一项。
+        """
+        if device_type is None and device_index is None:
+            if not self.devices:
+                logger.error("设备未打开")
+                raise HTTPException(status_code=400, detail="设备未打开")
+            return min(self.devices.values(), key=lambda device: device.slot)
+        if device_type is None or device_index is None:
+            raise HTTPException(
+                status_code=400, detail="设备类型与设备索引需要同时给出"
+            )
+        device = self.devices.get(device_key(device_type, device_index))
+        if device is None:
+            logger.error(f"设备未打开：类型 {device_type}, 索引 {device_index}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"设备未打开：类型 {device_type}, 索引 {device_index}",
+            )
+        return device
+
+    def list_devices(self) -> list[dict]:
+        return [
+            device.to_dict()
+            for device in sorted(self.devices.values(), key=lambda d: d.slot)
+        ]
+
+    def channel_id(
+        self,
+        chn: int,
+        device_type: Optional[int] = None,
+        device_index: Optional[int] = None,
+    ) -> int:
+        """
+        把 (设备, 设备通道号) 转换为管理器通道号。
 
-    async def get_device_info(self) -> StatusResponse:
+        :param chn: 给出设备时为设备通道号，否则即为管理器通道号，原样返回。
+        :param device_type: 设备类型。
+        :param device_index: 设备索引。
+        :raises HTTPException: 设备未打开或通道号超出范围。
+        """
+        if device_type is None and device_index is None:
+            return chn
+        if not 0 <= chn < CHANNELS_PER_DEVICE:
+            raise HTTPException(status_code=400, detail=f"无效的设备通道号：{chn}")
+        return self.get_device(device_type, device_index).channel_id(chn)
+
+    def _channel_device(self, chn: int) -> tuple[OpenDevice, int]:
+        """管理器通道号所属的设备及设备通道号。"""
+        slot, device_chn = divmod(chn, CHANNELS_PER_DEVICE)
+        for device in self.devices.values():
+            if device.slot == slot:
+                return device, device_chn
+        logger.error(f"通道 {chn} 所属的设备未打开")
+        raise HTTPException(status_code=400, detail=f"通道 {chn} 所属的设备未打开")
+
+    async def get_device_info(
+        self, device_type: Optional[int] = None, device_index: Optional[int] = None
+    ) -> StatusResponse:
         """
         获取设备信息。
 
+        :param device_type: 设备类型，与 device_index 都为空时取最先打开的设备。
+        :param device_index: 设备索引。
         :return: StatusResponse 对象，包含设备信息。
         """
-        if self.device_handle == INVALID_DEVICE_HANDLE:
-            logger.error("设备未打开")
-            raise HTTPException(status_code=400, detail="设备未打开")
+        device = self.get_device(device_type, device_index)
 
-        device_info = self.zcan.GetDeviceInf(self.device_handle)
+        device_info = self.zcan.GetDeviceInf(device.handle)
         if device_info is None:
             logger.error("获取设备信息失败")
             raise HTTPException(status_code=500, detail="获取设备信息失败")
@@ -110,6 +404,7 @@ class ZLGCanManager:
             "can_num": device_info.can_Num,
             "serial": "".join(map(chr, device_info.str_Serial_Num)).strip("\x00"),
             "hw_type": "".join(map(chr, device_info.str_hw_Type)).strip("\x00"),
+            **device.to_dict(),
         }
 
         logger.info("获取设备信息成功")
@@ -122,29 +417,48 @@ class ZLGCanManager:
         chn: int,
         baud_rate: str | int = "250000",
         can_type: c_uint = ZCAN_TYPE_CAN,
+        data_baud_rate: str | int = "2000000",
     ) -> StatusResponse:
         """
         打开通道。
 
-        :param chn: 通道号。
-        :param baud_rate: 波特率。
+        :param chn: 管理器通道号，设备的通道可以用 channel_id 换算。
+        :param baud_rate: 波特率，CANFD 时为仲裁域波特率。
         :param can_type: CAN 类型。
+        :param data_baud_rate: CANFD 数据域波特率，仅 CANFD 通道使用。
         :return: StatusResponse 对象。
         """
-        ret = self.zcan.ZCAN_SetValue(
-            self.device_handle, f"{chn}/baud_rate", str(baud_rate).encode("utf-8")
-        )
-        if ret != ZCAN_STATUS_OK:
-            logger.error(f"设置通道 {chn} 波特率失败")
-            raise HTTPException(status_code=500, detail=f"设置通道 {chn} 波特率失败")
+        device, device_chn = self._channel_device(chn)
+        can_type_value = getattr(can_type, "value", can_type)
+        if can_type_value == ZCAN_TYPE_CANFD.value:
+            baud_rates = {
+                f"{device_chn}/canfd_abit_baud_rate": baud_rate,
+                f"{device_chn}/canfd_dbit_baud_rate": data_baud_rate,
+            }
+        else:
+            baud_rates = {f"{device_chn}/baud_rate": baud_rate}
+        for path, value in baud_rates.items():
+            ret = self.zcan.ZCAN_SetValue(
+                device.handle, path, str(value).encode("utf-8")
+            )
+            if ret != ZCAN_STATUS_OK:
+                logger.error(f"设置通道 {chn} 波特率失败")
+                raise HTTPException(
+                    status_code=500, detail=f"设置通道 {chn} 波特率失败"
+                )
 
         chn_init_cfg = ZCAN_CHANNEL_INIT_CONFIG()
         chn_init_cfg.can_type = can_type
-        chn_init_cfg.config.can.acc_code = 0
-        chn_init_cfg.config.can.acc_mask = 0xFFFFFFFF
-        chn_init_cfg.config.can.mode = 0
+        if can_type_value == ZCAN_TYPE_CANFD.value:
+            chn_init_cfg.config.canfd.acc_code = 0
+            chn_init_cfg.config.canfd.acc_mask = 0xFFFFFFFF
+            chn_init_cfg.config.canfd.mode = 0
+        else:
+            chn_init_cfg.config.can.acc_code = 0
+            chn_init_cfg.config.can.acc_mask = 0xFFFFFFFF
+            chn_init_cfg.config.can.mode = 0
 
-        chh_handle = self.zcan.InitCAN(self.device_handle, chn, chn_init_cfg)
+        chh_handle = self.zcan.InitCAN(device.handle, device_chn, chn_init_cfg)
         if chh_handle == INVALID_DEVICE_HANDLE:
             logger.error(f"初始化通道 {chn} 失败")
             raise HTTPException(status_code=500, detail=f"初始化通道 {chn} 失败")
@@ -154,15 +468,114 @@ class ZLGCanManager:
             logger.error(f"启动通道 {chn} 失败")
             raise HTTPException(status_code=500, detail=f"启动通道 {chn} 失败")
         self.chn_handles[chn] = chh_handle
+        self.chn_can_types[chn] = can_type_value
+        device.channels[device_chn] = chn
+        self.parse_functions.setdefault(chn, {})
+        if chn not in self.schedulers:
+            self.schedulers[chn] = PeriodicScheduler(
+                f"通道 {chn}",
+                self.auto_send_policy,
+                dispatch=functools.partial(self.transmit_periodic, chn),
+            )
         logger.info(f"通道 {chn} 启动成功")
         return StatusResponse(status="success", message=f"通道 {chn} 启动成功")
 
+    @staticmethod
+    def build_transmit_frames(
+        datas: Dict[int, list[int]],
+        eff: int = 0,
+        transmit_type: int = 0,
+        fd: bool = False,
+        brs: int = 0,
+    ) -> Any:
+        """
+        把待发送数据编码为 ZCAN_Transmit_Data（fd 时为 ZCAN_TransmitFD_Data）数组。
+
+        CANFD 帧长度不是合法 DLC 长度时补零到下一个合法长度。
+        """
+        transmit_num = len(datas)
+        msgs = ((ZCAN_TransmitFD_Data if fd else ZCAN_Transmit_Data) * transmit_num)()
+        for i, (msg_id, data) in enumerate(datas.items()):
+            msgs[i].transmit_type = transmit_type
+            msgs[i].frame.can_id = msg_id
+            msgs[i].frame.eff = eff
+            if fd:
+                msgs[i].frame.len = next(
+                    length for length in CANFD_LENGTHS if length >= len(data)
+                )
+                msgs[i].frame.brs = brs
+            else:
+                msgs[i].frame.can_dlc = len(data)
+
+            for j, byte in enumerate(data):
+                msgs[i].frame.data[j] = byte
+        return msgs
+
+    def prepare_frames(
+        self,
+        datas: Dict[int, list[int]],
+        eff: int = 0,
+        transmit_type: int = 0,
+        fd: bool = False,
+        brs: int = 0,
+    ) -> Any:
+        """
+        取得预编码的发送帧数组，内容相同时复用缓存中的数组，不再逐字节编码。
+
+        返回的数组由多次发送共享，调用方不能修改。参数同 build_transmit_frames。
+        """
+        key = (
+            tuple((msg_id, tuple(data)) for msg_id, data in datas.items()),
+            eff,
+            transmit_type,
+            fd,
+            brs,
+        )
+        msgs = self.prepared_frames.get(key)
+        if msgs is not None:
+            self.prepared_frames.move_to_end(key)
+            return msgs
+        msgs = self.build_transmit_frames(datas, eff, transmit_type, fd, brs)
+        self.prepared_frames[key] = msgs
+        if len(self.prepared_frames) > PREPARED_FRAME_CACHE_SIZE:
+            self.prepared_frames.popitem(last=False)
+        return msgs
+
+    async def transmit_frames(self, chn: int, msgs: Any) -> int:
+        """
+        发送预编码的帧数组（prepare_frames / build_transmit_frames 的返回值）。
+
+        :param chn: 通道号。
+        :param msgs: ZCAN_Transmit_Data 或 ZCAN_TransmitFD_Data 数组。
+        :return: 实际发送的帧数。
+        """
+        fd = msgs._type_ is ZCAN_TransmitFD_Data
+        ret = await self.run_in_executor(
+            "transmit",
+            self.metrics.call_dll,
+            "TransmitFD" if fd else "Transmit",
+            self.zcan.TransmitFD if fd else self.zcan.Transmit,
+            self.chn_handles.get(chn),
+            msgs,
+            len(msgs),
+        )
+        if ret:
+            self.metrics.transmit_frames.inc((chn,), ret)
+        if ret != len(msgs):
+            self.metrics.transmit_failures.inc((chn,))
+        recorder = self.recorder
+        if recorder is not None and ret:
+            recorder.record(chn, msgs, ret, TX)
+        return ret
+
     async def send_message(
         self,
         chn: int,
         datas: Dict[int, list[int]],
         eff: int = 0,
         transmit_type: int = 0,
+        fd: bool = False,
+        brs: int = 0,
     ) -> StatusResponse:
         """
         发送消息。
@@ -171,28 +584,14 @@ class ZLGCanManager:
         :param datas: 发送的数据，key 为 ID，value 为数据列表。
         :param eff: 是否为扩展帧，0 为标准帧，1 为扩展帧。
         :param transmit_type: 发送类型，0 为正常发送，1 为单次发送，2 为自发自收。
+        :param fd: 是否以 CANFD 帧发送，数据最长 64 字节。
+        :param brs: CANFD 帧是否启用数据域加速。
         :return: StatusResponse 对象。
         """
         try:
             transmit_num = len(datas)
-            msgs = (ZCAN_Transmit_Data * transmit_num)()
-            for i, (msg_id, data) in enumerate(datas.items()):
-                msgs[i].transmit_type = transmit_type
-                msgs[i].frame.can_id = msg_id
-                msgs[i].frame.can_dlc = len(data)
-                msgs[i].frame.eff = eff
-
-                for j, byte in enumerate(data):
-                    msgs[i].frame.data[j] = byte
-
-            loop = asyncio.get_running_loop()
-            ret = await loop.run_in_executor(
-                self.executor,
-                self.zcan.Transmit,
-                self.chn_handles.get(chn),
-                msgs,
-                transmit_num,
-            )
+            msgs = self.prepare_frames(datas, eff, transmit_type, fd, brs)
+            ret = await self.transmit_frames(chn, msgs)
 
             if ret != transmit_num:
                 logger.error("发送失败")
@@ -203,6 +602,49 @@ class ZLGCanManager:
             logger.error(f"发送消息时出现错误：{e}")
             raise HTTPException(status_code=500, detail=f"发送失败：{e}")
 
+    async def transmit_periodic(self, chn: int, entries: list) -> None:
+        """
+        发送通道上同一时刻到期的全部周期报文。
+
+        各条目预先编码好的帧拷贝进一个连续数组，经典帧与 CANFD 帧各一次 Transmit，
+        每个周期的线程池调用次数与电机数量无关。
+
+        :param chn: 通道号。
+        :param entries: 到期的调度条目，payload 为 prepare_frames 的返回值。
+        """
+        self.metrics.auto_send_ticks.inc((chn,))
+        groups: Dict[bool, list] = {}
+        for entry in entries:
+            fd = entry.payload._type_ is ZCAN_TransmitFD_Data
+            groups.setdefault(fd, []).append(entry.payload)
+        for fd, payloads in groups.items():
+            if len(payloads) == 1:
+                msgs = payloads[0]
+            else:
+                msgs = (
+                    (ZCAN_TransmitFD_Data if fd else ZCAN_Transmit_Data)
+                    * sum(len(payload) for payload in payloads)
+                )()
+                offset = 0
+                for payload in payloads:
+                    memmove(byref(msgs, offset), payload, sizeof(payload))
+                    offset += sizeof(payload)
+            self.metrics.auto_send_frames.inc((chn,), len(msgs))
+            ret = await self.transmit_frames(chn, msgs)
+            if ret != len(msgs):
+                raise RuntimeError(f"周期发送失败：{ret}/{len(msgs)}")
+
+    def check_auto_send_interval(self, interval: int) -> None:
+        """
+        检查自动发送的周期。
+
+        :param interval: 发送间隔（毫秒）。
+        :raises HTTPException: 周期不是正数。
+        """
+        if interval <= 0:
+            logger.error(f"自动发送周期无效：{interval}")
+            raise HTTPException(status_code=400, detail=f"发送间隔必须为正数：{interval}")
+
     def can_start_auto_send(self, chn: int, motor_id: int) -> None:
         """
         检查是否可以启动自动发送任务。
@@ -212,13 +654,37 @@ class ZLGCanManager:
         :raises HTTPException: 如果任务已在运行或通道未打开。
         """
         # 判断当前电机是否已经在运行自动发送任务
-        if chn in self.auto_send_tasks and motor_id in self.auto_send_tasks[chn]:
+        if self.is_auto_sending(chn, motor_id):
             logger.warning(f"自动发送任务已经在运行：通道 {chn}, 电机 {motor_id}")
             raise HTTPException(status_code=400, detail="自动发送任务已经在运行")
         if chn not in self.chn_handles:
             logger.error(f"通道 {chn} 未打开")
             raise HTTPException(status_code=400, detail=f"通道 {chn} 未打开")
 
+    def auto_send_motors(self, chn: int) -> list[int]:
+        """通道上正在自动发送的电机（软件与硬件定时发送）。"""
+        scheduler = self.schedulers.get(chn)
+        return list(scheduler.entries if scheduler else {}) + list(
+            self.hardware_auto_sends.get(chn, {})
+        )
+
+    def is_auto_sending(self, chn: int, motor_id: int) -> bool:
+        return motor_id in self.auto_send_motors(chn)
+
+    def get_auto_send_stats(self, chn: Optional[int] = None) -> Dict[int, dict]:
+        """
+        软件定时发送的周期统计。
+
+        :param chn: 通道号，为空时返回所有通道。
+        :return: {通道号: {电机 ID: 统计}}，统计项见 PeriodicStats.snapshot。
+        """
+        channels = self.schedulers if chn is None else {chn: self.schedulers.get(chn)}
+        return {
+            chn: scheduler.stats()
+            for chn, scheduler in channels.items()
+            if scheduler is not None
+        }
+
     def can_start_receive(self, chn: int) -> None:
         """
         检查是否可以启动接收任务。
@@ -238,6 +704,9 @@ class ZLGCanManager:
         eff: int = 1,
         transmit_type: int = 0,
         interval: int = 10,
+        fd: bool = False,
+        brs: int = 0,
+        hardware: Optional[bool] = None,
     ) -> None:
         """
         启动自动定时发送消息。
@@ -248,37 +717,200 @@ class ZLGCanManager:
         :param eff: 扩展帧标志。
         :param transmit_type: 发送类型。
         :param interval: 发送间隔（毫秒）。
+        :param fd: 是否以 CANFD 帧发送。
+        :param brs: CANFD 帧是否启用数据域加速。
+        :param hardware: 是否写入设备的硬件定时发送列表，由设备按周期发送，
+            为空时使用实例的 hardware_auto_send；设备不支持时改用软件定时发送。
+        :raises HTTPException: 通道未打开、该电机已在自动发送或周期不是正数。
         """
-
-        async def auto_send_loop():
+        self.check_auto_send_interval(interval)
+        self.can_start_auto_send(chn, motor_id)
+        if self.hardware_auto_send if hardware is None else hardware:
+            msgs = self.prepare_frames(datas, eff, transmit_type, fd, brs)
+            indices = self._allocate_auto_send_indices(chn, len(datas))
+            self.hardware_auto_sends.setdefault(chn, {})[motor_id] = {
+                "indices": indices,
+                "msgs": msgs,
+                "interval": interval,
+                "fd": fd,
+            }
             try:
-                while True:
-                    await self.send_message(chn, datas, eff, transmit_type)
-                    await asyncio.sleep(interval / 1000)
-            except asyncio.CancelledError:
-                logger.info(f"自动发送任务已取消：通道 {chn}")
-            except Exception as e:
-                logger.error(f"自动发送任务错误：{e}")
+                self._apply_hardware_auto_send(chn)
+            except HTTPException as e:
+                self.hardware_auto_sends[chn].pop(motor_id, None)
+                self._restore_hardware_auto_send(chn)
+                logger.warning(
+                    f"硬件定时发送不可用（{e.detail}），改用软件定时发送："
+                    f"通道 {chn}, 电机 {motor_id}"
+                )
+            else:
+                logger.info(f"硬件定时发送已启动：通道 {chn}, 电机 {motor_id}")
+                return
 
-        task = asyncio.create_task(auto_send_loop())
-        self.auto_send_tasks[chn][motor_id] = task
+        self.schedulers[chn].add(
+            motor_id,
+            interval,
+            payload=self.prepare_frames(datas, eff, transmit_type, fd, brs),
+        )
         logger.info(f"自动发送任务已启动：通道 {chn}")
 
+    async def update_auto_send_message(
+        self,
+        chn: int,
+        motor_id: int,
+        datas: Dict[int, list[int]],
+        eff: int = 1,
+        transmit_type: int = 0,
+        interval: int = 10,
+        fd: bool = False,
+        brs: int = 0,
+    ) -> StatusResponse:
+        """
+        更新正在运行的自动发送任务的数据或周期，沿用原来的发送方式。
+
+        硬件定时发送直接改写设备中的发送列表，软件定时发送替换调度器中的条目，
+        两者都不会中断周期；任务未在运行时按实例的 hardware_auto_send 启动。
+        参数同 start_auto_send_message。
+        """
+        self.check_auto_send_interval(interval)
+        hardware = motor_id in self.hardware_auto_sends.get(chn, {})
+        scheduler = self.schedulers.get(chn)
+        if not hardware and scheduler is not None and motor_id in scheduler:
+            scheduler.update(
+                motor_id,
+                interval,
+                payload=self.prepare_frames(
+                    datas, eff, transmit_type, fd, brs
+                ),
+            )
+            return StatusResponse(status="success", message="自动发送任务已更新")
+        if not hardware:
+            await self.start_auto_send_message(
+                chn,
+                motor_id,
+                datas,
+                eff,
+                transmit_type,
+                interval,
+                fd,
+                brs,
+                self.hardware_auto_send,
+            )
+            return StatusResponse(status="success", message="自动发送任务已更新")
+
+        entries = self.hardware_auto_sends[chn]
+        # 旧条目在新条目生效前一直保留，失败时放回并恢复设备中的发送列表
+        entry = entries[motor_id]
+        msgs = self.prepare_frames(datas, eff, transmit_type, fd, brs)
+        try:
+            if len(entry["indices"]) == len(datas):
+                entries[motor_id] = {
+                    "indices": entry["indices"],
+                    "msgs": msgs,
+                    "interval": interval,
+                    "fd": fd,
+                }
+                self._apply_hardware_auto_send(chn)
+            else:
+                # 帧数变化时释放原来的索引重新分配
+                del entries[motor_id]
+                indices = self._allocate_auto_send_indices(chn, len(datas))
+                entries[motor_id] = {
+                    "indices": indices,
+                    "msgs": msgs,
+                    "interval": interval,
+                    "fd": fd,
+                }
+                self._apply_hardware_auto_send(chn)
+        except Exception:
+            entries[motor_id] = entry
+            self._restore_hardware_auto_send(chn)
+            raise
+        return StatusResponse(status="success", message="自动发送任务已更新")
+
+    def _allocate_auto_send_indices(self, chn: int, count: int) -> list[int]:
+        """为硬件定时发送分配空闲的列表索引。"""
+        used = {
+            index
+            for entry in self.hardware_auto_sends.get(chn, {}).values()
+            for index in entry["indices"]
+        }
+        free = [i for i in range(HARDWARE_AUTO_SEND_SLOTS) if i not in used]
+        if len(free) < count:
+            logger.error(f"通道 {chn} 硬件定时发送列表已满")
+            raise HTTPException(
+                status_code=400, detail=f"通道 {chn} 硬件定时发送列表已满"
+            )
+        return free[:count]
+
+    def _restore_hardware_auto_send(self, chn: int) -> None:
+        """失败后按 hardware_auto_sends 重新写入设备的发送列表，尽量与记录保持一致。"""
+        if not self.hardware_auto_sends.get(chn):
+            return
+        try:
+            self._apply_hardware_auto_send(chn)
+        except HTTPException as e:
+            logger.error(f"恢复通道 {chn} 定时发送列表失败：{e.detail}")
+
+    def _apply_hardware_auto_send(self, chn: int) -> None:
+        """
+        清空通道的硬件定时发送列表，按 hardware_auto_sends 重新写入并生效。
+        """
+        device, device_chn = self._channel_device(chn)
+        ret = self.zcan.ZCAN_SetValue(
+            device.handle, f"{device_chn}/clear_auto_send", b"0"
+        )
+        if ret != ZCAN_STATUS_OK:
+            logger.error(f"清空通道 {chn} 定时发送列表失败")
+            raise HTTPException(
+                status_code=500, detail=f"清空通道 {chn} 定时发送列表失败"
+            )
+        for entry in self.hardware_auto_sends.get(chn, {}).values():
+            fd = entry["fd"]
+            path = (
+                f"{device_chn}/auto_send_canfd" if fd else f"{device_chn}/auto_send"
+            )
+            for index, msg in zip(entry["indices"], entry["msgs"]):
+                obj = ZCANFD_AUTO_TRANSMIT_OBJ() if fd else ZCAN_AUTO_TRANSMIT_OBJ()
+                obj.enable = 1
+                obj.index = index
+                obj.interval = entry["interval"]
+                obj.obj = msg
+                ret = self.zcan.ZCAN_SetValue(device.handle, path, byref(obj))
+                if ret != ZCAN_STATUS_OK:
+                    logger.error(f"设置通道 {chn} 定时发送失败")
+                    raise HTTPException(
+                        status_code=500, detail=f"设置通道 {chn} 定时发送失败"
+                    )
+        ret = self.zcan.ZCAN_SetValue(
+            device.handle, f"{device_chn}/apply_auto_send", b"0"
+        )
+        if ret != ZCAN_STATUS_OK:
+            logger.error(f"启动通道 {chn} 定时发送失败")
+            raise HTTPException(
+                status_code=500, detail=f"启动通道 {chn} 定时发送失败"
+            )
+
     async def stop_auto_send_message(self, chn: int, motor_id: int) -> StatusResponse:
-        task = self.auto_send_tasks.get(chn, {}).get(motor_id)
-        if task:
-            task.cancel()
+        if motor_id in self.hardware_auto_sends.get(chn, {}):
+            # 设备中的发送列表更新成功后才丢弃记录，失败时放回，设备可能仍在发送
+            entry = self.hardware_auto_sends[chn].pop(motor_id)
             try:
-                await task
-            except asyncio.CancelledError:
-                logger.info(f"自动发送任务已停止：通道 {chn}, 电机 {motor_id}")
-            except Exception as e:
-                logger.error(f"停止自动发送任务时出现错误：{e}")
+                self._apply_hardware_auto_send(chn)
+            except HTTPException as e:
+                self.hardware_auto_sends[chn][motor_id] = entry
+                self._restore_hardware_auto_send(chn)
                 return StatusResponse(
-                    status="error", message=f"停止自动发送任务时出现错误：{e}"
+                    status="error", message=f"停止硬件定时发送时出现错误：{e.detail}"
                 )
-            finally:
-                del self.auto_send_tasks[chn]
+            logger.info(f"硬件定时发送已停止：通道 {chn}, 电机 {motor_id}")
+            return StatusResponse(
+                status="success",
+                message=f"自动发送任务已停止：通道 {chn}, 电机 {motor_id}",
+            )
+        scheduler = self.schedulers.get(chn)
+        if scheduler is not None and scheduler.remove(motor_id) is not None:
+            logger.info(f"自动发送任务已停止：通道 {chn}, 电机 {motor_id}")
             return StatusResponse(
                 status="success",
                 message=f"自动发送任务已停止：通道 {chn}, 电机 {motor_id}",
@@ -290,41 +922,144 @@ class ZLGCanManager:
                 message=f"通道 {chn}, 电机 {motor_id} 没有正在运行的自动发送任务",
             )
 
-    async def start_receive_message(self, chn: int) -> None:
+    async def start_receive_message(self, chn: int, mode: Optional[str] = None) -> None:
         """
         启动接收消息任务。
 
         :param chn: 通道号。
+        :param mode: 接收模式，thread 为独立线程阻塞接收，poll 为定时轮询；
+            为空时使用实例的 receive_mode。
         """
+        mode = mode or self.receive_mode
+
+        # CANFD 通道上经典帧与 FD 帧分别由 Receive / ReceiveFD 读取
+        fd_kinds = [False, True] if self.is_canfd_channel(chn) else [False]
 
         async def receive_loop():
             try:
                 while True:
-                    loop = asyncio.get_running_loop()
-                    rcv_num = await loop.run_in_executor(
-                        self.executor,
-                        self.zcan.GetReceiveNum,
-                        self.chn_handles.get(chn),
-                        ZCAN_TYPE_CAN,
-                    )
-                    if rcv_num:
-                        rcv_msg, rcv_num = await loop.run_in_executor(
-                            self.executor,
-                            self.zcan.Receive,
+                    backlog = False
+                    for fd in fd_kinds:
+                        pool = self.receive_buffer_pool(chn, fd)
+                        rcv_num = await self.run_in_executor(
+                            "receive",
+                            self.metrics.call_dll,
+                            "GetReceiveNum",
+                            self.zcan.GetReceiveNum,
                             self.chn_handles.get(chn),
-                            rcv_num,
+                            ZCAN_TYPE_CANFD if fd else ZCAN_TYPE_CAN,
                         )
-                        for i in range(rcv_num):
-                            await self.handle_can_data(chn, rcv_msg[i])
-                    await asyncio.sleep(0.5)
+                        if not rcv_num:
+                            continue
+                        rcv_msg = pool.acquire()
+                        try:
+                            rcv_num = await self.run_in_executor(
+                                "receive",
+                                self.metrics.call_dll,
+                                "ReceiveFD" if fd else "Receive",
+                                self.zcan.ReceiveFDInto if fd else self.zcan.ReceiveInto,
+                                self.chn_handles.get(chn),
+                                rcv_msg,
+                                rcv_num,
+                            )
+                            self.metrics.receive_batch_size.observe(rcv_num, (chn,))
+                            await self.handle_can_data(
+                                chn, rcv_msg, rcv_num, self.trace_stamp()
+                            )
+                        finally:
+                            pool.release(rcv_msg)
+                        # 缓冲区读满说明设备中仍有积压，不等待直接继续读取
+                        backlog = backlog or rcv_num >= pool.capacity
+                    if not backlog:
+                        await asyncio.sleep(self.receive_poll_interval)
             except asyncio.CancelledError:
                 logger.info(f"接收任务已取消：通道 {chn}")
             except Exception as e:
                 logger.error(f"接收任务错误：{e}")
 
-        task = asyncio.create_task(receive_loop())
+        async def receive_thread_loop():
+            loop = asyncio.get_running_loop()
+            # 接收线程只负责把批次投递到事件循环，处理顺序由本任务保证；
+            # 待处理的批次最多 receive_max_pending 个，处理跟不上时接收线程暂停读取
+            # 接收线程异常退出时投递的是异常对象，本任务随之结束
+            batches: asyncio.Queue = asyncio.Queue()
+            slots = threading.Semaphore(self.receive_max_pending)
+            self.receive_backlogs[chn] = batches
+            workers = [
+                ReceiveWorker(
+                    self.zcan,
+                    chn,
+                    self.chn_handles.get(chn),
+                    loop,
+                    batches.put_nowait,
+                    self.receive_buffer_pool(chn, fd),
+                    self.receive_wait_time,
+                    # decode_inline 时在接收线程内解析，投递的是解析结果而非帧数组
+                    decode=(
+                        functools.partial(self.decode_batch, chn)
+                        if self.decode_inline
+                        else None
+                    ),
+                    fd=fd,
+                    metrics=self.metrics,
+                    stamp=self.trace_stamp,
+                    slots=slots,
+                    on_error=batches.put_nowait,
+                )
+                for fd in fd_kinds
+            ]
+            for worker in workers:
+                worker.start()
+            try:
+                while True:
+                    batch = await batches.get()
+                    if isinstance(batch, Exception):
+                        raise batch
+                    try:
+                        if self.decode_inline:
+                            self.publish_results(chn, batch)
+                            continue
+                        rcv_msg, rcv_num, received_at = batch
+                        try:
+                            await self.handle_can_data(
+                                chn, rcv_msg, rcv_num, received_at
+                            )
+                        finally:
+                            self.release_receive_buffer(chn, rcv_msg)
+                    finally:
+                        slots.release()
+            except asyncio.CancelledError:
+                logger.info(f"接收任务已取消：通道 {chn}")
+            except Exception as e:
+                logger.error(f"接收任务错误：{e}")
+            finally:
+                for worker in workers:
+                    worker.stop()
+                for worker in workers:
+                    await loop.run_in_executor(self.executor, worker.join)
+                if self.receive_backlogs.get(chn) is batches:
+                    del self.receive_backlogs[chn]
+                while not batches.empty():
+                    batch = batches.get_nowait()
+                    if not self.decode_inline and not isinstance(batch, Exception):
+                        self.release_receive_buffer(chn, batch[0])
+
+        match mode:
+            case "thread":
+                task = asyncio.create_task(receive_thread_loop())
+            case "poll":
+                task = asyncio.create_task(receive_loop())
+            case _:
+                raise HTTPException(status_code=400, detail=f"未知的接收模式：{mode}")
         self.receive_tasks[chn] = task
-        logger.info(f"接收任务已启动：通道 {chn}")
+
+        def forget_task(task: asyncio.Task) -> None:
+            # 任务因错误结束时不再视为正在接收
+            if self.receive_tasks.get(chn) is task:
+                del self.receive_tasks[chn]
+
+        task.add_done_callback(forget_task)
+        logger.info(f"接收任务已启动：通道 {chn}, 模式 {mode}")
 
     async def stop_receive_message(self, chn: int) -> StatusResponse:
         """
@@ -343,7 +1078,7 @@ class ZLGCanManager:
             except Exception as e:
                 logger.error(f"停止接收任务时出现错误：{e}")
             finally:
-                del self.receive_tasks[chn]
+                self.receive_tasks.pop(chn, None)
             return StatusResponse(
                 status="success", message=f"接收任务已停止：通道 {chn}"
             )
@@ -353,64 +1088,625 @@ class ZLGCanManager:
                 status="info", message=f"通道 {chn} 没有正在运行的接收任务"
             )
 
-    async def handle_can_data(self, chn: int, message: ZCAN_Receive_Data) -> None:
+    def is_canfd_channel(self, chn: int) -> bool:
+        return self.chn_can_types.get(chn) == ZCAN_TYPE_CANFD.value
+
+    def receive_buffer_pool(self, chn: int, fd: bool) -> ReceiveBufferPool:
         """
-        处理接收到的 CAN 数据。
+        通道的 CAN 或 CANFD 接收缓冲区池，首次使用时创建。
+
+        接收线程自身占用一个缓冲区，另有至多 receive_max_pending 个批次等待处理，
+        池内保留 receive_max_pending + 1 个缓冲区，满负荷时也无需临时分配。
+        """
+        pool = self.receive_buffer_pools.get((chn, fd))
+        if pool is None:
+            pool = self.zcan.CreateReceiveBufferPool(
+                self.receive_batch_size, count=self.receive_max_pending + 1, fd=fd
+            )
+            self.receive_buffer_pools[(chn, fd)] = pool
+        return pool
+
+    def release_receive_buffer(self, chn: int, msgs: Any) -> None:
+        """把接收缓冲区归还给通道对应的（CAN 或 CANFD）缓冲区池。"""
+        self.receive_buffer_pool(chn, msgs._type_ is ZCAN_ReceiveFD_Data).release(msgs)
+
+    def decode_batch(
+        self, chn: int, msgs: Any, count: int, record: bool = True
+    ) -> Dict[int, list]:
+        """
+        解析一批 CAN 帧，并按电机分组。
 
         :param chn: 通道号。
-        :param message: 接收到的消息。
+        :param msgs: 接收到的帧数组（CAN 或 CANFD）。
+        :param count: 有效帧数。
+        :param record: 正在记录时是否写入帧记录，回放的帧为 False。
+        :return: {motor_id: [解析结果, ...]}，保持帧的接收顺序。
+        """
+        start = time.perf_counter()
+        recorder = self.recorder
+        if recorder is not None and record:
+            recorder.record(chn, msgs, count)
+        if self.decode_mode == "columns":
+            results = self.decode_batch_columns(chn, msgs, count)
+            self.metrics.decode_seconds.observe(time.perf_counter() - start, (chn,))
+            return results
+        parse_functions = self.parse_functions.get(chn, {})
+        results: Dict[int, list] = {}
+        id_counts: Dict[int, int] = {}
+        errors = 0
+        for i in range(count):
+            message = msgs[i]
+            can_id = message.frame.can_id
+            id_counts[can_id] = id_counts.get(can_id, 0) + 1
+            motor_id = (can_id >> 16) & 0xFF
+            parse_func = parse_functions.get(motor_id)
+            if not parse_func:
+                continue
+            try:
+                result = parse_func(message)
+            except Exception as e:
+                logger.error(f"解析 CAN 数据时出现错误：{e}")
+                errors += 1
+                continue
+            if "error" in result:
+                errors += 1
+            if motor_id in results:
+                results[motor_id].append(result)
+            else:
+                results[motor_id] = [result]
+        metrics = self.metrics
+        for can_id, n in id_counts.items():
+            metrics.frames_received.inc((chn, f"0x{can_id:08X}"), n)
+        if errors:
+            metrics.decode_errors.inc((chn,), errors)
+        metrics.decode_seconds.observe(time.perf_counter() - start, (chn,))
+        return results
+
+    def decode_batch_columns(
+        self, chn: int, msgs: Any, count: int
+    ) -> Dict[int, list]:
+        """
+        列式解码一批 CAN 帧，并按电机分组。
+
+        :param chn: 通道号。
+        :param msgs: 接收到的帧数组（CAN 或 CANFD）。
+        :param count: 有效帧数。
+        :return: {motor_id: [{"canId": ID, "timestamp": [...], 信号名: [...]}, ...]}。
+        """
+        registered = self.parse_functions.get(chn, {})
+        results: Dict[int, list] = {}
+        fd = msgs._type_ is ZCAN_ReceiveFD_Data
+        columns_by_id = decode_columns(msgs, count, fd=fd, labels=True)
+        for can_id, n in count_ids(msgs, count, fd=fd).items():
+            self.metrics.frames_received.inc((chn, f"0x{can_id:08X}"), n)
+        for can_id, columns in columns_by_id.items():
+            motor_id = (can_id >> 16) & 0xFF
+            if motor_id not in registered:
+                continue
+            item = {"canId": can_id}
+            for name, column in columns.items():
+                item[name] = column.tolist()
+            results.setdefault(motor_id, []).append(item)
+        return results
+
+    def publish_results(self, chn: int, results: Dict[int, list]) -> None:
+        """
+        用一批解析结果更新各电机的最新状态与历史，并发布给所有订阅者。
+
+        :param chn: 通道号。
+        :param results: decode_batch 的返回值。
+        """
+        for motor_id, items in results.items():
+            self.states.update((chn, motor_id), items)
+            if self.history is not None:
+                self.history.update((chn, motor_id), items)
+            self.hub.publish((chn, motor_id), items)
+
+    def trace_stamp(self) -> Optional[float]:
+        """启用跟踪时返回当前时刻（perf_counter 秒），否则返回 None。"""
+        return time.perf_counter() if self.tracer is not None else None
+
+    def _decode_batch_timed(
+        self, chn: int, msgs: Any, count: int, record: bool = True
+    ) -> tuple:
+        start = time.perf_counter()
+        results = self.decode_batch(chn, msgs, count, record)
+        return start, results, time.perf_counter()
+
+    async def _handle_can_data_traced(
+        self,
+        tracer: PipelineTracer,
+        chn: int,
+        msgs: Any,
+        count: int,
+        received_at: Optional[float],
+        record: bool = True,
+    ) -> None:
+        received = time.perf_counter() if received_at is None else received_at
+        if self.decode_inline:
+            decode_start, results, decode_end = self._decode_batch_timed(
+                chn, msgs, count, record
+            )
+        else:
+            decode_start, results, decode_end = await self.run_in_executor(
+                "decode", self._decode_batch_timed, chn, msgs, count, record
+            )
+        publish_start = time.perf_counter()
+        self.publish_results(chn, results)
+        published = time.perf_counter()
+        tracer.record_batch(
+            count, received, decode_start, decode_end, publish_start, published
+        )
+        for items in results.values():
+            tracer.tag(items, received, published)
+
+    async def handle_can_data(
+        self,
+        chn: int,
+        msgs: Any,
+        count: int,
+        received_at: Optional[float] = None,
+        record: bool = True,
+    ) -> None:
+        """
+        处理接收到的一批 CAN 数据。
+
+        整批帧在一次线程池调用中解析（decode_inline 时直接在当前线程解析），
+        然后批量投递到队列。
+
+        :param chn: 通道号。
+        :param msgs: 接收到的帧数组。
+        :param count: 有效帧数。
+        :param received_at: Receive 返回的时刻（perf_counter 秒），仅启用跟踪时使用，
+            为空时以调用时刻为准。
+        :param record: 正在记录时是否写入帧记录，回放的帧为 False，以免被重复记录。
         """
-        motor_id = (message.frame.can_id >> 16) & 0xFF
-        parse_func = self.parse_functions.get(chn, {}).get(motor_id)
-        if not parse_func:
-            return
         try:
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(self.executor, parse_func, message)
-            queue = self.queues.get(chn, {}).get(motor_id)
-            if queue:
-                await queue.put(result)
+            tracer = self.tracer
+            if tracer is not None:
+                await self._handle_can_data_traced(
+                    tracer, chn, msgs, count, received_at, record
+                )
+                return
+            if self.decode_inline:
+                results = self.decode_batch(chn, msgs, count, record)
+            else:
+                results = await self.run_in_executor(
+                    "decode", self.decode_batch, chn, msgs, count, record
+                )
+            self.publish_results(chn, results)
         except Exception as e:
             logger.error(f"处理 CAN 数据时出现错误：{e}")
 
+    async def _stop_channel_tasks(self, chn: int) -> None:
+        """停止通道上的定时发送、接收任务与调度器。"""
+        for motor_id in self.auto_send_motors(chn):
+            await self.stop_auto_send_message(chn, motor_id)
+        if chn in self.receive_tasks:
+            await self.stop_receive_message(chn)
+        if chn in self.schedulers:
+            await self.schedulers.pop(chn).close()
+
+    def _forget_channel(self, chn: int) -> None:
+        """
+        清除已关闭通道的全部记录，以后打开到同一 slot 的设备不会沿用
+        旧的解析函数、状态与历史。
+        """
+        self.chn_handles.pop(chn, None)
+        self.chn_can_types.pop(chn, None)
+        self.hardware_auto_sends.pop(chn, None)
+        self.parse_functions.pop(chn, None)
+        for key in [key for key in self.hub.topics if key[0] == chn]:
+            self.hub.remove_topic(key)
+        for key in [key for key in self.states.states if key[0] == chn]:
+            self.states.remove(key)
+        if self.history is not None:
+            for key in [key for key in self.history.rings if key[0] == chn]:
+                self.history.remove(key)
+
     async def close_channel(self, chn: int) -> StatusResponse:
         if chn not in self.chn_handles:
             logger.warning(f"通道 {chn} 未打开")
             raise HTTPException(status_code=400, detail=f"通道 {chn} 未打开")
 
         # 关闭所有的任务
-        if chn in self.auto_send_tasks:
-            for motor_id in list(self.auto_send_tasks[chn].keys()):
-                await self.stop_auto_send_message(chn, motor_id)
-        await self.stop_receive_message(chn)
+        await self._stop_channel_tasks(chn)
 
         ret = self.zcan.ResetCAN(self.chn_handles.get(chn))
         if ret == 1:
-            del self.chn_handles[chn]
-            self.queues.pop(chn, None)
+            self._forget_channel(chn)
+            device, device_chn = self._channel_device(chn)
+            device.channels.pop(device_chn, None)
             logger.info(f"通道已关闭：{chn}")
             return StatusResponse(status="success", message=f"通道已关闭：{chn}")
         else:
             logger.error(f"关闭通道失败：{chn}")
             raise HTTPException(status_code=500, detail=f"关闭通道失败：{chn}")
 
-    async def close_device(self) -> StatusResponse:
-        for chn in list(self.auto_send_tasks.keys()):
-            for motor_id in list(self.auto_send_tasks[chn].keys()):
-                await self.stop_auto_send_message(chn, motor_id)
-        for chn in list(self.receive_tasks.keys()):
-            await self.stop_receive_message(chn)
+    async def close_device(
+        self, device_type: Optional[int] = None, device_index: Optional[int] = None
+    ) -> StatusResponse:
+        """
+        关闭设备及其所有通道。
 
-        ret = self.zcan.CloseDevice(self.device_handle)
-        if ret == 1:
-            self.device_handle = INVALID_DEVICE_HANDLE
-            self.chn_handles.clear()
-            self.queues.clear()
-            logger.info("设备已关闭")
-            return StatusResponse(status="success", message="设备已关闭")
+        :param device_type: 设备类型，与 device_index 都为空时关闭所有设备。
+        :param device_index: 设备索引。
+        :return: StatusResponse 对象。
+        """
+        if device_type is None and device_index is None:
+            devices = sorted(self.devices.values(), key=lambda device: device.slot)
         else:
+            devices = [self.get_device(device_type, device_index)]
+
+        failed = []
+        for device in devices:
+            channels = list(device.channels.values())
+            for chn in channels:
+                await self._stop_channel_tasks(chn)
+            name = f"类型 {device.device_type}, 索引 {device.device_index}"
+            ret = self.zcan.CloseDevice(device.handle)
+            if ret != 1:
+                logger.error(f"关闭设备失败：{name}")
+                failed.append(device)
+                continue
+            del self.devices[device.key]
+            for chn in channels:
+                self._forget_channel(chn)
+            logger.info(f"设备已关闭：{name}")
+        # 记录与回放跨设备，所有设备都关闭后才停止
+        if not self.devices:
+            await self.stop_recording()
+            await self.stop_replay()
+
+        if failed or not devices:
             logger.error("关闭设备失败")
             raise HTTPException(status_code=500, detail="关闭设备失败")
+        return StatusResponse(status="success", message="设备已关闭")
+
+    def start_recording(
+        self,
+        path: Optional[str] = None,
+        fd: Optional[bool] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ) -> StatusResponse:
+        """
+        开始记录收发的原始帧。
+
+        :param path: 记录文件路径（相对于 log_dir），为空时为 frames_<时间>.zlgr。
+        :param fd: 是否按 CANFD 记录（每帧 64 字节数据区），为空时有 CANFD 通道即为是。
+        :param max_bytes: 单个文件的最大字节数，超过后轮转到新文件。
+        :raises HTTPException: 已在记录，或路径不在 log_dir 之内。
+        """
+        if self.recorder is not None:
+            raise HTTPException(status_code=400, detail="帧记录已在进行")
+        path = self.log_path(
+            path or datetime.now().strftime("frames_%Y%m%d_%H%M%S.zlgr")
+        )
+        if fd is None:
+            fd = any(self.is_canfd_channel(chn) for chn in self.chn_handles)
+        recorder = FrameRecorder(
+            path, fd=fd, max_bytes=max_bytes, on_file_closed=write_index
+        )
+        recorder.start()
+        self.recorder = recorder
+        return StatusResponse(
+            status="success",
+            message="帧记录已开始",
+            data=self._recording_stats(recorder),
+        )
+
+    async def stop_recording(self) -> StatusResponse:
+        """停止记录，等待剩余的帧写入文件。"""
+        recorder = self.recorder
+        if recorder is None:
+            return StatusResponse(status="info", message="没有正在进行的帧记录")
+        self.recorder = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, recorder.stop)
+        return StatusResponse(
+            status="success",
+            message="帧记录已停止",
+            data=self._recording_stats(recorder),
+        )
+
+    def find_log_files(self, patterns: list[str]) -> list[str]:
+        """
+        在 log_dir 内展开通配符，返回匹配的文件（相对于 log_dir，按路径排序）。
+        帧记录旁的索引文件（.idx）不会被匹配。
+
+        :raises HTTPException: 模式为绝对路径或含有 ..。
+        """
+        files = set()
+        for pattern in patterns:
+            try:
+                files.update(
+                    path
+                    for path in glob_paths(pattern, self.log_dir)
+                    if not is_index_file(path)
+                )
+            except ValueError as e:
+                logger.warning(str(e))
+                raise HTTPException(status_code=400, detail=str(e))
+        return [relative_path(path, self.log_dir) for path in sorted(files)]
 
-    def get_queue(self, chn: int, motor_id: int) -> Optional[asyncio.Queue]:
-        return self.queues.get(chn, {}).get(motor_id)
+    def log_path(self, path: str) -> str:
+        """
+        把接口中的路径转换为 log_dir 下的实际路径。
+
+        :raises HTTPException: 路径为绝对路径或不在 log_dir 之内。
+        """
+        try:
+            return resolve_path(path, self.log_dir)
+        except ValueError as e:
+            logger.warning(str(e))
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def _recording_stats(self, recorder: FrameRecorder) -> dict:
+        """记录统计，文件路径相对于 log_dir。"""
+        stats = recorder.stats()
+        stats["path"] = relative_path(stats["path"], self.log_dir)
+        stats["files"] = [relative_path(path, self.log_dir) for path in stats["files"]]
+        return stats
+
+    def start_replay(
+        self,
+        paths: list[str],
+        speed: Optional[float] = 1.0,
+        channel_map: Optional[Dict[int, int]] = None,
+        include_tx: bool = False,
+    ) -> StatusResponse:
+        """
+        在后台回放帧记录文件，回放的帧与设备接收的帧一样经过解析并发布给订阅者。
+
+        :param paths: 帧记录文件（相对于 log_dir），按顺序回放。
+        :param speed: 回放速度倍率，1 为实时，大于 1 为加速；为空或 0 时尽快回放。
+        :param channel_map: 记录中的通道号 -> 回放到的通道号。
+        :param include_tx: 是否同时回放记录中的发送帧。
+        """
+        if self.replay_task is not None and not self.replay_task.done():
+            raise HTTPException(status_code=400, detail="回放已在进行")
+        resolved = [self.log_path(path) for path in paths]
+        missing = [
+            path for path, real in zip(paths, resolved) if not os.path.isfile(real)
+        ]
+        if missing:
+            raise HTTPException(
+                status_code=404, detail=f"帧记录文件不存在：{', '.join(missing)}"
+            )
+        if speed is not None and speed < 0:
+            raise HTTPException(status_code=400, detail="回放速度不能为负数")
+        replay = ReplayEngine(
+            self,
+            resolved,
+            speed=speed,
+            channel_map=channel_map,
+            batch_size=self.receive_batch_size,
+            include_tx=include_tx,
+        )
+
+        async def run_replay():
+            try:
+                await replay.run()
+            except asyncio.CancelledError:
+                logger.info("回放已停止")
+                raise
+            except Exception as e:
+                logger.error(f"回放帧记录时出现错误：{e}")
+
+        self.replay = replay
+        self.replay_task = asyncio.create_task(run_replay())
+        return StatusResponse(
+            status="success", message="回放已开始", data=self._replay_stats(replay)
+        )
+
+    async def stop_replay(self) -> StatusResponse:
+        """停止正在进行的回放。"""
+        task = self.replay_task
+        if task is None:
+            return StatusResponse(status="info", message="没有正在进行的回放")
+        self.replay_task = None
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        return StatusResponse(
+            status="success",
+            message="回放已停止",
+            data=self._replay_stats(self.replay),
+        )
+
+    def get_replay_stats(self) -> Optional[dict]:
+        """最近一次回放的统计，从未回放时为空。"""
+        return self._replay_stats(self.replay) if self.replay is not None else None
+
+    def _replay_stats(self, replay: ReplayEngine) -> dict:
+        """回放统计，文件路径相对于 log_dir。"""
+        stats = replay.stats()
+        stats["paths"] = [
+            relative_path(path, self.log_dir) for path in stats["paths"]
+        ]
+        return stats
+
+    async def export_parquet(
+        self,
+        paths: list[str],
+        output: str,
+        mode: str = "decoded",
+        include_tx: bool = False,
+    ) -> StatusResponse:
+        """
+        在线程池中把帧记录文件流式导出为 Parquet，参数见 zlg.export.export_parquet，
+        paths 与 output 均相对于 log_dir，结果中的文件路径同样相对于 log_dir。
+
+        :raises HTTPException: 路径不在 log_dir 之内、文件不存在、导出方式无效
+            或未安装 pyarrow。
+        """
+        # pyarrow 为可选依赖且导入较慢，只在导出时导入
+        from zlg.export import export_parquet
+
+        resolved = [self.log_path(path) for path in paths]
+        missing = [
+            path for path, real in zip(paths, resolved) if not os.path.isfile(real)
+        ]
+        if missing:
+            raise HTTPException(
+                status_code=404, detail=f"帧记录文件不存在：{', '.join(missing)}"
+            )
+        output = self.log_path(output)
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self.executor, export_parquet, resolved, output, mode, include_tx
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except RuntimeError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        if isinstance(result["rows"], dict):
+            result["rows"] = {
+                relative_path(path, self.log_dir): rows
+                for path, rows in result["rows"].items()
+            }
+        result["files"] = [
+            relative_path(path, self.log_dir) for path in result["files"]
+        ]
+        return StatusResponse(status="success", message="导出完成", data=result)
+
+    async def query_frames(
+        self,
+        paths: list[str],
+        can_ids: Optional[list[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        channel: Optional[int] = None,
+        limit: int = 10000,
+    ) -> list[dict]:
+        """
+        在线程池中按 CAN ID 与时间范围（微秒）查询帧记录文件，参数见 zlg.framelog.query_frames，
+        paths 相对于 log_dir。
+
+        :raises HTTPException: 路径不在 log_dir 之内、文件不存在或不是帧记录文件。
+        """
+        resolved = [self.log_path(path) for path in paths]
+        missing = [
+            path for path, real in zip(paths, resolved) if not os.path.isfile(real)
+        ]
+        if missing:
+            raise HTTPException(
+                status_code=404, detail=f"帧记录文件不存在：{', '.join(missing)}"
+            )
+        # 正在写入的文件的索引很快过期，不保存
+        recorder = self.recorder
+        active = recorder.files[-1:] if recorder is not None else []
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self.executor,
+                functools.partial(
+                    query_frames,
+                    resolved,
+                    can_ids,
+                    start,
+                    end,
+                    channel,
+                    limit=limit,
+                    active=active,
+                ),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except RuntimeError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def enable_tracing(self, window: int = 10000) -> StatusResponse:
+        """
+        开始跟踪接收 -> 解析 -> 发布 -> SSE 各阶段的耗时，已在跟踪时清空重新统计。
+
+        decode_inline 且使用接收线程时，解析在接收线程内完成，这部分批次不被跟踪。
+
+        :param window: 每个阶段保留的样本数。
+        """
+        self.tracer = PipelineTracer(window)
+        return StatusResponse(status="success", message="流水线跟踪已启用")
+
+    def disable_tracing(self) -> StatusResponse:
+        tracer = self.tracer
+        self.tracer = None
+        return StatusResponse(
+            status="success",
+            message="流水线跟踪已停用",
+            data=tracer.snapshot() if tracer is not None else None,
+        )
+
+    def get_trace_stats(self) -> Optional[dict]:
+        """各阶段耗时统计，未启用跟踪时为空，各项见 PipelineTracer.snapshot。"""
+        return self.tracer.snapshot() if self.tracer is not None else None
+
+    def has_motor(self, chn: int, motor_id: int) -> bool:
+        return (chn, motor_id) in self.hub
+
+    def subscribe(
+        self,
+        chn: int,
+        motor_id: int,
+        policy: Optional[str] = None,
+        maxsize: Optional[int] = None,
+    ) -> ContextManager[TelemetryQueue]:
+        """
+        订阅电机的解析结果，返回的上下文管理器产出订阅者自己的队列，退出时取消订阅。
+
+        :param chn: 通道号。
+        :param motor_id: 电机 ID。
+        :param policy: 队列策略，为空时使用注册电机时的策略。
+        :param maxsize: 队列容量，为空时使用注册电机时的容量。
+        :raises HTTPException: 电机未注册或策略无效。
+        """
+        if not self.has_motor(chn, motor_id):
+            raise HTTPException(
+                status_code=404, detail=f"通道 {chn}, 电机 {motor_id} 未注册"
+            )
+        try:
+            return self.hub.subscription((chn, motor_id), policy, maxsize)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def get_state(self, chn: int, motor_id: int) -> Optional[MotorState]:
+        """电机的最新状态，尚未收到数据时为空。"""
+        return self.states.get((chn, motor_id))
+
+    def get_history(
+        self,
+        chn: int,
+        motor_id: int,
+        signals: Optional[list[str]] = None,
+        seconds: Optional[float] = None,
+        points: Optional[int] = None,
+        method: str = LTTB,
+    ) -> Dict[str, dict]:
+        """
+        查询电机信号最近一段时间的历史，参数见 HistoryStore.query。
+
+        :raises HTTPException: 未保留历史或降采样方法无效。
+        """
+        if self.history is None:
+            raise HTTPException(status_code=400, detail="未启用历史数据")
+        try:
+            return self.history.query(
+                (chn, motor_id), signals, seconds, points, method
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def get_queue_stats(self) -> Dict[int, Dict[int, dict]]:
+        """
+        各电机的订阅统计。
+
+        :return: {通道号: {电机 ID: {"policy", "published", "subscribers": [队列统计, ...]}}}，
+            队列统计项见 TelemetryQueue.stats。
+        """
+        stats: Dict[int, Dict[int, dict]] = {}
+        for (chn, motor_id), topic_stats in self.hub.stats().items():
+            stats.setdefault(chn, {})[motor_id] = topic_stats
+        return stats
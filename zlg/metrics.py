@@ -0,0 +1,261 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# 指标按 Prometheus 文本格式（0.0.4）输出。
+# 计数器的更新只做一次字典读写，不加锁：同一组标签的更新都来自同一个任务或线程（按通道串行），
+# 不同线程之间的并发更新在 GIL 下极少互相覆盖，对统计用途可以接受。
+# 直方图一次更新要改写桶、总和与次数，且会在线程池与事件循环中同时观测，由锁保护。
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 时间类直方图的默认分桶（秒）
+TIME_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+)
+# 批次大小直方图的分桶（帧）
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """已排序样本的 q 分位数（最近秩法），没有样本时为 0。"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[max(index, 0)]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    items = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        items.append(extra)
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        """(名称后缀, 标签串, 值)"""
+        return ()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        values = self.values
+        values[labels] = values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in list(self.values.items()):
+            yield "", _format_labels(self.labels, labels), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = TIME_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（非累计，最后一个为 +Inf）..., 总和, 次数]
+        self.values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        # 在锁内复制各组标签的状态，保证 +Inf 桶与 _count 一致
+        with self._lock:
+            snapshot = [(labels, list(state)) for labels, state in self.values.items()]
+        for labels, state in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), state):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield "_bucket", _format_labels(self.labels, labels, le), cumulative
+            yield "_sum", _format_labels(self.labels, labels), state[-2]
+            yield "_count", _format_labels(self.labels, labels), state[-1]
+
+
+class CallbackMetric(Metric):
+    """抓取时才计算的指标，collect 返回 {标签值元组: 值}。"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str],
+        collect: Callable[[], Dict[tuple, float]],
+        type: str = "gauge",
+    ):
+        super().__init__(name, help, labels)
+        self.type = type
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in self.collect().items():
+            yield "", _format_labels(self.labels, labels), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = TIME_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str],
+        collect: Callable[[], Dict[tuple, float]],
+        type: str = "gauge",
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, labels, collect, type))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+class ManagerMetrics:
+    """ZLGCanManager 数据路径上的各项指标。"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.frames_received = r.counter(
+            "zlg_frames_received_total", "接收到的帧数", ("chn", "can_id")
+        )
+        self.receive_batch_size = r.histogram(
+            "zlg_receive_batch_size",
+            "单次 Receive 返回的帧数",
+            ("chn",),
+            SIZE_BUCKETS,
+        )
+        self.receive_stalls = r.counter(
+            "zlg_receive_stalls_total",
+            "接收线程因待处理批次达到上限而暂停读取的次数",
+            ("chn",),
+        )
+        self.receive_stall_seconds = r.counter(
+            "zlg_receive_stall_seconds_total", "接收线程暂停读取的总时间", ("chn",)
+        )
+        self.executor_wait = r.histogram(
+            "zlg_executor_wait_seconds", "任务提交到线程池后等待执行的时间", ("stage",)
+        )
+        self.decode_seconds = r.histogram(
+            "zlg_decode_seconds", "解析一批帧的耗时", ("chn",)
+        )
+        self.decode_errors = r.counter(
+            "zlg_decode_errors_total", "解析失败的帧数", ("chn",)
+        )
+        self.transmit_frames = r.counter(
+            "zlg_transmit_frames_total", "成功发送的帧数", ("chn",)
+        )
+        self.transmit_failures = r.counter(
+            "zlg_transmit_failures_total",
+            "实际发送帧数少于请求帧数的 Transmit 调用次数",
+            ("chn",),
+        )
+        self.auto_send_ticks = r.counter(
+            "zlg_auto_send_ticks_total", "软件定时发送触发的次数", ("chn",)
+        )
+        self.auto_send_frames = r.counter(
+            "zlg_auto_send_frames_total", "软件定时发送提交的帧数", ("chn",)
+        )
+        self.sse_events_sent = r.counter(
+            "zlg_sse_events_sent_total", "SSE 推送的事件数", ("chn", "motor_id")
+        )
+        self.sse_events_dropped = r.counter(
+            "zlg_sse_events_dropped_total",
+            "SSE 连接因队列溢出、合并或限速而未单独推送的数据条数",
+            ("chn", "motor_id"),
+        )
+        self.sse_events_filtered = r.counter(
+            "zlg_sse_events_filtered_total",
+            "SSE 连接因不含 fields 中任何信号而跳过的数据条数",
+            ("chn", "motor_id"),
+        )
+        self.dll_seconds = r.histogram(
+            "zlg_dll_call_seconds",
+            "DLL 调用耗时（Receive 含阻塞等待的时间）",
+            ("function",),
+        )
+
+    def call_dll(self, name: str, func: Callable, *args, **kwargs) -> Any:
+        """调用 DLL 函数并记录耗时。"""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.dll_seconds.observe(time.perf_counter() - start, (name,))
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,49 @@
+import glob
+import os
+
+# HTTP 接口读写的帧记录、回放与导出文件都位于该目录下，接口中的路径均相对于该目录；
+# 与 utils.logger 写入的 logs/ 分开，避免日志文件与帧记录混在一起
+LOG_DIR = os.environ.get("ZLG_LOG_DIR", "recordings")
+
+
+def _within(root: str, path: str) -> bool:
+    return path != root and os.path.commonpath([root, path]) == root
+
+
+def resolve_path(path: str, base: str = LOG_DIR) -> str:
+    """
+    把相对于 base 的路径转换为实际路径（已解析符号链接）。
+
+    :raises ValueError: 路径为空、为绝对路径，或解析后不在 base 之内。
+    """
+    if not path or os.path.isabs(path) or os.path.splitdrive(path)[0]:
+        raise ValueError(f"路径须为 {base} 下的相对路径：{path}")
+    root = os.path.realpath(base)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if not _within(root, resolved):
+        raise ValueError(f"路径超出 {base}：{path}")
+    return resolved
+
+
+def glob_paths(pattern: str, base: str = LOG_DIR) -> list[str]:
+    """
+    在 base 内展开通配符，返回匹配的文件（按路径排序）。
+
+    :raises ValueError: 模式为绝对路径或含有 ..。
+    """
+    if ".." in pattern.replace("\\", "/").split("/"):
+        raise ValueError(f"路径不能包含 ..：{pattern}")
+    resolve_path(pattern, base)
+    root = os.path.realpath(base)
+    matches = (
+        os.path.realpath(path)
+        for path in glob.glob(os.path.join(glob.escape(root), pattern))
+    )
+    return sorted(
+        path for path in matches if _within(root, path) and os.path.isfile(path)
+    )
+
+
+def relative_path(path: str, base: str = LOG_DIR) -> str:
+    """实际路径相对于 base 的形式，与接口接受的路径一致。"""
+    return os.path.relpath(os.path.realpath(path), os.path.realpath(base))
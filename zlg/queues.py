@@ -0,0 +1,256 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Callable, Hashable, Optional
+
+# 队列策略
+DROP_OLDEST = "drop_oldest"
+LATEST = "latest"
+CONFLATE = "conflate"
+
+
+def message_type(item: Any) -> Hashable:
+    """
+    解析结果的报文类型：列式结果取 canId，逐帧结果取第一个字段名
+    （各报文布局的第一个信号名互不相同，错误结果为 "error"）。
+    """
+    if isinstance(item, dict):
+        can_id = item.get("canId")
+        if can_id is not None:
+            return can_id
+        return next(iter(item), None)
+    return type(item)
+
+
+class TelemetryQueue(ABC):
+    """
+    有界的遥测数据队列，接口与 asyncio.Queue 的 put_nowait / get / get_nowait 一致。
+
+    put_nowait 从不阻塞也不抛出 QueueFull，队列满时由子类的策略决定丢弃或合并哪一项，
+    并分别计入 dropped / conflated。
+    """
+
+    policy = ""
+
+    def __init__(self, maxsize: int = 1000):
+        if maxsize <= 0:
+            raise ValueError("maxsize 必须大于 0")
+        self.maxsize = maxsize
+        self.put_count = 0
+        self.dropped = 0
+        self.conflated = 0
+        self._getters: deque = deque()
+
+    @abstractmethod
+    def qsize(self) -> int:
+        raise NotImplementedError
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        return self.qsize() >= self.maxsize
+
+    @abstractmethod
+    def _put(self, item: Any) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _get(self) -> Any:
+        raise NotImplementedError
+
+    def put_nowait(self, item: Any) -> None:
+        self._put(item)
+        self.put_count += 1
+        self._wake_next()
+
+    def put_many(self, items: list) -> None:
+        """一次放入一批数据，只唤醒一次等待者。"""
+        if not items:
+            return
+        for item in items:
+            self._put(item)
+        self.put_count += len(items)
+        self._wake_next()
+
+    def get_nowait(self) -> Any:
+        if self.empty():
+            raise asyncio.QueueEmpty
+        return self._get()
+
+    async def get(self) -> Any:
+        while self.empty():
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except BaseException:
+                getter.cancel()
+                try:
+                    self._getters.remove(getter)
+                except ValueError:
+                    pass
+                # 被取消的 getter 已被唤醒时，把唤醒让给下一个等待者
+                if not self.empty() and not getter.cancelled():
+                    self._wake_next()
+                raise
+        return self._get()
+
+    def _wake_next(self) -> None:
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
+
+    def get_all_nowait(self) -> list:
+        """取出队列中的全部数据，队列为空时返回空列表。"""
+        items = []
+        while not self.empty():
+            items.append(self._get())
+        return items
+
+    def clear(self) -> None:
+        while not self.empty():
+            self._get()
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "size": self.qsize(),
+            "maxsize": self.maxsize,
+            "put": self.put_count,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+        }
+
+
+class DropOldestQueue(TelemetryQueue):
+    """队列满时丢弃最旧的一项。"""
+
+    policy = DROP_OLDEST
+
+    def __init__(self, maxsize: int = 1000):
+        super().__init__(maxsize)
+        # 定长 deque 即环形缓冲区，追加时自动挤出最旧的一项
+        self._items: deque = deque(maxlen=maxsize)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def _put(self, item: Any) -> None:
+        if len(self._items) >= self.maxsize:
+            self.dropped += 1
+        self._items.append(item)
+
+    def put_many(self, items: list) -> None:
+        if not items:
+            return
+        overflow = len(self._items) + len(items) - self.maxsize
+        if overflow > 0:
+            self.dropped += overflow
+        self._items.extend(items)
+        self.put_count += len(items)
+        self._wake_next()
+
+    def _get(self) -> Any:
+        return self._items.popleft()
+
+    def get_all_nowait(self) -> list:
+        items = list(self._items)
+        self._items.clear()
+        return items
+
+
+class LatestQueue(TelemetryQueue):
+    """只保留最新的一项，未被取走的旧值计入 conflated。"""
+
+    policy = LATEST
+
+    def __init__(self, maxsize: int = 1):
+        super().__init__(1)
+        self._item: Any = None
+        self._has_item = False
+
+    def qsize(self) -> int:
+        return 1 if self._has_item else 0
+
+    def _put(self, item: Any) -> None:
+        if self._has_item:
+            self.conflated += 1
+        self._item = item
+        self._has_item = True
+
+    def put_many(self, items: list) -> None:
+        if not items:
+            return
+        self.conflated += len(items) - (0 if self._has_item else 1)
+        self._item = items[-1]
+        self._has_item = True
+        self.put_count += len(items)
+        self._wake_next()
+
+    def _get(self) -> Any:
+        item = self._item
+        self._item = None
+        self._has_item = False
+        return item
+
+
+class ConflatingQueue(TelemetryQueue):
+    """
+    按报文类型合并：每种报文只保留最新的一项，按最近更新的先后顺序取出。
+
+    报文类型超过 maxsize 种时丢弃最久未更新的一种。
+    """
+
+    policy = CONFLATE
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        key: Callable[[Any], Hashable] = message_type,
+    ):
+        super().__init__(maxsize)
+        self.key = key
+        self._items: OrderedDict = OrderedDict()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def _put(self, item: Any) -> None:
+        key = self.key(item)
+        if key in self._items:
+            self.conflated += 1
+            self._items.move_to_end(key)
+        elif len(self._items) >= self.maxsize:
+            self._items.popitem(last=False)
+            self.dropped += 1
+        self._items[key] = item
+
+    def _get(self) -> Any:
+        return self._items.popitem(last=False)[1]
+
+
+QUEUE_POLICIES = {
+    DROP_OLDEST: DropOldestQueue,
+    LATEST: LatestQueue,
+    CONFLATE: ConflatingQueue,
+}
+
+
+def create_queue(
+    policy: str = DROP_OLDEST, maxsize: Optional[int] = None
+) -> TelemetryQueue:
+    """
+    按策略创建队列。
+
+    :param policy: drop_oldest 为有界队列、满时丢弃最旧项；latest 只保留最新值；
+        conflate 按报文类型只保留各自的最新值。
+    :param maxsize: 队列容量，为空时使用策略的默认值。
+    :raises ValueError: 未知的策略。
+    """
+    queue_cls = QUEUE_POLICIES.get(policy)
+    if queue_cls is None:
+        raise ValueError(f"未知的队列策略：{policy}")
+    return queue_cls() if maxsize is None else queue_cls(maxsize)
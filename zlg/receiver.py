@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+from ctypes import c_int
+from typing import Any, Callable, Optional
+
+from utils.logger import logger
+from zlg.metrics import ManagerMetrics
+from zlg.zlgcan import ZCAN, ReceiveBufferPool
+
+
+class ReceiveWorker:
+    """
+    通道接收线程。
+
+    线程阻塞在 ZCAN_Receive 中等待数据（最多 wait_time 毫秒，以便及时响应停止），
+    每收到一批帧就通过 call_soon_threadsafe 交给事件循环，不做忙等轮询。
+    帧写入从缓冲区池取出的数组，处理方在解析完成后负责把数组归还给池；
+    若提供 decode，则在本线程内解析并立即归还数组，只把解析结果交给事件循环。
+    提供 slots 时，每投递一批先占用一个名额，处理方处理完后释放；名额用尽时线程
+    停止读取，帧积压在设备缓冲区中，已投递未处理的批次（及其缓冲区）数量有上限。
+    """
+
+    def __init__(
+        self,
+        zcan: ZCAN,
+        chn: int,
+        chn_handle: Any,
+        loop: asyncio.AbstractEventLoop,
+        on_batch: Callable[[Any], None],
+        pool: ReceiveBufferPool,
+        wait_time: int = 100,
+        decode: Optional[Callable[[Any, int], Any]] = None,
+        fd: bool = False,
+        metrics: Optional[ManagerMetrics] = None,
+        stamp: Optional[Callable[[], Optional[float]]] = None,
+        slots: Optional[threading.Semaphore] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ):
+        """
+        :param zcan: ZCAN 实例。
+        :param chn: 通道号，仅用于日志和线程名。
+        :param chn_handle: 通道句柄。
+        :param loop: 接收批次的事件循环。
+        :param on_batch: 在事件循环中调用的回调，参数为 (帧数组, 帧数, 接收时刻) 元组，
+            提供 decode 时为 decode 的返回值。
+        :param pool: 接收缓冲区池，单次 Receive 的最大帧数即缓冲区容量。
+        :param wait_time: 单次 Receive 的最长阻塞时间（毫秒）。
+        :param decode: 可选的解析函数，参数为 (帧数组, 帧数)。
+        :param fd: 是否接收 CANFD 帧（ZCAN_ReceiveFD），pool 须为对应的 CANFD 缓冲区池。
+        :param metrics: 可选的指标，记录 Receive 耗时与批次大小。
+        :param stamp: 可选的时间戳函数，每批在 Receive 返回时调用一次，
+            结果作为接收时刻投递（用于流水线跟踪）；未提供时接收时刻为 None。
+        :param slots: 可选的待处理批次名额，同一通道的接收线程可以共用。
+        :param on_error: 线程因异常退出时在事件循环中调用的回调，参数为该异常，
+            处理方据此结束接收任务；未提供时只记录日志。
+        """
+        self.zcan = zcan
+        self.chn = chn
+        self.chn_handle = chn_handle
+        self.loop = loop
+        self.on_batch = on_batch
+        self.pool = pool
+        self.wait_time = c_int(wait_time)
+        self.decode = decode
+        self.fd = fd
+        self.metrics = metrics
+        self.stamp = stamp
+        self.slots = slots
+        self.on_error = on_error
+        self._receive_into = zcan.ReceiveFDInto if fd else zcan.ReceiveInto
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"zlg-receive-{chn}{'-fd' if fd else ''}",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def _wait_slot(self) -> bool:
+        """占用一个待处理批次名额，名额用尽时等待；线程被停止时返回 False。"""
+        if self.slots is None or self.slots.acquire(blocking=False):
+            return True
+        start = time.perf_counter()
+        while not self.slots.acquire(timeout=0.1):
+            if self._stop_event.is_set():
+                return False
+        if self.metrics is not None:
+            self.metrics.receive_stalls.inc((self.chn,))
+            self.metrics.receive_stall_seconds.inc(
+                (self.chn,), time.perf_counter() - start
+            )
+        return True
+
+    def _run(self) -> None:
+        logger.info(f"接收线程已启动：通道 {self.chn}")
+        msgs = self.pool.acquire()
+        try:
+            while not self._stop_event.is_set():
+                if self.metrics is not None:
+                    ret = self.metrics.call_dll(
+                        "ReceiveFD" if self.fd else "Receive",
+                        self._receive_into,
+                        self.chn_handle,
+                        msgs,
+                        wait_time=self.wait_time,
+                    )
+                else:
+                    ret = self._receive_into(
+                        self.chn_handle, msgs, wait_time=self.wait_time
+                    )
+                if not ret or self._stop_event.is_set():
+                    continue
+                if self.metrics is not None:
+                    self.metrics.receive_batch_size.observe(ret, (self.chn,))
+                if not self._wait_slot():
+                    break
+                if self.decode is not None:
+                    self.loop.call_soon_threadsafe(self.on_batch, self.decode(msgs, ret))
+                else:
+                    received_at = self.stamp() if self.stamp is not None else None
+                    self.loop.call_soon_threadsafe(
+                        self.on_batch, (msgs, ret, received_at)
+                    )
+                    msgs = self.pool.acquire()
+        except Exception as e:
+            logger.error(f"接收线程错误：通道 {self.chn}, {e}")
+            if self.on_error is not None and not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self.on_error, e)
+        finally:
+            self.pool.release(msgs)
+            logger.info(f"接收线程已退出：通道 {self.chn}")
@@ -0,0 +1,328 @@
+import ctypes
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from utils.logger import logger
+from zlg.zlgcan import (
+    ZCAN_ReceiveFD_Data,
+    ZCAN_Transmit_Data,
+    ZCAN_TransmitFD_Data,
+)
+
+# 帧记录文件格式（小端，定长记录）：
+#   文件头 "<4sHHQ"  magic b"ZLGR", 版本, 每条记录的数据字节数（8 或 64）, 创建时间（微秒）
+#   记录   "<QIBBBB" 时间戳（微秒）, ID 字（同 ZCAN 帧：低 29 位 ID，29-31 位 err/rtr/eff）,
+#                    通道, 方向, 数据长度, 标志位，随后为定长的数据区
+# 接收帧的时间戳为设备的硬件时间戳；发送帧没有硬件时间戳，
+# 用本机时间加上最近一次接收时的设备时钟偏差换算到设备时钟，
+# 因此文件中的时间戳大致递增，但发送帧与接收帧之间可能有少量乱序。
+MAGIC = b"ZLGR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHQ")
+RECORD_HEADER = struct.Struct("<QIBBBB")
+
+# 方向
+RX = 0
+TX = 1
+
+# 标志位
+FLAG_FD = 0x01
+FLAG_BRS = 0x02
+FLAG_ESI = 0x04
+
+CAN_ID_MASK = 0x1FFFFFFF
+EFF_FLAG = 0x80000000
+RTR_FLAG = 0x40000000
+ERR_FLAG = 0x20000000
+
+# 帧数组元素中 ID 字、长度、FD 标志、数据的偏移，经典帧与 CANFD 帧相同
+_FRAME_PREFIX = struct.Struct("<IBB")
+_FRAME_DATA_OFFSET = 8
+
+
+def record_size(data_size: int) -> int:
+    return RECORD_HEADER.size + data_size
+
+
+class FrameRecord(NamedTuple):
+    timestamp: int
+    id_word: int
+    channel: int
+    direction: int
+    length: int
+    flags: int
+    data: bytes
+
+    @property
+    def can_id(self) -> int:
+        return self.id_word & CAN_ID_MASK
+
+    @property
+    def eff(self) -> int:
+        return 1 if self.id_word & EFF_FLAG else 0
+
+    @property
+    def rtr(self) -> int:
+        return 1 if self.id_word & RTR_FLAG else 0
+
+    @property
+    def fd(self) -> bool:
+        return bool(self.flags & FLAG_FD)
+
+
+class FrameRecorder:
+    """
+    原始帧记录器。
+
+    record 只把帧数组的内存拷贝一份放入队列（不做编码，也不接触磁盘），
+    由后台线程编码为定长记录并大块写入文件，文件超过 max_bytes 时轮转。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fd: bool = False,
+        max_bytes: int = 256 * 1024 * 1024,
+        buffer_size: int = 1024 * 1024,
+        on_file_closed: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        :param path: 记录文件路径，轮转的文件依次命名为 <名称>_0000<扩展名>、_0001 ...
+        :param fd: 是否按 CANFD 记录（数据区 64 字节），否则数据区 8 字节，
+            CANFD 帧超出 8 字节的数据会被截断。
+        :param max_bytes: 单个文件的最大字节数。
+        :param buffer_size: 文件写缓冲区大小。
+        :param on_file_closed: 每个文件写完关闭后在后台线程中调用，参数为文件路径，
+            用于建立索引等后处理。
+        """
+        self.path = path
+        self.data_size = 64 if fd else 8
+        self.record_size = record_size(self.data_size)
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.on_file_closed = on_file_closed
+        self.files: list[str] = []
+        self.frames = 0
+        self.bytes_written = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._file_bytes = 0
+        # 设备时钟 - 本机时钟（微秒），用于换算发送帧的时间戳；
+        # 收到第一批接收帧之前，发送帧的时间戳为距记录开始的时间
+        self._clock_offset = -_host_us()
+        self._record = struct.Struct(f"<QIBBBB{self.data_size}s")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._run, name="zlg-recorder", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"帧记录已启动：{self.path}")
+
+    def stop(self) -> None:
+        """写完队列中剩余的帧后停止，阻塞直到后台线程退出。"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        logger.info(f"帧记录已停止：{self.path}，共 {self.frames} 帧")
+
+    def record(self, chn: int, msgs: Any, count: int, direction: int = RX) -> None:
+        """
+        记录一批帧，可在任意线程调用。
+
+        :param chn: 通道号。
+        :param msgs: ZCAN_Receive_Data / ZCAN_ReceiveFD_Data / ZCAN_Transmit_Data /
+            ZCAN_TransmitFD_Data 数组，调用返回后即可复用。
+        :param count: 有效帧数。
+        :param direction: RX 或 TX。
+        """
+        if count <= 0 or self._thread is None:
+            return
+        element = msgs._type_
+        raw = ctypes.string_at(ctypes.addressof(msgs), count * ctypes.sizeof(element))
+        self._queue.put((chn, direction, element, raw, count, _host_us()))
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "running": self.running,
+            "frames": self.frames,
+            "bytes": self.bytes_written,
+            "files": list(self.files),
+            "pending": self._queue.qsize(),
+        }
+
+    def _close_file(self) -> None:
+        self._file.close()
+        self._file = None
+        if self.on_file_closed is not None:
+            try:
+                self.on_file_closed(self.files[-1])
+            except Exception as e:
+                logger.error(f"帧记录文件后处理错误：{e}")
+
+    def _open_next_file(self) -> None:
+        if self._file is not None:
+            self._close_file()
+        root, ext = os.path.splitext(self.path)
+        path = f"{root}_{len(self.files):04d}{ext or '.zlgr'}"
+        self._file = open(path, "wb", buffering=self.buffer_size)
+        header = FILE_HEADER.pack(MAGIC, VERSION, self.data_size, int(time.time() * 1e6))
+        self._file.write(header)
+        self._file_bytes = len(header)
+        self.bytes_written += len(header)
+        self.files.append(path)
+
+    def _run(self) -> None:
+        try:
+            self._open_next_file()
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                records = self._encode(*item)
+                # 只有文件中已有记录时才轮转，单批超过 max_bytes 时整批写入一个文件，
+                # 不留下只有文件头的空文件
+                if (
+                    self._file_bytes > FILE_HEADER.size
+                    and self._file_bytes + len(records) > self.max_bytes
+                ):
+                    self._open_next_file()
+                self._file.write(records)
+                self._file_bytes += len(records)
+                self.bytes_written += len(records)
+        except Exception as e:
+            logger.error(f"帧记录线程错误：{e}")
+        finally:
+            if self._file is not None:
+                self._close_file()
+
+    def _encode(
+        self,
+        chn: int,
+        direction: int,
+        element: type,
+        raw: bytes,
+        count: int,
+        host_us: int,
+    ) -> bytearray:
+        fd = element is ZCAN_ReceiveFD_Data or element is ZCAN_TransmitFD_Data
+        transmit = element is ZCAN_Transmit_Data or element is ZCAN_TransmitFD_Data
+        size = ctypes.sizeof(element)
+        timestamp_offset = None if transmit else element.timestamp.offset
+        data_size = min(64 if fd else 8, self.data_size)
+        out = bytearray(self.record_size * count)
+        pack_into = self._record.pack_into
+        unpack_prefix = _FRAME_PREFIX.unpack_from
+        unpack_timestamp = struct.Struct("<Q").unpack_from
+        timestamp = max(0, host_us + self._clock_offset)
+        for i in range(count):
+            base = i * size
+            id_word, length, fd_bits = unpack_prefix(raw, base)
+            if timestamp_offset is not None:
+                (timestamp,) = unpack_timestamp(raw, base + timestamp_offset)
+            flags = (FLAG_FD | (fd_bits & 0x03) << 1) if fd else 0
+            data = raw[base + _FRAME_DATA_OFFSET : base + _FRAME_DATA_OFFSET + data_size]
+            pack_into(
+                out,
+                i * self.record_size,
+                timestamp,
+                id_word,
+                chn,
+                direction,
+                min(length, data_size),
+                flags,
+                data,
+            )
+        if timestamp_offset is not None:
+            self._clock_offset = timestamp - host_us
+        self.frames += count
+        return out
+
+
+def _host_us() -> int:
+    return time.monotonic_ns() // 1000
+
+
+def read_header(f) -> tuple[int, int]:
+    """
+    读取并校验文件头。
+
+    :return: (数据区字节数, 创建时间（微秒）)。
+    :raises ValueError: 不是帧记录文件。
+    """
+    header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise ValueError("帧记录文件头不完整")
+    magic, version, data_size, created = FILE_HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("不是有效的帧记录文件")
+    return data_size, created
+
+
+class RecordReader:
+    """
+    按块读取帧记录文件的读取器，持有打开的文件直到 close。
+
+    与生成器不同，read 可以交给线程池执行，调用方在该次读取完成后再 close，
+    不会与仍在执行的读取冲突。末尾不完整的记录被忽略。
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            data_size, _ = read_header(self._file)
+        except BaseException:
+            self._file.close()
+            raise
+        self._size = record_size(data_size)
+        self._record = struct.Struct(f"<QIBBBB{data_size}s")
+
+    def read(self, count: int) -> list[FrameRecord]:
+        """读取至多 count 条记录，文件结束时返回空列表。"""
+        size = self._size
+        chunk = self._file.read(size * count)
+        records = []
+        for offset in range(0, len(chunk) - size + 1, size):
+            timestamp, id_word, chn, direction, length, flags, data = (
+                self._record.unpack_from(chunk, offset)
+            )
+            records.append(
+                FrameRecord(
+                    timestamp, id_word, chn, direction, length, flags, data[:length]
+                )
+            )
+        return records
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "RecordReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def iter_records(path: str, chunk_records: int = 4096) -> Iterator[FrameRecord]:
+    """逐条读取帧记录文件，末尾不完整的记录被忽略。"""
+    with RecordReader(path) as reader:
+        while True:
+            records = reader.read(chunk_records)
+            if not records:
+                break
+            yield from records
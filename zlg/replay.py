@@ -0,0 +1,171 @@
+import asyncio
+import contextlib
+import struct
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, Optional
+
+from utils.logger import logger
+from zlg.recorder import RX, FrameRecord, RecordReader
+from zlg.zlgcan import ZCAN_Receive_Data, ZCAN_ReceiveFD_Data
+
+if TYPE_CHECKING:
+    from zlg.manager import ZLGCanManager
+
+# 与 ZCAN_Receive_Data / ZCAN_ReceiveFD_Data 内存布局一致的打包格式
+_RECEIVE = struct.Struct("<IBBBB8sQ")
+_RECEIVE_FD = struct.Struct("<IBBBB64sQ")
+
+# 实时与加速回放时，相隔不到该时间（秒）的帧合并为一批交给管理器
+PACING_SLICE = 0.005
+
+# 每次在线程池中读取的记录条数，读文件不阻塞事件循环
+READ_CHUNK = 4096
+
+
+def build_receive_frames(records: list[FrameRecord], fd: bool = False):
+    """
+    把帧记录转换为 ZCAN_Receive_Data（fd 时为 ZCAN_ReceiveFD_Data）数组，
+    与从设备接收到的帧数组完全相同。
+    """
+    packer = _RECEIVE_FD if fd else _RECEIVE
+    buffer = bytearray(packer.size * len(records))
+    for i, record in enumerate(records):
+        packer.pack_into(
+            buffer,
+            i * packer.size,
+            record.id_word,
+            record.length,
+            (record.flags >> 1) & 0x03 if fd else 0,
+            0,
+            0,
+            record.data,
+            record.timestamp,
+        )
+    element = ZCAN_ReceiveFD_Data if fd else ZCAN_Receive_Data
+    return (element * len(records)).from_buffer(buffer)
+
+
+class ReplayEngine:
+    """
+    把帧记录文件中的接收帧按原来的时间间隔（或加速、或尽快）交给
+    ZLGCanManager.handle_can_data，走与设备接收完全相同的解析与发布路径。
+    """
+
+    def __init__(
+        self,
+        manager: "ZLGCanManager",
+        paths: Iterable[str],
+        speed: Optional[float] = 1.0,
+        channel_map: Optional[Dict[int, int]] = None,
+        batch_size: int = 1000,
+        include_tx: bool = False,
+    ):
+        """
+        :param manager: 接收回放数据的管理器。
+        :param paths: 帧记录文件的实际路径，按顺序回放。
+        :param speed: 回放速度倍率，1 为实时，大于 1 为加速；为空或 0 时尽快回放。
+        :param channel_map: 记录中的通道号 -> 回放到的通道号，未列出的通道保持不变。
+        :param batch_size: 每批最多的帧数。
+        :param include_tx: 是否把记录中的发送帧也当作接收帧回放。
+        """
+        self.manager = manager
+        self.paths = list(paths)
+        self.speed = speed or None
+        self.channel_map = channel_map or {}
+        self.batch_size = batch_size
+        self.include_tx = include_tx
+        self.frames = 0
+        self.batches = 0
+        self.max_lag = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._pending: Dict[tuple, list] = {}
+        self._pending_count = 0
+
+    def stats(self) -> dict:
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "paths": self.paths,
+            "speed": self.speed,
+            "frames": self.frames,
+            "batches": self.batches,
+            "elapsed": elapsed,
+            "framesPerSecond": self.frames / elapsed if elapsed else 0.0,
+            "maxLag": self.max_lag * 1000,
+            "finished": self.finished_at is not None,
+        }
+
+    async def run(self) -> dict:
+        """回放全部文件，返回统计信息（maxLag 为回放时刻落后于计划的最大值，毫秒）。"""
+        loop = asyncio.get_running_loop()
+        self.started_at = time.perf_counter()
+        start: Optional[float] = None
+        first_timestamp = 0
+        try:
+            for path in self.paths:
+                logger.info(f"开始回放：{path}")
+                # 回放被取消时立即关闭读取器，不等生成器被回收
+                async with contextlib.aclosing(self._read(path)) as records:
+                    async for record in records:
+                        if record.direction != RX and not self.include_tx:
+                            continue
+                        if self.speed is not None:
+                            if start is None:
+                                start = loop.time()
+                                first_timestamp = record.timestamp
+                            elapsed = (record.timestamp - first_timestamp) / 1e6
+                            due = start + elapsed / self.speed
+                            delay = due - loop.time()
+                            if delay > PACING_SLICE:
+                                await self._flush()
+                                await asyncio.sleep(delay)
+                            self.max_lag = max(self.max_lag, loop.time() - due)
+                        chn = self.channel_map.get(record.channel, record.channel)
+                        key = (chn, record.fd)
+                        self._pending.setdefault(key, []).append(record)
+                        self._pending_count += 1
+                        if self._pending_count >= self.batch_size:
+                            await self._flush()
+            await self._flush()
+        finally:
+            self.finished_at = time.perf_counter()
+        logger.info(f"回放结束：共 {self.frames} 帧")
+        return self.stats()
+
+    async def _read(self, path: str) -> AsyncIterator[FrameRecord]:
+        """在管理器的线程池中分块读取帧记录，每块之间让出事件循环。"""
+        loop = asyncio.get_running_loop()
+        reader = await self.manager.run_in_executor("replay", RecordReader, path)
+        read: Optional[asyncio.Task] = None
+        try:
+            while True:
+                read = loop.create_task(
+                    self.manager.run_in_executor("replay", reader.read, READ_CHUNK)
+                )
+                # 取消只作用于本协程，线程池中的读取继续执行到结束
+                chunk = await asyncio.shield(read)
+                if not chunk:
+                    break
+                for record in chunk:
+                    yield record
+        finally:
+            # 等仍在执行的读取结束后再关闭文件
+            if read is not None and not read.done():
+                await asyncio.wait([read])
+            reader.close()
+
+    async def _flush(self) -> None:
+        pending = self._pending
+        self._pending = {}
+        self._pending_count = 0
+        for (chn, fd), records in pending.items():
+            msgs = build_receive_frames(records, fd)
+            # 回放的帧不再写入正在进行的帧记录
+            await self.manager.handle_can_data(
+                chn, msgs, len(records), record=False
+            )
+            self.frames += len(records)
+            self.batches += 1
+            # 尽快回放且同步解析时 handle_can_data 可能不挂起，这里让出事件循环
+            await asyncio.sleep(0)
@@ -0,0 +1,263 @@
+import asyncio
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from utils.logger import logger
+from zlg.metrics import percentile
+
+# 落后时的处理策略：catch_up 立即补发错过的周期（最多 max_catch_up 次），skip 直接跳到下一个周期
+CATCH_UP = "catch_up"
+SKIP = "skip"
+
+
+class PeriodicStats:
+    """
+    周期任务的执行统计，只保留最近 window 次的样本。
+    """
+
+    def __init__(self, interval: float, window: int = 1000):
+        self.interval = interval
+        self.periods: deque = deque(maxlen=window)
+        self.lateness: deque = deque(maxlen=window)
+        self.fired = 0
+        self.missed = 0
+        self.errors = 0
+        self.last_fire: Optional[float] = None
+
+    def record(self, now: float, deadline: float) -> None:
+        if self.last_fire is not None:
+            self.periods.append(now - self.last_fire)
+        self.lateness.append(now - deadline)
+        self.last_fire = now
+        self.fired += 1
+
+    def snapshot(self) -> dict:
+        """
+        :return: 统计结果，时间单位为毫秒。jitter 为实际周期与名义周期之差的绝对值，
+            lateness 为实际触发时刻晚于截止时刻的时间。
+        """
+        periods = sorted(self.periods)
+        jitter = sorted(abs(p - self.interval) for p in self.periods)
+        lateness = sorted(self.lateness)
+        return {
+            "interval": self.interval * 1000,
+            "fired": self.fired,
+            "missed": self.missed,
+            "errors": self.errors,
+            "periodMean": (sum(periods) / len(periods) * 1000) if periods else 0.0,
+            "periodMin": periods[0] * 1000 if periods else 0.0,
+            "periodMax": periods[-1] * 1000 if periods else 0.0,
+            "jitterP50": percentile(jitter, 0.50) * 1000,
+            "jitterP90": percentile(jitter, 0.90) * 1000,
+            "jitterP99": percentile(jitter, 0.99) * 1000,
+            "jitterMax": (jitter[-1] * 1000) if jitter else 0.0,
+            "latenessP50": percentile(lateness, 0.50) * 1000,
+            "latenessP99": percentile(lateness, 0.99) * 1000,
+        }
+
+
+class PeriodicEntry:
+    def __init__(
+        self,
+        key: Hashable,
+        interval: float,
+        callback: Optional[Callable[[], Awaitable[None]]],
+        policy: str,
+        deadline: float,
+        payload: Any = None,
+    ):
+        self.key = key
+        self.interval = interval
+        self.next_deadline: Optional[float] = None
+        self.callback = callback
+        self.payload = payload
+        self.policy = policy
+        self.deadline = deadline
+        self.stats = PeriodicStats(interval)
+
+
+class PeriodicScheduler:
+    """
+    单个通道的周期调度器。
+
+    所有周期任务按绝对截止时刻触发：下一次截止时刻 = 上一次截止时刻 + 周期，
+    回调耗时与 sleep 误差不会累积成漂移。错过截止时刻时按条目的策略补发或跳过，
+    并记录实际周期、抖动和错过次数。
+
+    提供 dispatch 时，同一时刻到期的条目作为一个列表整体交给 dispatch 处理
+    （例如合并为一次发送），条目只需携带 payload；否则逐个调用条目的回调。
+    新条目立即触发第一次，之后对齐到调度器的时间网格（起点 + 周期的整数倍），
+    先后加入、周期成倍数关系的条目因此在同一时刻到期。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        policy: str = SKIP,
+        max_catch_up: int = 5,
+        dispatch: Optional[Callable[[list], Awaitable[None]]] = None,
+    ):
+        """
+        :param name: 调度器名称，用于日志。
+        :param policy: 条目的默认落后策略，catch_up 或 skip。
+        :param max_catch_up: catch_up 策略下最多连续补发的周期数，超过后按 skip 处理。
+        :param dispatch: 可选的批量处理函数，参数为本次到期的 PeriodicEntry 列表。
+        """
+        self.name = name
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.dispatch = dispatch
+        self.entries: Dict[Hashable, PeriodicEntry] = {}
+        self._epoch: Optional[float] = None
+        # 调度任务当前等待的 future，条目变化时提前唤醒
+        self._waiter: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def add(
+        self,
+        key: Hashable,
+        interval_ms: float,
+        callback: Optional[Callable[[], Awaitable[None]]] = None,
+        policy: Optional[str] = None,
+        payload: Any = None,
+    ) -> PeriodicEntry:
+        """
+        添加周期任务，立即触发第一次。
+
+        :param key: 条目键，如电机 ID。
+        :param interval_ms: 周期（毫秒）。
+        :param callback: 每个周期调用的协程函数，使用 dispatch 时可为空。
+        :param policy: 落后策略，为空时使用调度器默认策略。
+        :param payload: 交给 dispatch 的数据。
+        :raises ValueError: 周期不是正数。
+        """
+        if interval_ms <= 0:
+            raise ValueError(f"周期必须为正数：{interval_ms}")
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._epoch is None:
+            self._epoch = now
+        interval = interval_ms / 1000
+        entry = PeriodicEntry(
+            key, interval, callback, policy or self.policy, now, payload
+        )
+        # 第一次立即触发，下一次对齐到网格
+        entry.next_deadline = self._epoch + math.ceil(
+            (now - self._epoch) / interval + 1e-9
+        ) * interval
+        self.entries[key] = entry
+        self._ensure_running()
+        self._wake()
+        return entry
+
+    def update(
+        self,
+        key: Hashable,
+        interval_ms: float,
+        callback: Optional[Callable[[], Awaitable[None]]] = None,
+        payload: Any = None,
+    ) -> PeriodicEntry:
+        """
+        替换已有条目的周期、回调与 payload，保持当前相位；条目不存在时等同于 add。
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return self.add(key, interval_ms, callback, payload=payload)
+        if interval_ms <= 0:
+            raise ValueError(f"周期必须为正数：{interval_ms}")
+        entry.callback = callback
+        entry.payload = payload
+        if entry.interval != interval_ms / 1000:
+            entry.interval = interval_ms / 1000
+            entry.stats = PeriodicStats(entry.interval)
+        self._wake()
+        return entry
+
+    def remove(self, key: Hashable) -> Optional[PeriodicEntry]:
+        entry = self.entries.pop(key, None)
+        self._wake()
+        return entry
+
+    def stats(self) -> Dict[Hashable, dict]:
+        return {key: entry.stats.snapshot() for key, entry in self.entries.items()}
+
+    async def close(self) -> None:
+        self.entries.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def _sleep_until(self, deadline: Optional[float]) -> None:
+        """等待到 deadline（为空时一直等待），期间条目变化会提前返回。"""
+        loop = asyncio.get_running_loop()
+        self._waiter = loop.create_future()
+        handle = None
+        if deadline is not None:
+            handle = loop.call_at(deadline, self._wake)
+        try:
+            await self._waiter
+        finally:
+            if handle is not None:
+                handle.cancel()
+            self._waiter = None
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.entries:
+                await self._sleep_until(None)
+                continue
+            deadline = min(entry.deadline for entry in self.entries.values())
+            if deadline > loop.time():
+                await self._sleep_until(deadline)
+                continue
+
+            now = loop.time()
+            due = [entry for entry in self.entries.values() if entry.deadline <= now]
+            for entry in due:
+                entry.stats.record(now, entry.deadline)
+            if self.dispatch is not None:
+                try:
+                    await self.dispatch(due)
+                    results = [None] * len(due)
+                except Exception as e:
+                    results = [e] * len(due)
+            else:
+                results = await asyncio.gather(
+                    *(entry.callback() for entry in due), return_exceptions=True
+                )
+            for entry, result in zip(due, results):
+                if isinstance(result, Exception):
+                    entry.stats.errors += 1
+                    logger.error(f"周期任务错误：{self.name}, {entry.key}, {result}")
+                self._advance(entry, loop.time())
+
+    def _advance(self, entry: PeriodicEntry, now: float) -> None:
+        if entry.next_deadline is not None:
+            entry.deadline, entry.next_deadline = entry.next_deadline, None
+        else:
+            entry.deadline += entry.interval
+        if entry.deadline > now:
+            return
+        behind = int((now - entry.deadline) / entry.interval) + 1
+        if entry.policy == CATCH_UP and behind <= self.max_catch_up:
+            # 保留截止时刻，下一轮立即补发
+            return
+        entry.stats.missed += behind
+        entry.deadline += behind * entry.interval
@@ -0,0 +1,314 @@
+import ctypes
+import itertools
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, Sequence
+
+from zlg.backend import ZCANBackend
+from zlg.zlgcan import (
+    INVALID_CHANNEL_HANDLE,
+    ZCAN_STATUS_ERR,
+    ZCAN_STATUS_OK,
+    ZCAN_STATUS_ONLINE,
+    ZCAN_TYPE_CANFD,
+)
+
+# linux/can.h
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+CANFD_BRS = 0x01
+CAN_RAW_FD_FRAMES = 5
+SOL_CAN_RAW = 101
+
+CAN_FRAME = struct.Struct("=IB3x8s")
+CANFD_FRAME = struct.Struct("=IBB2x64s")
+# 每种帧待取队列的上限，超出时丢弃最早的帧
+PENDING_LIMIT = 100000
+# 硬件定时发送相关的 SetValue 路径（<通道>/<名称>），SocketCAN 不支持
+AUTO_SEND_PATHS = (
+    "clear_auto_send",
+    "auto_send",
+    "auto_send_canfd",
+    "apply_auto_send",
+)
+
+
+def _value(obj):
+    return getattr(obj, "value", obj)
+
+
+class _SocketCANChannel:
+    """
+    一个 SocketCAN 接口。CAN 与 CANFD 两个接收线程共用同一个 socket：
+    同一时刻只有一个线程在 select 中等待，读出的帧按类型放入待取队列后唤醒另一个线程。
+    """
+
+    def __init__(self, interface: str, fd: bool = False):
+        self.interface = interface
+        self.fd = fd
+        self.sock: socket.socket | None = None
+        # 已从 socket 读出、尚未被 Receive 取走的帧：(can_id, flags, data, timestamp)
+        self.can_pending: deque = deque(maxlen=PENDING_LIMIT)
+        self.canfd_pending: deque = deque(maxlen=PENDING_LIMIT)
+        self.cond = threading.Condition()
+        # 是否已有线程在 select 中等待该 socket
+        self._selecting = False
+
+    def open(self) -> None:
+        self.sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+        # 只有以 CANFD 打开的通道才接收 CANFD 帧
+        if self.fd:
+            self.sock.setsockopt(SOL_CAN_RAW, CAN_RAW_FD_FRAMES, 1)
+        self.sock.bind((self.interface,))
+        self.sock.setblocking(False)
+
+    def close(self) -> None:
+        with self.cond:
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+            self.can_pending.clear()
+            self.canfd_pending.clear()
+            self.cond.notify_all()
+
+    def drain(self) -> None:
+        """把 socket 中已到达的帧全部读入待取队列，调用方须持有 cond。"""
+        received = False
+        while self.sock is not None:
+            try:
+                raw = self.sock.recv(CANFD_FRAME.size)
+            except (BlockingIOError, InterruptedError):
+                break
+            received = True
+            timestamp = time.time_ns() // 1000
+            if len(raw) == CANFD_FRAME.size:
+                can_id, length, flags, data = CANFD_FRAME.unpack(raw)
+                self.canfd_pending.append((can_id, flags, data[:length], timestamp))
+            else:
+                can_id, length, data = CAN_FRAME.unpack(raw)
+                self.can_pending.append((can_id, 0, data[:length], timestamp))
+        if received:
+            self.cond.notify_all()
+
+    def wait(self, pending: deque, wait_time: int) -> None:
+        """
+        等待 pending 中有帧，最多 wait_time 毫秒，-1 表示一直等待。调用方须持有 cond。
+
+        没有其他线程在等待 socket 时由本线程 select，否则等待该线程读出帧后的通知。
+        """
+        deadline = None if wait_time < 0 else time.monotonic() + wait_time / 1000
+        while not pending and self.sock is not None:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    return
+            if self._selecting:
+                self.cond.wait(timeout)
+                continue
+            self._selecting = True
+            sock = self.sock
+            self.cond.release()
+            try:
+                select.select([sock], [], [], timeout)
+            except (OSError, ValueError):
+                # 等待期间 socket 已被关闭
+                pass
+            finally:
+                self.cond.acquire()
+                self._selecting = False
+            self.drain()
+            # 即使没有读到帧也唤醒其他线程，由它们接替 select
+            self.cond.notify_all()
+
+
+class SocketCANBackend(ZCANBackend):
+    """
+    Linux SocketCAN 后端，可对接真实 CAN 口或 vcan 虚拟口。
+
+    通道号按顺序映射到 interfaces 中的网络接口。波特率由系统（ip link）配置，
+    此处的 SetValue 只做记录；不支持硬件定时发送。
+    """
+
+    def __init__(self, interfaces: Sequence[str]):
+        self.interfaces = list(interfaces)
+        self._handles = itertools.count(1)
+        self._devices: Dict[int, Dict[str, object]] = {}
+        self._channels: Dict[int, _SocketCANChannel] = {}
+        # 通道句柄 -> 所属的设备句柄
+        self._channel_devices: Dict[int, int] = {}
+
+    def _channel(self, chn_handle) -> _SocketCANChannel | None:
+        return self._channels.get(_value(chn_handle))
+
+    def open_device(self, device_type, device_index, reserved):
+        handle = next(self._handles)
+        self._devices[handle] = {}
+        return handle
+
+    def close_device(self, device_handle):
+        device = _value(device_handle)
+        if self._devices.pop(device, None) is None:
+            return ZCAN_STATUS_ERR
+        # 只关闭属于该设备的通道，其他设备的通道不受影响
+        for handle, owner in list(self._channel_devices.items()):
+            if owner == device:
+                del self._channel_devices[handle]
+                channel = self._channels.pop(handle, None)
+                if channel is not None:
+                    channel.close()
+        return ZCAN_STATUS_OK
+
+    def get_device_inf(self, device_handle, info):
+        if _value(device_handle) not in self._devices:
+            return ZCAN_STATUS_ERR
+        info.can_Num = len(self.interfaces)
+        for i, c in enumerate(b"SocketCAN"):
+            info.str_hw_Type[i] = c
+        return ZCAN_STATUS_OK
+
+    def is_device_online(self, device_handle):
+        return ZCAN_STATUS_ONLINE
+
+    def init_can(self, device_handle, can_index, init_config):
+        device = _value(device_handle)
+        if device not in self._devices or not 0 <= can_index < len(self.interfaces):
+            return INVALID_CHANNEL_HANDLE
+        handle = next(self._handles)
+        fd = _value(init_config.can_type) == ZCAN_TYPE_CANFD.value
+        self._channels[handle] = _SocketCANChannel(self.interfaces[can_index], fd)
+        self._channel_devices[handle] = device
+        return handle
+
+    def start_can(self, chn_handle):
+        channel = self._channel(chn_handle)
+        if channel is None:
+            return ZCAN_STATUS_ERR
+        try:
+            channel.open()
+        except OSError:
+            return ZCAN_STATUS_ERR
+        return ZCAN_STATUS_OK
+
+    def reset_can(self, chn_handle):
+        self._channel_devices.pop(_value(chn_handle), None)
+        channel = self._channels.pop(_value(chn_handle), None)
+        if channel is None:
+            return ZCAN_STATUS_ERR
+        channel.close()
+        return ZCAN_STATUS_OK
+
+    def clear_buffer(self, chn_handle):
+        channel = self._channel(chn_handle)
+        if channel is None:
+            return ZCAN_STATUS_ERR
+        with channel.cond:
+            channel.drain()
+            channel.can_pending.clear()
+            channel.canfd_pending.clear()
+        return ZCAN_STATUS_OK
+
+    def read_channel_err_info(self, chn_handle, err_info):
+        return ZCAN_STATUS_OK if self._channel(chn_handle) else ZCAN_STATUS_ERR
+
+    def read_channel_status(self, chn_handle, status):
+        return ZCAN_STATUS_OK if self._channel(chn_handle) else ZCAN_STATUS_ERR
+
+    def get_receive_num(self, chn_handle, can_type):
+        channel = self._channel(chn_handle)
+        if channel is None or channel.sock is None:
+            return 0
+        with channel.cond:
+            channel.drain()
+            if _value(can_type):
+                return len(channel.canfd_pending)
+            return len(channel.can_pending)
+
+    def _transmit(self, chn_handle, msgs, length, fd: bool) -> int:
+        channel = self._channel(chn_handle)
+        if channel is None or channel.sock is None:
+            return 0
+        sent = 0
+        for i in range(length):
+            frame = msgs[i].frame
+            can_id = frame.can_id
+            if frame.eff:
+                can_id |= CAN_EFF_FLAG
+            if frame.rtr:
+                can_id |= CAN_RTR_FLAG
+            if fd:
+                raw = CANFD_FRAME.pack(
+                    can_id,
+                    frame.len,
+                    CANFD_BRS if frame.brs else 0,
+                    bytes(frame.data[: frame.len]),
+                )
+            else:
+                raw = CAN_FRAME.pack(
+                    can_id, frame.can_dlc, bytes(frame.data[: frame.can_dlc])
+                )
+            try:
+                channel.sock.send(raw)
+            except OSError:
+                break
+            sent += 1
+        return sent
+
+    def _receive(self, chn_handle, msgs, rcv_num, wait_time, fd: bool) -> int:
+        channel = self._channel(chn_handle)
+        if channel is None or channel.sock is None:
+            return 0
+        pending = channel.canfd_pending if fd else channel.can_pending
+        wait_time = _value(wait_time)
+        with channel.cond:
+            channel.drain()
+            if not pending and wait_time:
+                channel.wait(pending, wait_time)
+            count = min(rcv_num, len(msgs), len(pending))
+            received = [pending.popleft() for _ in range(count)]
+        for i, (can_id, flags, data, timestamp) in enumerate(received):
+            frame = msgs[i].frame
+            frame.can_id = can_id & CAN_EFF_MASK
+            frame.eff = 1 if can_id & CAN_EFF_FLAG else 0
+            frame.rtr = 1 if can_id & CAN_RTR_FLAG else 0
+            frame.err = 1 if can_id & CAN_ERR_FLAG else 0
+            if fd:
+                frame.len = len(data)
+                frame.brs = flags & CANFD_BRS
+            else:
+                frame.can_dlc = len(data)
+            ctypes.memmove(frame.data, data, len(data))
+            msgs[i].timestamp = timestamp
+        return count
+
+    def transmit(self, chn_handle, msgs, length):
+        return self._transmit(chn_handle, msgs, length, False)
+
+    def transmit_fd(self, chn_handle, msgs, length):
+        return self._transmit(chn_handle, msgs, length, True)
+
+    def receive(self, chn_handle, msgs, rcv_num, wait_time):
+        return self._receive(chn_handle, msgs, rcv_num, wait_time, False)
+
+    def receive_fd(self, chn_handle, msgs, rcv_num, wait_time):
+        return self._receive(chn_handle, msgs, rcv_num, wait_time, True)
+
+    def set_value(self, device_handle, path, value):
+        values = self._devices.get(_value(device_handle))
+        if values is None:
+            return ZCAN_STATUS_ERR
+        # 没有硬件定时发送列表，返回失败让管理器改用软件定时发送
+        if path.rsplit("/", 1)[-1] in AUTO_SEND_PATHS:
+            return ZCAN_STATUS_ERR
+        values[path] = value
+        return ZCAN_STATUS_OK
+
+    def get_value(self, device_handle, path):
+        values = self._devices.get(_value(device_handle))
+        return values.get(path) if values else None
@@ -0,0 +1,73 @@
+import time
+from typing import Dict, Hashable, Optional
+
+from zlg.queues import message_type
+
+
+class MotorState:
+    """
+    一个电机各信号的最新值。
+
+    values 为信号名 -> 最新值（含最近一帧的 timestamp），
+    timestamps 为报文类型 -> 该报文最近一帧的时间戳（微秒），
+    updated_at 为最近一次更新的本机时间（秒）。
+    """
+
+    __slots__ = ("values", "timestamps", "updated_at", "count")
+
+    def __init__(self):
+        self.values: dict = {}
+        self.timestamps: dict = {}
+        self.updated_at: Optional[float] = None
+        self.count = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "values": dict(self.values),
+            "timestamps": dict(self.timestamps),
+            "updatedAt": self.updated_at,
+            "count": self.count,
+        }
+
+
+class StateStore:
+    """
+    按数据源保存最新状态，由解析结果的发布方原地更新，读取不经过订阅队列。
+    """
+
+    def __init__(self):
+        self.states: Dict[Hashable, MotorState] = {}
+
+    def update(self, key: Hashable, items: list) -> None:
+        """
+        用一批解析结果更新状态，逐帧结果与列式结果（取每列最后一个值）均可，错误结果被忽略。
+        """
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = MotorState()
+        values = state.values
+        timestamps = state.timestamps
+        for item in items:
+            if "error" in item:
+                continue
+            timestamp = item.get("timestamp")
+            if isinstance(timestamp, list):
+                if not timestamp:
+                    continue
+                # 列式结果取每列最后一个值，字段顺序与逐帧结果一致
+                item = {
+                    name: column[-1]
+                    for name, column in item.items()
+                    if name not in ("canId", "timestamp")
+                }
+                timestamp = item["timestamp"] = timestamp[-1]
+            values.update(item)
+            timestamps[message_type(item)] = timestamp
+        state.count += len(items)
+        state.updated_at = time.time()
+
+    def get(self, key: Hashable) -> Optional[MotorState]:
+        return self.states.get(key)
+
+    def remove(self, key: Hashable) -> None:
+        self.states.pop(key, None)
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Optional
+
+from zlg.metrics import percentile
+
+# 流水线阶段，按先后顺序：
+#   dispatch  Receive 返回 -> 线程池开始解析（投递到事件循环、线程池排队）
+#   decode    线程池中解析整批帧（utils/parsing 中的解析函数）
+#   resume    解析结束 -> 事件循环继续处理
+#   publish   更新状态与历史并放入各订阅者队列
+#   deliver   放入队列 -> SSE yield（按条计）
+#   total     Receive 返回 -> SSE yield（按条计）
+STAGES = ("dispatch", "decode", "resume", "publish", "deliver", "total")
+
+
+class PipelineTracer:
+    """
+    接收 -> 解析 -> 发布 -> SSE 各阶段的耗时统计，每个阶段只保留最近 window 个样本。
+
+    批次的各时间点由管理器记录；为了在 SSE 推送时算出整条链路的耗时，
+    发布时按对象标识登记每条结果的接收时刻，最多保留 max_items 条，
+    超出的最旧登记被丢弃（对应的结果不再计入 deliver / total）。
+    未启用时管理器的 tracer 为 None，各处只多一次判空。
+    """
+
+    def __init__(self, window: int = 10000, max_items: int = 65536):
+        self.window = window
+        self.samples: Dict[str, deque] = {
+            stage: deque(maxlen=window) for stage in STAGES
+        }
+        # 每帧平均解析耗时
+        self.per_frame: deque = deque(maxlen=window)
+        self.batches = 0
+        self.max_items = max_items
+        # id(结果) -> (结果, 接收时刻, 发布时刻)，保留结果的引用以免 id 被复用
+        self._items: OrderedDict[int, tuple] = OrderedDict()
+        self.started_at = time.time()
+
+    def record_batch(
+        self,
+        count: int,
+        received: float,
+        decode_start: float,
+        decode_end: float,
+        publish_start: float,
+        published: float,
+    ) -> None:
+        """记录一批帧在事件循环与线程池中各阶段的时间点（perf_counter 秒）。"""
+        samples = self.samples
+        samples["dispatch"].append(decode_start - received)
+        samples["decode"].append(decode_end - decode_start)
+        samples["resume"].append(publish_start - decode_end)
+        samples["publish"].append(published - publish_start)
+        if count:
+            self.per_frame.append((decode_end - decode_start) / count)
+        self.batches += 1
+
+    def tag(self, items: Iterable[dict], received: float, published: float) -> None:
+        """登记一批已发布的结果，供 delivered 查找。"""
+        registry = self._items
+        for item in items:
+            registry[id(item)] = (item, received, published)
+        while len(registry) > self.max_items:
+            registry.popitem(last=False)
+
+    def delivered(self, item: dict, now: Optional[float] = None) -> None:
+        """一条结果已推送给客户端。"""
+        entry = self._items.get(id(item))
+        if entry is None or entry[0] is not item:
+            return
+        now = time.perf_counter() if now is None else now
+        self.samples["deliver"].append(now - entry[2])
+        self.samples["total"].append(now - entry[1])
+
+    def snapshot(self) -> dict:
+        """
+        :return: {"batches", "stages": {阶段: {"count", "mean", "p50", "p90", "p99", "max"}},
+            "decodePerFrame": {...}}，时间单位为毫秒。
+        """
+
+        def summarize(values: deque) -> dict:
+            ordered = sorted(values)
+            return {
+                "count": len(ordered),
+                "mean": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+                "p50": percentile(ordered, 0.50) * 1000,
+                "p90": percentile(ordered, 0.90) * 1000,
+                "p99": percentile(ordered, 0.99) * 1000,
+                "max": ordered[-1] * 1000 if ordered else 0.0,
+            }
+
+        return {
+            "batches": self.batches,
+            "startedAt": self.started_at,
+            "stages": {stage: summarize(self.samples[stage]) for stage in STAGES},
+            "decodePerFrame": summarize(self.per_frame),
+        }
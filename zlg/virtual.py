@@ -0,0 +1,476 @@
+import ctypes
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from zlg.backend import ZCANBackend
+from zlg.zlgcan import (
+    INVALID_CHANNEL_HANDLE,
+    ZCAN_STATUS_ERR,
+    ZCAN_STATUS_OFFLINE,
+    ZCAN_STATUS_OK,
+    ZCAN_STATUS_ONLINE,
+    ZCAN_USBCANFD_200U,
+)
+
+# 总线上传递的帧：(can_id, eff, rtr, fd, brs, data)
+VirtualFrame = Tuple[int, int, int, int, int, bytes]
+# 单帧数据的最大字节数
+CAN_MAX_DLEN = 8
+CANFD_MAX_DLEN = 64
+
+
+def _value(obj):
+    """ctypes 标量与 Python 整数统一取值。"""
+    return getattr(obj, "value", obj)
+
+
+def _check_frame(frame: VirtualFrame) -> None:
+    """数据长度超过帧类型的上限时抛出 ValueError。"""
+    limit = CANFD_MAX_DLEN if frame[3] else CAN_MAX_DLEN
+    if len(frame[5]) > limit:
+        raise ValueError(
+            f"帧数据长度 {len(frame[5])} 超过{'CANFD' if frame[3] else 'CAN'}帧上限 {limit}"
+        )
+
+
+class VirtualChannel:
+    """
+    虚拟总线上的一个通道，分别缓存收到的 CAN 与 CANFD 帧。
+    """
+
+    def __init__(self, bus: "VirtualBus", index: int, fifo_size: int):
+        self.bus = bus
+        self.index = index
+        self.started = False
+        self.can_fifo: deque = deque(maxlen=fifo_size)
+        self.canfd_fifo: deque = deque(maxlen=fifo_size)
+        self.cond = threading.Condition()
+        self.rx_count = 0
+        self.tx_count = 0
+        self.overflow = 0
+
+    def deliver(self, frame: VirtualFrame, timestamp: int) -> None:
+        _check_frame(frame)
+        fifo = self.canfd_fifo if frame[3] else self.can_fifo
+        with self.cond:
+            if len(fifo) == fifo.maxlen:
+                self.overflow += 1
+            fifo.append((frame, timestamp))
+            self.rx_count += 1
+            self.cond.notify_all()
+
+    def deliver_many(self, frames: Iterable[VirtualFrame], timestamp: int) -> None:
+        frames = list(frames)
+        for frame in frames:
+            _check_frame(frame)
+        with self.cond:
+            for frame in frames:
+                fifo = self.canfd_fifo if frame[3] else self.can_fifo
+                if len(fifo) == fifo.maxlen:
+                    self.overflow += 1
+                fifo.append((frame, timestamp))
+                self.rx_count += 1
+            self.cond.notify_all()
+
+    def pending(self, fd: bool) -> int:
+        return len(self.canfd_fifo if fd else self.can_fifo)
+
+    def take(self, fd: bool, rcv_num: int, wait_time: int) -> list:
+        """
+        取出至多 rcv_num 帧。缓冲区为空时最多阻塞 wait_time 毫秒，-1 表示一直等待。
+        """
+        fifo = self.canfd_fifo if fd else self.can_fifo
+        with self.cond:
+            if not fifo and wait_time:
+                timeout = None if wait_time < 0 else wait_time / 1000
+                self.cond.wait_for(lambda: fifo or not self.started, timeout)
+            count = min(rcv_num, len(fifo))
+            return [fifo.popleft() for _ in range(count)]
+
+    def clear(self) -> None:
+        with self.cond:
+            self.can_fifo.clear()
+            self.canfd_fifo.clear()
+
+
+class FrameInjector:
+    """
+    以固定速率向通道注入帧的后台线程，用于模拟电机上报的遥测数据。
+    """
+
+    def __init__(
+        self,
+        channel: VirtualChannel,
+        frames: Callable[[], VirtualFrame] | Iterable[VirtualFrame],
+        rate: float,
+        tick: float = 0.001,
+    ):
+        self.channel = channel
+        self.rate = rate
+        self.tick = tick
+        if callable(frames):
+            self._next_frame = frames
+        else:
+            frames = list(frames)
+            for frame in frames:
+                _check_frame(frame)
+            self._next_frame = itertools.cycle(frames).__next__
+        self.injected = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"virtual-inject-{channel.index}", daemon=True
+        )
+
+    def start(self) -> "FrameInjector":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        # 按绝对时间计算应注入的帧数，每个 tick 批量投递，避免逐帧 sleep 造成的漂移
+        start = time.perf_counter()
+        while not self._stop_event.is_set():
+            due = int((time.perf_counter() - start) * self.rate) - self.injected
+            if due > 0:
+                frames = [self._next_frame() for _ in range(due)]
+                self.channel.deliver_many(frames, self.channel.bus.timestamp())
+                self.injected += due
+            self._stop_event.wait(self.tick)
+
+
+class AutoSendTable:
+    """
+    模拟设备的硬件定时发送列表：apply 后由后台线程按各条目的周期发送。
+    """
+
+    def __init__(self, bus: "VirtualBus", chn: int):
+        self.bus = bus
+        self.chn = chn
+        # index -> (interval_ms, frame, transmit_type)
+        self.entries: Dict[int, tuple] = {}
+        self.sent = 0
+        self._stop_event: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def set(self, obj, fd: bool) -> None:
+        if not obj.enable:
+            self.entries.pop(obj.index, None)
+            return
+        frame = obj.obj.frame
+        size = frame.len if fd else frame.can_dlc
+        virtual_frame = (
+            frame.can_id,
+            frame.eff,
+            frame.rtr,
+            int(fd),
+            frame.brs if fd else 0,
+            bytes(frame.data[:size]),
+        )
+        self.entries[obj.index] = (obj.interval, virtual_frame, obj.obj.transmit_type)
+
+    def clear(self) -> None:
+        self.stop()
+        self.entries.clear()
+
+    def apply(self) -> None:
+        self.stop()
+        if not self.entries:
+            return
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(dict(self.entries), self._stop_event),
+            name=f"virtual-auto-send-{self.chn}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, entries: Dict[int, tuple], stop_event: threading.Event) -> None:
+        start = time.perf_counter()
+        deadlines = {index: start for index in entries}
+        while not stop_event.is_set():
+            now = time.perf_counter()
+            due = [index for index, deadline in deadlines.items() if deadline <= now]
+            if due:
+                frames = [entries[index][1] for index in due]
+                echo = [entries[index][2] == 2 for index in due]
+                self.bus.transmit(self.chn, frames, echo)
+                self.sent += len(frames)
+                for index in due:
+                    deadlines[index] += entries[index][0] / 1000
+                    # 落后超过一个周期时不补发，与硬件行为一致
+                    if deadlines[index] <= now:
+                        deadlines[index] = now + entries[index][0] / 1000
+            stop_event.wait(max(0.0, min(deadlines.values()) - time.perf_counter()))
+
+
+class VirtualBus:
+    """
+    进程内虚拟 CAN 总线，对应一台虚拟设备。
+
+    同一总线上的通道互相连通：任一通道发送的帧会被其他已启动的通道接收，
+    自发自收（transmit_type=2）的帧同时回送给发送通道。
+    """
+
+    def __init__(self, channel_count: int = 2, fifo_size: int = 100000):
+        self.channels = [
+            VirtualChannel(self, i, fifo_size) for i in range(channel_count)
+        ]
+        self.values: Dict[str, object] = {}
+        self.injectors: list[FrameInjector] = []
+        self.auto_send = [AutoSendTable(self, i) for i in range(channel_count)]
+        self._epoch = time.perf_counter_ns()
+
+    def timestamp(self) -> int:
+        """总线时间戳，单位微秒，与 ZCAN_Receive_Data.timestamp 一致。"""
+        return (time.perf_counter_ns() - self._epoch) // 1000
+
+    def transmit(self, chn: int, frames: list[VirtualFrame], self_rx: list[bool]) -> int:
+        timestamp = self.timestamp()
+        sender = self.channels[chn]
+        for channel in self.channels:
+            if channel is sender:
+                echoed = [frame for frame, echo in zip(frames, self_rx) if echo]
+                if echoed:
+                    channel.deliver_many(echoed, timestamp)
+            elif channel.started:
+                channel.deliver_many(frames, timestamp)
+        sender.tx_count += len(frames)
+        return len(frames)
+
+    def inject(
+        self,
+        chn: int,
+        can_id: int,
+        data: bytes | list[int],
+        eff: int = 1,
+        fd: int = 0,
+        brs: int = 0,
+    ) -> None:
+        """
+        向通道注入一帧，效果等同于从总线上收到该帧。
+        """
+        frame = (can_id, eff, 0, fd, brs, bytes(data))
+        self.channels[chn].deliver(frame, self.timestamp())
+
+    def start_injector(
+        self,
+        chn: int,
+        frames: Callable[[], VirtualFrame] | Iterable[VirtualFrame],
+        rate: float,
+    ) -> FrameInjector:
+        """
+        以 rate 帧/秒的速率持续向通道注入帧。
+
+        :param chn: 通道号。
+        :param frames: 帧序列（循环使用）或每次返回一帧的函数。
+        :param rate: 注入速率，帧/秒。
+        :return: 已启动的 FrameInjector，调用 stop() 停止。
+        """
+        injector = FrameInjector(self.channels[chn], frames, rate).start()
+        self.injectors.append(injector)
+        return injector
+
+    def stop_injectors(self) -> None:
+        for injector in self.injectors:
+            injector.stop()
+        self.injectors.clear()
+
+    def stop_auto_send(self) -> None:
+        for table in self.auto_send:
+            table.clear()
+
+
+class VirtualBackend(ZCANBackend):
+    """
+    纯 Python 虚拟设备后端，无需硬件和 DLL，可在 Linux 上运行。
+
+    每个 (设备类型, 设备索引) 对应一条独立的 VirtualBus，可通过 bus() 取得并注入帧。
+    """
+
+    def __init__(self, channel_count: int = 2, fifo_size: int = 100000):
+        self.channel_count = channel_count
+        self.fifo_size = fifo_size
+        self.buses: Dict[Tuple[int, int], VirtualBus] = {}
+        self._handles = itertools.count(1)
+        self._devices: Dict[int, VirtualBus] = {}
+        self._channels: Dict[int, VirtualChannel] = {}
+        self._lock = threading.Lock()
+
+    def bus(
+        self, device_index: int = 0, device_type: int = ZCAN_USBCANFD_200U
+    ) -> VirtualBus:
+        """设备类型与设备索引对应的总线，设备类型默认为 USBCANFD-200U。"""
+        key = (_value(device_type), _value(device_index))
+        with self._lock:
+            if key not in self.buses:
+                self.buses[key] = VirtualBus(self.channel_count, self.fifo_size)
+            return self.buses[key]
+
+    def _channel(self, chn_handle) -> Optional[VirtualChannel]:
+        return self._channels.get(_value(chn_handle))
+
+    def open_device(self, device_type, device_index, reserved):
+        bus = self.bus(device_index, device_type)
+        handle = next(self._handles)
+        self._devices[handle] = bus
+        return handle
+
+    def close_device(self, device_handle):
+        bus = self._devices.pop(_value(device_handle), None)
+        if bus is None:
+            return ZCAN_STATUS_ERR
+        for handle, channel in list(self._channels.items()):
+            if channel.bus is bus:
+                self._release_channel(handle)
+        bus.stop_injectors()
+        bus.stop_auto_send()
+        return ZCAN_STATUS_OK
+
+    def get_device_inf(self, device_handle, info):
+        bus = self._devices.get(_value(device_handle))
+        if bus is None:
+            return ZCAN_STATUS_ERR
+        info.hw_Version = info.fw_Version = info.dr_Version = info.in_Version = 0x100
+        info.can_Num = len(bus.channels)
+        for i, c in enumerate(b"VIRTUAL0"):
+            info.str_Serial_Num[i] = c
+        for i, c in enumerate(b"VirtualCAN"):
+            info.str_hw_Type[i] = c
+        return ZCAN_STATUS_OK
+
+    def is_device_online(self, device_handle):
+        if _value(device_handle) in self._devices:
+            return ZCAN_STATUS_ONLINE
+        return ZCAN_STATUS_OFFLINE
+
+    def init_can(self, device_handle, can_index, init_config):
+        bus = self._devices.get(_value(device_handle))
+        if bus is None or not 0 <= can_index < len(bus.channels):
+            return INVALID_CHANNEL_HANDLE
+        handle = next(self._handles)
+        self._channels[handle] = bus.channels[can_index]
+        return handle
+
+    def start_can(self, chn_handle):
+        channel = self._channel(chn_handle)
+        if channel is None:
+            return ZCAN_STATUS_ERR
+        channel.started = True
+        return ZCAN_STATUS_OK
+
+    def _release_channel(self, handle) -> None:
+        channel = self._channels.pop(handle)
+        with channel.cond:
+            channel.started = False
+            channel.cond.notify_all()
+        channel.clear()
+
+    def reset_can(self, chn_handle):
+        if self._channel(chn_handle) is None:
+            return ZCAN_STATUS_ERR
+        self._release_channel(_value(chn_handle))
+        return ZCAN_STATUS_OK
+
+    def clear_buffer(self, chn_handle):
+        channel = self._channel(chn_handle)
+        if channel is None:
+            return ZCAN_STATUS_ERR
+        channel.clear()
+        return ZCAN_STATUS_OK
+
+    def read_channel_err_info(self, chn_handle, err_info):
+        return ZCAN_STATUS_OK if self._channel(chn_handle) else ZCAN_STATUS_ERR
+
+    def read_channel_status(self, chn_handle, status):
+        return ZCAN_STATUS_OK if self._channel(chn_handle) else ZCAN_STATUS_ERR
+
+    def get_receive_num(self, chn_handle, can_type):
+        channel = self._channel(chn_handle)
+        return channel.pending(bool(_value(can_type))) if channel else 0
+
+    def _transmit(self, chn_handle, msgs, length, fd: int) -> int:
+        channel = self._channel(chn_handle)
+        if channel is None or not channel.started:
+            return 0
+        frames = []
+        self_rx = []
+        for i in range(length):
+            frame = msgs[i].frame
+            size = frame.len if fd else frame.can_dlc
+            brs = frame.brs if fd else 0
+            data = bytes(frame.data[:size])
+            frames.append((frame.can_id, frame.eff, frame.rtr, fd, brs, data))
+            self_rx.append(msgs[i].transmit_type == 2)
+        return channel.bus.transmit(channel.index, frames, self_rx)
+
+    def _receive(self, chn_handle, msgs, rcv_num, wait_time, fd: int) -> int:
+        channel = self._channel(chn_handle)
+        if channel is None:
+            return 0
+        rcv_num = min(rcv_num, len(msgs))
+        received = channel.take(bool(fd), rcv_num, _value(wait_time))
+        for i, ((can_id, eff, rtr, _, brs, data), timestamp) in enumerate(received):
+            msg = msgs[i]
+            frame = msg.frame
+            data = data[: len(frame.data)]
+            frame.can_id = can_id
+            frame.eff = eff
+            frame.rtr = rtr
+            if fd:
+                frame.len = len(data)
+                frame.brs = brs
+            else:
+                frame.can_dlc = len(data)
+            ctypes.memmove(frame.data, data, len(data))
+            msg.timestamp = timestamp
+        return len(received)
+
+    def transmit(self, chn_handle, msgs, length):
+        return self._transmit(chn_handle, msgs, length, 0)
+
+    def transmit_fd(self, chn_handle, msgs, length):
+        return self._transmit(chn_handle, msgs, length, 1)
+
+    def receive(self, chn_handle, msgs, rcv_num, wait_time):
+        return self._receive(chn_handle, msgs, rcv_num, wait_time, 0)
+
+    def receive_fd(self, chn_handle, msgs, rcv_num, wait_time):
+        return self._receive(chn_handle, msgs, rcv_num, wait_time, 1)
+
+    def set_value(self, device_handle, path, value):
+        bus = self._devices.get(_value(device_handle))
+        if bus is None:
+            return ZCAN_STATUS_ERR
+        chn, _, name = path.partition("/")
+        if name in ("auto_send", "auto_send_canfd", "clear_auto_send", "apply_auto_send"):
+            if not chn.isdigit() or int(chn) >= len(bus.auto_send):
+                return ZCAN_STATUS_ERR
+            table = bus.auto_send[int(chn)]
+            match name:
+                case "auto_send" | "auto_send_canfd":
+                    # 定时发送条目以 byref(ZCAN_AUTO_TRANSMIT_OBJ) 传入
+                    table.set(value._obj, name == "auto_send_canfd")
+                case "clear_auto_send":
+                    table.clear()
+                case "apply_auto_send":
+                    table.apply()
+            return ZCAN_STATUS_OK
+        bus.values[path] = value
+        return ZCAN_STATUS_OK
+
+    def get_value(self, device_handle, path):
+        bus = self._devices.get(_value(device_handle))
+        return bus.values.get(path) if bus else None
@@ -8,14 +8,12 @@ from ctypes import (
     c_void_p,
     Structure,
     Union,
-    POINTER,
     CFUNCTYPE,
-    byref,
-    windll,
 )
-import platform
 import threading
 
+from zlg.backend import DllBackend, ZCANBackend
+
 ZCAN_DEVICE_TYPE = c_uint
 
 INVALID_DEVICE_HANDLE = 0
@@ -345,25 +343,61 @@ class IProperty(Structure):
     ]
 
 
+class ReceiveBufferPool(object):
+    """
+    预分配的接收缓冲区池。
+
+    每个缓冲区是容量固定的 ZCAN_Receive_Data（或 ZCAN_ReceiveFD_Data）数组，
+    配合 ZCAN.ReceiveInto/ReceiveFDInto 使用，解析完成后通过 release 归还复用，
+    避免每次接收都重新分配 ctypes 数组。池空时临时分配新缓冲区，池内最多保留 count 个。
+    """
+
+    def __init__(self, capacity, count=4, fd=False):
+        self.capacity = capacity
+        self.count = count
+        self.fd = fd
+        self.buffer_type = (ZCAN_ReceiveFD_Data if fd else ZCAN_Receive_Data) * capacity
+        self.allocated = count
+        self.__free = [self.buffer_type() for _ in range(count)]
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        with self.__lock:
+            if self.__free:
+                return self.__free.pop()
+            self.allocated += 1
+        return self.buffer_type()
+
+    def release(self, buffer):
+        with self.__lock:
+            if len(self.__free) < self.count:
+                self.__free.append(buffer)
+
+    @property
+    def available(self):
+        return len(self.__free)
+
+
 class ZCAN(object):
-    def __init__(self, dll_path):
-        if platform.system() == "Windows":
-            self.__dll = windll.LoadLibrary(dll_path)
-        else:
-            print("No support now!")
-        if self.__dll == None:
-            print("DLL couldn't be loaded!")
+    def __init__(self, dll_path=None, backend: ZCANBackend | None = None):
+        if backend is None:
+            backend = DllBackend(dll_path)
+        self.__backend = backend
+
+    @property
+    def backend(self) -> ZCANBackend:
+        return self.__backend
 
     def OpenDevice(self, device_type, device_index, reserved):
         try:
-            return self.__dll.ZCAN_OpenDevice(device_type, device_index, reserved)
+            return self.__backend.open_device(device_type, device_index, reserved)
         except:
             print("Exception on OpenDevice!")
             raise
 
     def CloseDevice(self, device_handle):
         try:
-            return self.__dll.ZCAN_CloseDevice(device_handle)
+            return self.__backend.close_device(device_handle)
         except:
             print("Exception on CloseDevice!")
             raise
@@ -371,7 +405,7 @@ class ZCAN(object):
     def GetDeviceInf(self, device_handle):
         try:
             info = ZCAN_DEVICE_INFO()
-            ret = self.__dll.ZCAN_GetDeviceInf(device_handle, byref(info))
+            ret = self.__backend.get_device_inf(device_handle, info)
             return info if ret == ZCAN_STATUS_OK else None
         except:
             print("Exception on ZCAN_GetDeviceInf")
@@ -379,35 +413,35 @@ class ZCAN(object):
 
     def DeviceOnLine(self, device_handle):
         try:
-            return self.__dll.ZCAN_IsDeviceOnLine(device_handle)
+            return self.__backend.is_device_online(device_handle)
         except:
             print("Exception on ZCAN_ZCAN_IsDeviceOnLine!")
             raise
 
     def InitCAN(self, device_handle, can_index, init_config):
         try:
-            return self.__dll.ZCAN_InitCAN(device_handle, can_index, byref(init_config))
+            return self.__backend.init_can(device_handle, can_index, init_config)
         except:
             print("Exception on ZCAN_InitCAN!")
             raise
 
     def StartCAN(self, chn_handle):
         try:
-            return self.__dll.ZCAN_StartCAN(chn_handle)
+            return self.__backend.start_can(chn_handle)
         except:
             print("Exception on ZCAN_StartCAN!")
             raise
 
     def ResetCAN(self, chn_handle):
         try:
-            return self.__dll.ZCAN_ResetCAN(chn_handle)
+            return self.__backend.reset_can(chn_handle)
         except:
             print("Exception on ZCAN_ResetCAN!")
             raise
 
     def ClearBuffer(self, chn_handle):
         try:
-            return self.__dll.ZCAN_ClearBuffer(chn_handle)
+            return self.__backend.clear_buffer(chn_handle)
         except:
             print("Exception on ZCAN_ClearBuffer!")
             raise
@@ -415,7 +449,7 @@ class ZCAN(object):
     def ReadChannelErrInfo(self, chn_handle):
         try:
             ErrInfo = ZCAN_CHANNEL_ERR_INFO()
-            ret = self.__dll.ZCAN_ReadChannelErrInfo(chn_handle, byref(ErrInfo))
+            ret = self.__backend.read_channel_err_info(chn_handle, ErrInfo)
             return ErrInfo if ret == ZCAN_STATUS_OK else None
         except:
             print("Exception on ZCAN_ReadChannelErrInfo!")
@@ -424,7 +458,7 @@ class ZCAN(object):
     def ReadChannelStatus(self, chn_handle):
         try:
             status = ZCAN_CHANNEL_STATUS()
-            ret = self.__dll.ZCAN_ReadChannelStatus(chn_handle, byref(status))
+            ret = self.__backend.read_channel_status(chn_handle, status)
             return status if ret == ZCAN_STATUS_OK else None
         except:
             print("Exception on ZCAN_ReadChannelStatus!")
@@ -432,51 +466,63 @@ class ZCAN(object):
 
     def GetReceiveNum(self, chn_handle, can_type=ZCAN_TYPE_CAN):
         try:
-            return self.__dll.ZCAN_GetReceiveNum(chn_handle, can_type)
+            return self.__backend.get_receive_num(chn_handle, can_type)
         except:
             print("Exception on ZCAN_GetReceiveNum!")
             raise
 
     def Transmit(self, chn_handle, std_msg, len):
         try:
-            return self.__dll.ZCAN_Transmit(chn_handle, byref(std_msg), len)
+            return self.__backend.transmit(chn_handle, std_msg, len)
         except:
             print("Exception on ZCAN_Transmit!")
             raise
 
     def Receive(self, chn_handle, rcv_num, wait_time=c_int(-1)):# -> tuple[Any, Any]:
+        rcv_can_msgs = (ZCAN_Receive_Data * rcv_num)()
+        ret = self.ReceiveInto(chn_handle, rcv_can_msgs, rcv_num, wait_time)
+        return rcv_can_msgs, ret
+
+    def ReceiveInto(self, chn_handle, rcv_can_msgs, rcv_num=None, wait_time=c_int(-1)):
         try:
-            rcv_can_msgs = (ZCAN_Receive_Data * rcv_num)()
-            ret = self.__dll.ZCAN_Receive(
-                chn_handle, byref(rcv_can_msgs), rcv_num, wait_time
-            )
-            return rcv_can_msgs, ret
+            if rcv_num is None or rcv_num > len(rcv_can_msgs):
+                rcv_num = len(rcv_can_msgs)
+            return self.__backend.receive(chn_handle, rcv_can_msgs, rcv_num, wait_time)
         except:
             print("Exception on ZCAN_Receive!")
             raise
 
     def TransmitFD(self, chn_handle, fd_msg, len):
         try:
-            return self.__dll.ZCAN_TransmitFD(chn_handle, byref(fd_msg), len)
+            return self.__backend.transmit_fd(chn_handle, fd_msg, len)
         except:
             print("Exception on ZCAN_TransmitFD!")
             raise
 
     def ReceiveFD(self, chn_handle, rcv_num, wait_time=c_int(-1)):
+        rcv_canfd_msgs = (ZCAN_ReceiveFD_Data * rcv_num)()
+        ret = self.ReceiveFDInto(chn_handle, rcv_canfd_msgs, rcv_num, wait_time)
+        return rcv_canfd_msgs, ret
+
+    def ReceiveFDInto(
+        self, chn_handle, rcv_canfd_msgs, rcv_num=None, wait_time=c_int(-1)
+    ):
         try:
-            rcv_canfd_msgs = (ZCAN_ReceiveFD_Data * rcv_num)()
-            ret = self.__dll.ZCAN_ReceiveFD(
-                chn_handle, byref(rcv_canfd_msgs), rcv_num, wait_time
+            if rcv_num is None or rcv_num > len(rcv_canfd_msgs):
+                rcv_num = len(rcv_canfd_msgs)
+            return self.__backend.receive_fd(
+                chn_handle, rcv_canfd_msgs, rcv_num, wait_time
             )
-            return rcv_canfd_msgs, ret
         except:
             print("Exception on ZCAN_ReceiveFD!")
             raise
 
+    def CreateReceiveBufferPool(self, capacity, count=4, fd=False):
+        return ReceiveBufferPool(capacity, count, fd)
+
     def GetIProperty(self, device_handle):
         try:
-            self.__dll.GetIProperty.restype = POINTER(IProperty)
-            return self.__dll.GetIProperty(device_handle)
+            return self.__backend.get_iproperty(device_handle)
         except:
             print("Exception on ZCAN_GetIProperty!")
             raise
@@ -499,27 +545,21 @@ class ZCAN(object):
 
     def ReleaseIProperty(self, iproperty):
         try:
-            return self.__dll.ReleaseIProperty(iproperty)
+            return self.__backend.release_iproperty(iproperty)
         except:
             print("Exception on ZCAN_ReleaseIProperty!")
             raise
 
     def ZCAN_SetValue(self, device_handle, path, value):
         try:
-            self.__dll.ZCAN_SetValue.argtypes = [c_void_p, c_char_p, c_void_p]
-            return self.__dll.ZCAN_SetValue(device_handle, path.encode("utf-8"), value)
+            return self.__backend.set_value(device_handle, path, value)
         except:
             print("Exception on ZCAN_SetValue")
             raise
 
     def ZCAN_GetValue(self, device_handle, path):
         try:
-            self.__dll.ZCAN_GetValue.argtypes = [c_void_p, c_char_p]
-            self.__dll.ZCAN_GetValue.restype = c_void_p
-            return self.__dll.ZCAN_GetValue(device_handle, path.encode("utf-8"))
+            return self.__backend.get_value(device_handle, path)
         except:
             print("Exception on ZCAN_GetValue")
             raise
-
-
-